@@ -14,7 +14,7 @@ html_theme = "sphinx_rtd_theme"
 
 # Avoid imports that may be unsatisfied when running sphinx, see:
 # http://stackoverflow.com/questions/15889621/sphinx-how-to-exclude-imports-in-automodule#15912502
-autodoc_mock_imports = ["scipy", "scipy.interpolate", "sklearn"]
+autodoc_mock_imports = ["scipy", "scipy.interpolate"]
 
 # set up extensions
 
@@ -101,7 +101,6 @@ intersphinx_mapping = {
     "matplotlib": ("https://matplotlib.org/stable/", None),
     "scipy": ("https://docs.scipy.org/doc/scipy/", None),
     "h5py": ("https://docs.h5py.org/en/stable", None),
-    "sklearn": ("https://scikit-learn.org/stable/", None),
 }
 default_role = "py:obj"  # interpret `function` as crossref to the py object 'function'
 
@@ -31,6 +31,10 @@ from .parameterizations.packed_interp.packed_interp import (
     packed_interp,
     packed_interp_gen,
 )
+from .parameterizations.packed_quant.packed_quant import (
+    packed_quant,
+    packed_quant_gen,
+)
 
 from .core.ensemble import Ensemble
 from .core.factory import (
@@ -40,19 +44,23 @@ from .core.factory import (
     read,
     read_metadata,
     convert,
+    explain_conversion,
     concatenate,
     iterator,
+    iterate_ranges,
     data_length,
     from_tables,
     is_qp_file,
     write_dict,
     read_dict,
+    LazyEnsembleDict,
     stats,
 )
+from .core.parallel import map_chunks, convert_file
 from .core.lazy_modules import *
 
 
-from .utils import array, interpolation, dictionary, conversion
+from .utils import array, interpolation, dictionary, conversion, hdf5_io
 
 from .parameterizations.packed_interp import packing_utils
 
@@ -0,0 +1,111 @@
+"""This module chooses how to convert distributions from one parameterization to another"""
+
+from __future__ import annotations
+
+from collections import namedtuple
+from typing import Optional
+
+from ..parameterizations.base import Pdf_gen
+
+# A way to extract the data of one parameterization from distributions of another.
+# ``cost`` is the relative cost per extracted value, in the units of `Pdf_gen.evaluation_costs`
+ConversionRoute = namedtuple(
+    "ConversionRoute", ["kind", "extract_func", "cost", "description"]
+)
+
+
+def _summary(func) -> str:
+    """Return the first paragraph of the docstring of a function, on one line"""
+    doc = (func.__doc__ or "").strip()
+    return " ".join(doc.split("\n\n", maxsplit=1)[0].split())
+
+
+def plan_conversion(
+    from_class: Pdf_gen, to_class: Pdf_gen, method: Optional[str] = None
+) -> list[ConversionRoute]:
+    """Return the routes that can convert distributions of ``from_class``
+    to ``to_class``, cheapest first.
+
+    The extraction method of ``to_class`` can always be used. It evaluates a
+    function of the input distributions, and costs as much as evaluating that
+    function for ``from_class`` (see `Pdf_gen.evaluation_costs`). If no ``method``
+    is requested, ``to_class`` can also register a shortcut that extracts its data
+    directly from the data of ``from_class``, with its own cost. When the costs are
+    equal the extraction method is preferred.
+
+    Parameters
+    ----------
+    from_class : Pdf_gen
+        The class of the input distributions
+    to_class : Pdf_gen
+        The class to convert to
+    method : Optional[str], optional
+        The extraction method of ``to_class`` to use, by default None, which uses
+        the default extraction method or a shortcut
+
+    Returns
+    -------
+    list[ConversionRoute]
+        The possible routes, the first one being the cheapest
+
+    Raises
+    ------
+    KeyError
+        Raised if ``to_class`` does not have the requested extraction method
+    """
+    extract_func = to_class.extraction_method(method)
+    if extract_func is None:
+        raise KeyError(
+            "Class named %s does not have a extraction_method named %s"
+            % (to_class.name, method)
+        )
+    evaluates = to_class.extraction_evaluates(method) or "pdf"
+    routes = [
+        ConversionRoute(
+            "extraction",
+            extract_func,
+            from_class.evaluation_costs.get(evaluates, 1.0),
+            f"evaluates the {evaluates} of the {from_class.name} distributions",
+        )
+    ]
+    if method is None:
+        shortcut = to_class.shortcut_method(from_class.name)
+        if shortcut is not None:
+            shortcut_func, cost = shortcut
+            routes.append(
+                ConversionRoute(
+                    "shortcut", shortcut_func, cost, _summary(shortcut_func)
+                )
+            )
+    return sorted(routes, key=lambda route: route.cost)
+
+
+def describe_conversion(
+    from_class: Pdf_gen, to_class: Pdf_gen, method: Optional[str] = None
+) -> str:
+    """Describe the routes that can convert distributions of ``from_class`` to
+    ``to_class``, and which one is used, see `plan_conversion`.
+
+    Parameters
+    ----------
+    from_class : Pdf_gen
+        The class of the input distributions
+    to_class : Pdf_gen
+        The class to convert to
+    method : Optional[str], optional
+        The extraction method of ``to_class`` to use, by default None
+
+    Returns
+    -------
+    str
+        The description of the routes, cheapest first
+    """
+    routes = plan_conversion(from_class, to_class, method)
+    lines = [f"Converting {from_class.name} to {to_class.name}:"]
+    for i, route in enumerate(routes):
+        marker = "*" if i == 0 else " "
+        lines.append(
+            f"{marker} {route.kind} {route.extract_func.__name__} "
+            f"(relative cost {route.cost:g}): {route.description}"
+        )
+    return "\n".join(lines)
@@ -8,7 +8,6 @@ import h5py
 import numpy as np
 import tables_io
 from tables_io import hdf5
-from typing import Mapping, Optional, Union
 from numpy.typing import ArrayLike
 
 from ..utils.dictionary import (
@@ -21,8 +20,17 @@ from ..utils.dictionary import (
     expand_dimensions,
 )
 from ..utils.array import encode_strings, reduce_dimensions
+from ..utils.hdf5_io import (
+    check_write_options,
+    has_write_options,
+    downcast_dtype,
+    initialize_HDF5_write,
+    write_tables_to_HDF5,
+)
 from ..metrics import quick_moment
 from ..parameterizations.base import Pdf_gen
+from .transport import SharedEnsembleHandle, rebuild_kwds
+from .conversion_planner import plan_conversion
 
 # import psutil
 # import timeit
@@ -118,6 +126,8 @@ class Ensemble:
 
         self._gridded = None
         self._samples = None
+        # the attachment to the shared memory block holding the arrays, see `from_shared_memory`
+        self._shm = None
 
     def __repr__(self) -> str:
         class_name = type(self).__name__
@@ -168,6 +178,151 @@ class Ensemble:
             ancil = None
         return Ensemble(self._gen_obj, data=red_data, ancil=ancil)
 
+    def _rebuild_data(self) -> tuple[Mapping, Mapping]:
+        """Return the metadata and the object data needed to rebuild this ensemble,
+        with the object data arrays made contiguous and at least 2D."""
+        meta = {}
+        for k, v in self.metadata.items():
+            if k in ["pdf_name", "pdf_version"]:
+                continue
+            meta[k] = np.squeeze(v)
+        objdata = {}
+        for k, v in self.objdata.items():
+            if self.npdf == 1 and np.ndim(v) < 2:
+                v = np.expand_dims(v, 0)
+            objdata[k] = np.ascontiguousarray(v)
+        return meta, objdata
+
+    def __reduce_ex__(self, protocol: int):
+        """Pickle this ensemble as its parameterization name, metadata, object data and
+        ancillary data, rather than its frozen `scipy.stats` object.
+
+        The arrays are made contiguous, so that with pickle protocol 5 numpy passes them
+        as out-of-band `pickle.PickleBuffer` objects when a ``buffer_callback`` is given,
+        avoiding copies. The ensemble is rebuilt without repeating the input validation
+        and normalization.
+        """
+        meta, objdata = self._rebuild_data()
+        ancil = None
+        if self._ancil is not None:
+            ancil = {k: np.ascontiguousarray(v) for k, v in self._ancil.items()}
+        return (_rebuild_ensemble, (self._gen_class.name, meta, objdata, ancil))
+
+    def to_shared_memory(self) -> SharedEnsembleHandle:
+        """Copy the object data and ancillary data arrays of this ensemble into a
+        `multiprocessing.shared_memory.SharedMemory` block.
+
+        The returned handle is small and picklable. It can be sent to worker processes,
+        which call `Ensemble.from_shared_memory` to build an ensemble on the shared arrays
+        without copying them. The calling process owns the shared memory block, and
+        must call ``handle.unlink()`` when the workers are done. Each ensemble built with
+        `from_shared_memory` should call `close_shared_memory` once it is no longer needed.
+
+        Returns
+        -------
+        SharedEnsembleHandle
+            The handle to the shared memory block
+
+        Examples
+        --------
+
+        >>> import qp
+        >>> from concurrent.futures import ProcessPoolExecutor
+        >>> def get_means(handle):
+        ...     shared_ens = qp.Ensemble.from_shared_memory(handle)
+        ...     means = shared_ens.mean()
+        ...     shared_ens.close_shared_memory()
+        ...     return means
+        >>> with ens.to_shared_memory() as handle:
+        ...     with ProcessPoolExecutor(4) as executor:
+        ...         means = executor.submit(get_means, handle).result()
+
+        """
+        meta, objdata = self._rebuild_data()
+        return SharedEnsembleHandle.from_tables(
+            self._gen_class.name, meta, dict(data=objdata, ancil=self._ancil)
+        )
+
+    @staticmethod
+    def from_shared_memory(handle: SharedEnsembleHandle) -> Ensemble:
+        """Build an ensemble on the arrays in a shared memory block made by `to_shared_memory`.
+
+        The ensemble is rebuilt without repeating the input validation and normalization,
+        so parameterizations that do not transform their inputs use the shared arrays directly.
+        Changes to the shared arrays are seen by all the processes using them.
+
+        Parameters
+        ----------
+        handle : SharedEnsembleHandle
+            The handle returned by `to_shared_memory`
+
+        Returns
+        -------
+        Ensemble
+            The ensemble using the shared arrays
+        """
+        attachment = handle.attach()
+        tables = attachment.tables()
+        ens = _rebuild_ensemble(
+            handle.pdf_name, handle.meta, tables["data"], tables.get("ancil")
+        )
+        # keep the shared memory mapped for as long as the ensemble exists
+        ens._shm = attachment
+        return ens
+
+    def close_shared_memory(self) -> None:
+        """Close the shared memory block used by an ensemble built with `from_shared_memory`.
+
+        This releases the mapping of the block in the current process, and should be
+        called by every process that built an ensemble on the block, including the one
+        that owns it, before the owner calls ``handle.unlink()``. The ensemble can not be
+        used afterwards. This does nothing for ensembles that do not use shared memory.
+
+        Raises
+        ------
+        BufferError
+            Raised if arrays of the ensemble are still referenced elsewhere, for example
+            by a slice of the ensemble. The block stays open and the ensemble stays usable,
+            although its cached grid and samples are dropped, and this can be called again
+            once the arrays are deleted.
+        """
+        if self._shm is None:
+            return
+        # remember which ancillary data arrays are in the block, to restore them
+        ancil_items = None
+        if self._ancil is not None:
+            ancil_items = [
+                (key, None if self._shm.is_shared(val) else val)
+                for key, val in self._ancil.items()
+            ]
+        # drop the references to the shared arrays, so that the block can be closed
+        self._frozen = None
+        self._gen_obj = None
+        self._ancil = None
+        self._gridded = None
+        self._samples = None
+        if not self._shm.in_use():
+            self._shm.close()
+            self._shm = None
+            return
+
+        # rebuild the distributions on new views of the block, which stays open
+        tables = self._shm.tables()
+        data = dict(self._shm.handle.meta)
+        data.update(tables["data"])
+        data.update(rebuild_kwds(self._gen_class))
+        self._frozen = self._gen_class.creation_method(None)(**data)
+        self._gen_obj = self._frozen.dist
+        if ancil_items is not None:
+            self._ancil = {
+                key: tables["ancil"][key] if val is None else val
+                for key, val in ancil_items
+            }
+        raise BufferError(
+            "Arrays of this ensemble are still in use, delete them before closing "
+            "the shared memory"
+        )
+
     @property
     def gen_func(self):
         """Return the function used to create the distribution object for this ensemble"""
@@ -271,7 +426,9 @@ class Ensemble:
         Other Parameters
         ----------------
         method : str
-            Optional argument to specify a non-default conversion algorithm
+            Optional argument to specify a non-default conversion algorithm. If it
+            is not given, a shortcut from the parameterization of this Ensemble is
+            used when it is cheaper, see `qp.explain_conversion`.
 
         Returns
         -------
@@ -302,13 +459,8 @@ class Ensemble:
                 "Class named %s does not have a creation_method named %s"
                 % (class_name, method)
             )
-        extract_func = to_class.extraction_method(method)
-        if extract_func is None:  # pragma: no cover
-            raise KeyError(
-                "Class named %s does not have a extraction_method named %s"
-                % (class_name, method)
-            )
-        data = extract_func(self, **kwds)
+        route = plan_conversion(self._gen_class, to_class, method)[0]
+        data = route.extract_func(self, **kwds)
         return Ensemble(to_class, data=data, method=method)
 
     def update(self, data: Mapping, ancil: Optional[Mapping] = None) -> None:
@@ -645,7 +797,15 @@ class Ensemble:
             self._gridded = (grid, self.pdf(grid))
         return self._gridded
 
-    def write_to(self, filename: str) -> None:
+    def write_to(
+        self,
+        filename: str,
+        compression: Optional[str] = None,
+        compression_opts: Optional[int] = None,
+        shuffle: bool = False,
+        chunk_size: Optional[int] = None,
+        downcast: bool = False,
+    ) -> None:
         """Write this ensemble to a file.
 
         The file type can be any of the those supported by tables_io. File type
@@ -656,9 +816,32 @@ class Ensemble:
         the object data, and the ancillary data if it exists, where the identifying
         key is added to the filename.
 
+        The compression and chunking options are only available for '.hdf5' files,
+        and are applied to the object data and ancillary data tables. Setting
+        ``chunk_size`` to the chunk size later used with `qp.iterator` means that
+        each iteration reads a single contiguous HDF5 chunk.
+
         Parameters
         ----------
         filename : str
+            The path to the output file.
+        compression : Optional[str], optional
+            The HDF5 compression filter, one of 'gzip' or 'lzf', by default None
+        compression_opts : Optional[int], optional
+            The 'gzip' compression level (0-9), by default None
+        shuffle : bool, optional
+            If True, apply the HDF5 byte shuffle filter, which usually improves
+            the compression of floating point data, by default False
+        chunk_size : Optional[int], optional
+            The number of distributions in each HDF5 chunk, by default None
+        downcast : bool, optional
+            If True, double precision object data is written as float32, by default False
+
+        Raises
+        ------
+        ValueError
+            Raised if compression or chunking options are given for a file that
+            is not an '.hdf5' file, or if the options are not valid.
 
         Examples
         --------
@@ -669,9 +852,37 @@ class Ensemble:
         ... pdfs = np.array([0,0.1,0.1,0.4,0.2]))
         >>> ens_1.write_to("hist-ensemble.hdf5")
 
+        To write a compressed file with chunks aligned to the iterator chunk size:
+
+        >>> ens_1.write_to("hist-ensemble.hdf5", compression="gzip", shuffle=True,
+        ... chunk_size=100_000)
+
         """
         basename, ext = os.path.splitext(filename)
+        check_write_options(compression, compression_opts, shuffle, chunk_size)
         tables = self.build_tables(encode=True, ext=ext[1:])
+        if ext == ".hdf5" and has_write_options(
+            compression, compression_opts, shuffle, chunk_size, downcast
+        ):
+            write_tables_to_HDF5(
+                tables,
+                filename,
+                compression=compression,
+                compression_opts=compression_opts,
+                shuffle=shuffle,
+                chunk_size=chunk_size,
+                downcast=downcast,
+            )
+            return
+        if has_write_options(compression, compression_opts, shuffle, chunk_size):
+            raise ValueError(
+                "Compression and chunking options can only be used when writing '.hdf5' files"
+            )
+        if downcast:
+            tables["data"] = {
+                key: val.astype(downcast_dtype(val.dtype), copy=False)
+                for key, val in tables["data"].items()
+            }
         tables_io.write(tables, basename, ext[1:])
 
     def pdf(self, x: ArrayLike) -> ArrayLike:
@@ -1412,11 +1623,22 @@ class Ensemble:
         return keywords
 
     def initializeHdf5Write(
-        self, filename: str, npdf: int, comm=None
+        self,
+        filename: str,
+        npdf: int,
+        comm=None,
+        compression: Optional[str] = None,
+        compression_opts: Optional[int] = None,
+        shuffle: bool = False,
+        chunk_size: Optional[int] = None,
+        downcast: bool = False,
     ) -> tuple[dict[str, h5py.File | h5py.Group], h5py.File]:
         """Set up the output write for an ensemble, but set size to npdf rather than
         the size of the ensemble, as the "initial chunk" will not contain the full data
 
+        The compression, chunk layout and precision of the datasets are fixed here,
+        subsequent calls to `writeHdf5Chunk` fill them in.
+
         Parameters
         ----------
         filename : str
@@ -1426,6 +1648,17 @@ class Ensemble:
             usually larger then the size of the current ensemble
         comm : MPI communicator
             Optional MPI communicator to allow parallel writing
+        compression : Optional[str], optional
+            The HDF5 compression filter, one of 'gzip' or 'lzf', by default None
+        compression_opts : Optional[int], optional
+            The 'gzip' compression level (0-9), by default None
+        shuffle : bool, optional
+            If True, apply the HDF5 byte shuffle filter, by default False
+        chunk_size : Optional[int], optional
+            The number of distributions in each HDF5 chunk, by default None. This is
+            best set to the size of the chunks that will be passed to `writeHdf5Chunk`.
+        downcast : bool, optional
+            If True, double precision object data is stored as float32, by default False
 
         Returns
         -------
@@ -1434,8 +1667,23 @@ class Ensemble:
         fout : h5py.File
             The output file object that has been created.
         """
+        check_write_options(compression, compression_opts, shuffle, chunk_size)
         kwds = self._get_allocation_kwds(npdf)
-        group, fout = hdf5.initialize_HDF5_write(filename, comm=comm, **kwds)
+        if not has_write_options(
+            compression, compression_opts, shuffle, chunk_size, downcast
+        ):
+            group, fout = hdf5.initialize_HDF5_write(filename, comm=comm, **kwds)
+            return group, fout
+        group, fout = initialize_HDF5_write(
+            filename,
+            comm=comm,
+            compression=compression,
+            compression_opts=compression_opts,
+            shuffle=shuffle,
+            chunk_size=chunk_size,
+            downcast=downcast,
+            **kwds,
+        )
         return group, fout
 
     def writeHdf5Chunk(
@@ -1445,6 +1693,8 @@ class Ensemble:
         the data for the distributions in the slice from [start:end] to the file.
         This includes the ancillary data table.
 
+        The data are compressed and cast to the dataset types chosen in `initializeHdf5Write`.
+
         Parameters
         ----------
         fname : h5py.File | h5py.Group
@@ -1468,3 +1718,17 @@ class Ensemble:
         """
         mdata = make_len_equal(self.metadata)
         hdf5.finalize_HDF5_write(filename, "meta", **mdata)
+
+
+def _rebuild_ensemble(
+    pdf_name: str, meta: Mapping, objdata: Mapping, ancil: Optional[Mapping]
+) -> Ensemble:
+    """Rebuild an Ensemble from the parts returned by `Ensemble.__reduce_ex__`, skipping
+    the validation and normalization of the (already valid) input data."""
+    from .factory import instance  # pylint: disable=import-outside-toplevel
+
+    the_class = instance()[pdf_name]
+    data = dict(meta)
+    data.update(objdata)
+    data.update(rebuild_kwds(the_class))
+    return Ensemble(the_class, data=data, ancil=ancil)
@@ -3,11 +3,14 @@
 from __future__ import annotations
 import sys
 import os
+import weakref
 
 from collections import OrderedDict
-from collections.abc import Iterator
-from typing_extensions import Mapping, Union, Optional, Tuple
+from collections.abc import Iterable, Iterator, Mapping
+from concurrent.futures import ProcessPoolExecutor
+from typing_extensions import Union, Optional, Tuple
 
+import h5py
 import numpy as np
 
 from scipy import stats as sps
@@ -17,9 +20,15 @@ from tables_io import hdf5
 from tables_io.types import NUMPY_DICT
 
 from .ensemble import Ensemble
+from .conversion_planner import describe_conversion, plan_conversion
 
 from ..utils.dictionary import compare_dicts, concatenate_dicts, reduce_arrays_to_1d
 from ..utils.array import decode_strings
+from ..utils.hdf5_io import (
+    check_write_options,
+    has_write_options,
+    write_tables_to_HDF5_group,
+)
 
 from ..parameterizations.base import Pdf_gen_wrap, Pdf_gen
 
@@ -420,8 +429,9 @@ class Factory(OrderedDict):
         2
 
         """
-        f, _ = hdf5.read_HDF5_group(filename, "data")
+        f, infp = hdf5.read_HDF5_group(filename, "data")
         num_rows = hdf5.get_group_input_data_length(f)
+        infp.close()
         return num_rows
 
     def iterator(
@@ -496,6 +506,50 @@ class Factory(OrderedDict):
         if extension not in [".hdf5"]:  # pragma: no cover
             raise TypeError("Can only use qp.iterator on hdf5 files")
 
+        num_rows = self.data_length(filename)
+        ranges = hdf5.data_ranges_by_rank(num_rows, chunk_size, parallel_size, rank)
+        yield from self.iterate_ranges(filename, ranges)
+
+    def iterate_ranges(
+        self, filename: str, ranges: Iterable[tuple[int, int]]
+    ) -> Iterator[int, int, Ensemble]:
+        """Iterates through the given ranges of distributions in an Ensemble file, opening
+        the file only once. This is what `iterator` uses to read the chunks assigned to a
+        process, and can be used directly when the ranges are chosen elsewhere, for example
+        when they are handed out to a pool of worker processes.
+
+        Parameters
+        ----------
+        filename : str
+            The path to the file to iterate through.
+        ranges : Iterable[tuple[int, int]]
+            The (start, end) indices of the distributions to read for each chunk.
+
+        Yields
+        ------
+        Iterator[int, int, Ensemble]
+            the start index, ending index, and an Ensemble with distributions between those two indices
+
+        Raises
+        ------
+        TypeError
+            Raised if this function is run with files that are not ``hdf5`` files.
+        KeyError
+            Raised if the ``pdf_name`` in the file is not one of the available parameterizations.
+
+        Examples
+        --------
+
+        >>> for start, end, ens_chunk in qp.iterate_ranges("./test.hdf5", [(0, 5), (50, 60)]):
+        ...     print(f"Indices are: ({start}, {end})")
+        Indices are: (0, 5)
+        Indices are: (50, 60)
+
+        """
+        extension = os.path.splitext(filename)[1]
+        if extension not in [".hdf5"]:  # pragma: no cover
+            raise TypeError("Can only use qp.iterate_ranges on hdf5 files")
+
         metadata = hdf5.read_HDF5_to_dict(filename, "meta")
         pdf_name = metadata.pop("pdf_name")[0].decode()
         _pdf_version = metadata.pop("pdf_version")[0]
@@ -510,8 +564,6 @@ class Factory(OrderedDict):
             ancil_f, ancil_infp = hdf5.read_HDF5_group(filename, "ancil")
         except KeyError:  # pragma: no cover
             ancil_f, ancil_infp = (None, None)
-        num_rows = hdf5.get_group_input_data_length(f)
-        ranges = hdf5.data_ranges_by_rank(num_rows, chunk_size, parallel_size, rank)
         data = self._build_data_dict(metadata, {})
         ancil_data = OrderedDict()
         for start, end in ranges:
@@ -534,6 +586,9 @@ class Factory(OrderedDict):
         have a conversion methods table, then it will not be possible to convert
         to that parameterization.
 
+        Unless a ``method`` is given, this uses a shortcut registered for the
+        parameterization of ``in_dist`` when it is cheaper than the default
+        conversion method, see `explain_conversion`.
 
         Parameters
         ----------
@@ -570,20 +625,60 @@ class Factory(OrderedDict):
         """
         kwds_copy = kwds.copy()
         method = kwds_copy.pop("method", None)
-        if class_name not in self:  # pragma: no cover
-            raise KeyError("Class named %s is not in factory" % class_name)
         if class_name not in self:  # pragma: no cover
             raise KeyError("Class named %s is not in factory" % class_name)
         the_class = self[class_name]
-        extract_func = the_class.extraction_method(method)
-        if extract_func is None:  # pragma: no cover
-            raise KeyError(
-                "Class named %s does not have a extraction_method named %s"
-                % (class_name, method)
-            )
-        data = extract_func(in_dist, **kwds_copy)
+        route = plan_conversion(in_dist.gen_class, the_class, method)[0]
+        data = route.extract_func(in_dist, **kwds_copy)
         return self.create(class_name, data, method)
 
+    def _resolve_class(self, src) -> Pdf_gen:
+        """Return the class of an Ensemble, a class name, or a class"""
+        if isinstance(src, Ensemble):
+            return src.gen_class
+        if isinstance(src, str):
+            if src not in self:
+                raise KeyError("Class named %s is not in factory" % src)
+            return self[src]
+        return src
+
+    def explain_conversion(self, src, dst, method: Optional[str] = None) -> str:
+        """Describe how distributions would be converted from one parameterization
+        to another.
+
+        Each conversion can use the extraction method of the parameterization converted
+        to, which evaluates the input distributions, or a shortcut registered for this
+        pair of parameterizations, which works directly on the data of the input
+        distributions. `convert` and `Ensemble.convert_to` use the route with the
+        lowest relative cost, which is marked with ``*``.
+
+        Parameters
+        ----------
+        src : Ensemble, str or Pdf_gen subclass
+            The input Ensemble, or the name or class of its parameterization
+        dst : str or Pdf_gen subclass
+            The name or class of the parameterization to convert to
+        method : Optional[str], optional
+            The extraction method that would be requested, by default None
+
+        Returns
+        -------
+        str
+            The description of the possible routes, cheapest first
+
+        Examples
+        --------
+
+        >>> import qp
+        >>> print(qp.explain_conversion("hist", "quant"))
+        Converting hist to quant:
+        * shortcut extract_quantiles_from_hist (relative cost 1): Convert a hist Ensemble by inverting the piecewise linear CDF of each histogram exactly, without evaluating the ppf through the distributions.
+          extraction extract_quantiles (relative cost 5): evaluates the ppf of the hist distributions
+        """
+        return describe_conversion(
+            self._resolve_class(src), self._resolve_class(dst), method
+        )
+
     def pretty_print(self, stream=sys.stdout) -> None:
         """Print a level of the conversion dictionary in a human-readable format
 
@@ -661,24 +756,49 @@ class Factory(OrderedDict):
         return Ensemble(gen_class, data, ancil)
 
     @staticmethod
-    def write_dict(filename: str, ensemble_dict: Mapping[str, Ensemble], **kwargs):
+    def write_dict(
+        filename: str,
+        ensemble_dict: Mapping[str, Ensemble],
+        compression: Optional[str] = None,
+        compression_opts: Optional[int] = None,
+        shuffle: bool = False,
+        chunk_size: Optional[int] = None,
+        downcast: bool = False,
+        **kwargs,
+    ):
         """Writes out a dictionary of Ensembles to an HDF5 file. Each Ensemble
         in the dictionary will be written to a group, and within each Ensemble group there
         will be subgroups for the metadata, data, and (optional) ancillary data tables.
 
+        The compression and chunking options are applied to the data and ancillary
+        data tables of every Ensemble, see `Ensemble.write_to`.
+
         Parameters
         ----------
         filename : str
             The file path to write to.
         ensemble_dict : Mapping[str, Ensemble]
             The dictionary of Ensembles to write.
+        compression : Optional[str], optional
+            The HDF5 compression filter, one of 'gzip' or 'lzf', by default None
+        compression_opts : Optional[int], optional
+            The 'gzip' compression level (0-9), by default None
+        shuffle : bool, optional
+            If True, apply the HDF5 byte shuffle filter, by default False
+        chunk_size : Optional[int], optional
+            The number of distributions in each HDF5 chunk, by default None
+        downcast : bool, optional
+            If True, double precision object data is written as float32, by default False
         kwargs :
-            Keyword arguments that are passed to the tables_io write_dicts_to_HDF5 function
+            Keyword arguments that are passed to the tables_io write_dicts_to_HDF5 function.
+            If any are given the file is written by tables_io, which does not support the
+            compression and chunking options.
 
         Raises
         ------
         ValueError
-            Raised if the dictionary contains any values that are not Ensembles.
+            Raised if the dictionary contains any values that are not Ensembles, or if
+            both tables_io keyword arguments and compression or chunking options are given.
 
         Examples
         --------
@@ -692,7 +812,7 @@ class Factory(OrderedDict):
         >>> qp.write_dict("qp-ensembles.hdf5",{"ens_h": ens_h, "ens_i": ens_i})
 
         """
-        output_tables = {}
+        check_write_options(compression, compression_opts, shuffle, chunk_size)
         for key, val in ensemble_dict.items():
             # check that val is a qp.Ensemble
             if not isinstance(val, Ensemble):
@@ -700,55 +820,232 @@ class Factory(OrderedDict):
                     "All values in ensemble_dict must be qp.Ensemble"
                 )  # pragma: no cover
 
-            output_tables[key] = val.build_tables(encode=True, ext="hdf5")
-        hdf5.write_dicts_to_HDF5(output_tables, filename, **kwargs)
+        if kwargs:
+            if has_write_options(
+                compression, compression_opts, shuffle, chunk_size, downcast
+            ):
+                raise ValueError(
+                    "The compression and chunking options can not be combined with "
+                    f"the tables_io keyword arguments {list(kwargs)}"
+                )
+            output_tables = {
+                key: val.build_tables(encode=True, ext="hdf5")
+                for key, val in ensemble_dict.items()
+            }
+            hdf5.write_dicts_to_HDF5(output_tables, filename, **kwargs)
+            return
+
+        # build and write the tables of one Ensemble at a time, so that only
+        # one set of encoded tables is held in memory
+        with h5py.File(filename, "w") as fout:
+            for key, val in ensemble_dict.items():
+                write_tables_to_HDF5_group(
+                    val.build_tables(encode=True, ext="hdf5"),
+                    fout.create_group(key),
+                    compression=compression,
+                    compression_opts=compression_opts,
+                    shuffle=shuffle,
+                    chunk_size=chunk_size,
+                    downcast=downcast,
+                )
 
     @staticmethod
-    def read_dict(filename: str) -> Mapping[str, Ensemble]:
+    def read_dict(
+        filename: str, lazy: bool = False, n_workers: int = 1
+    ) -> Mapping[str, Ensemble]:
         """Reads in one or more Ensembles from an HDF5 file to a dictionary of Ensembles.
         The file should contain one top-level group per ensemble. Each Ensemble group should
         have subgroups that are the metadata, data, and (optional) ancillary data tables.
 
+        With ``lazy=True`` this returns a `LazyEnsembleDict`, which opens the file once and
+        only reads an Ensemble when its key is accessed. Use `LazyEnsembleDict.get_rows` to
+        read a range of distributions of one Ensemble without reading the whole group.
+
         Parameters
         ----------
         filename : str
             The path to the ``HDF5`` file to read in.
+        lazy : bool, optional
+            If True, return a `LazyEnsembleDict`, which keeps the file open until it is
+            closed. If False (the default), read all the Ensembles and return a dictionary.
+        n_workers : int, optional
+            The number of processes used to read the Ensembles when ``lazy`` is False,
+            by default 1. Each process reads whole Ensemble groups.
 
         Returns
         -------
         Mapping[str, Ensemble]
-            A dictionary with the Ensembles contained in the file.
+            A mapping with the Ensembles contained in the file.
+
+        Raises
+        ------
+        ValueError
+            Raised if ``n_workers`` is larger than 1 and ``lazy`` is True.
 
         Examples
         --------
 
         >>> import qp
         >>> ens_dict = qp.read_dict("qp-ensembles.hdf5")
+        >>> ens_h = ens_dict["ens_h"]
+
+        To read the Ensembles using 4 processes:
+
+        >>> ens_dict = qp.read_dict("qp-ensembles.hdf5", n_workers=4)
+
+        To only read the Ensembles that are used:
+
+        >>> with qp.read_dict("qp-ensembles.hdf5", lazy=True) as ens_dict:
+        ...     ens_h = ens_dict["ens_h"]
 
         """
-        results = {}
+        if lazy:
+            if n_workers > 1:
+                raise ValueError("n_workers > 1 can only be used with lazy=False")
+            return LazyEnsembleDict(filename)
 
         # retrieve all the top level groups. Assume each top level group
         # corresponds to an ensemble.
-        top_level_groups = hdf5.read_HDF5_group_names(filename)
-
-        # for each top level group, convert the subgroups (data, meta, ancil) into
-        # a dictionary of dictionaries and pass the result to `from_tables`.
-        for top_level_group in top_level_groups:
-            tables = {}
-            keys = hdf5.read_HDF5_group_names(filename, top_level_group)
-            for key_name in keys:
-                # retrieve the hdf5 group object
-                group_object, _ = hdf5.read_HDF5_group(
-                    filename, f"{top_level_group}/{key_name}"
-                )
+        with h5py.File(filename, "r") as infp:
+            keys = list(infp.keys())
+
+        if n_workers <= 1:
+            with LazyEnsembleDict(filename) as lazy_dict:
+                return {key: lazy_dict[key] for key in keys}
+
+        with ProcessPoolExecutor(max_workers=n_workers) as executor:
+            ensembles = executor.map(
+                _read_dict_group, [filename] * len(keys), keys, chunksize=1
+            )
+            return dict(zip(keys, ensembles))
+
+
+class LazyEnsembleDict(Mapping):
+    """A read-only mapping of the Ensembles in an HDF5 file written by `qp.write_dict`.
+
+    The file is opened once, and each Ensemble is read and cached the first time its
+    key is accessed. The file stays open until `close` is called, the end of a ``with``
+    block, or the mapping is garbage collected.
+
+    Parameters
+    ----------
+    filename : str
+        The path to the ``HDF5`` file to read in.
+
+    Examples
+    --------
+
+    >>> import qp
+    >>> with qp.read_dict("qp-ensembles.hdf5", lazy=True) as ens_dict:
+    ...     ens_h = ens_dict["ens_h"]
+    ...     first_rows = ens_dict.get_rows("ens_i", 0, 10)
+
+    """
 
-                # use the hdf5 group object to gather data into a dictionary
-                tables[key_name] = hdf5.read_HDF5_group_to_dict(group_object)
+    def __init__(self, filename: str):
+        self._filename = filename
+        self._infp = h5py.File(filename, "r")
+        # close the file if the mapping is collected without being closed
+        self._finalizer = weakref.finalize(self, self._infp.close)
+        self._keys = list(self._infp.keys())
+        self._cache = {}
+
+    def __getitem__(self, key: str) -> Ensemble:
+        if key not in self._cache:
+            self._cache[key] = self.get_rows(key)
+        return self._cache[key]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._keys)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __contains__(self, key) -> bool:
+        return key in self._keys
+
+    def __repr__(self) -> str:
+        loaded = [key for key in self._keys if key in self._cache]
+        return f"LazyEnsembleDict(filename={self._filename},keys={self._keys},loaded={loaded})"
+
+    def __enter__(self) -> LazyEnsembleDict:
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    @property
+    def filename(self) -> str:
+        """The path to the file"""
+        return self._filename
+
+    @property
+    def closed(self) -> bool:
+        """True if the file has been closed"""
+        return self._infp is None
+
+    def close(self) -> None:
+        """Close the file. Ensembles that have already been read remain available."""
+        if self._infp is not None:
+            self._finalizer()
+            self._infp = None
+
+    def get_rows(
+        self, key: str, start: Optional[int] = None, end: Optional[int] = None
+    ) -> Ensemble:
+        """Read the distributions between ``start`` and ``end`` of one Ensemble, without
+        reading the rest of its data. The result is not cached.
+
+        Parameters
+        ----------
+        key : str
+            The name of the Ensemble group
+        start : Optional[int], optional
+            The index of the first distribution to read, by default None
+        end : Optional[int], optional
+            The index after the last distribution to read, by default None.
+            If either ``start`` or ``end`` is None all distributions are read.
+
+        Returns
+        -------
+        Ensemble
+            The Ensemble with the requested distributions
+
+        Raises
+        ------
+        KeyError
+            Raised if ``key`` is not one of the Ensembles in the file.
+        ValueError
+            Raised if the file has been closed.
+        """
+        if key not in self._keys:
+            raise KeyError(f"Ensemble {key} not found in file {self._filename}")
+        if self._infp is None:
+            raise ValueError(f"File {self._filename} has been closed")
+        return _read_group_tables(self._infp[key], start, end)
+
+
+def _read_group_tables(
+    group: h5py.Group, start: Optional[int] = None, end: Optional[int] = None
+) -> Ensemble:
+    """Build an Ensemble from an open HDF5 group with one subgroup per table,
+    reading only the rows between ``start`` and ``end`` of the data and ancillary tables.
+    """
+    tables = {}
+    for table_name, table_group in group.items():
+        # the metadata table does not have one row per distribution
+        if table_name == "meta":
+            tables[table_name] = hdf5.read_HDF5_group_to_dict(table_group)
+        else:
+            tables[table_name] = hdf5.read_HDF5_group_to_dict(table_group, start, end)
+    return from_tables(tables, decode=True, ext="hdf5")
 
-            results[top_level_group] = from_tables(tables, decode=True, ext="hdf5")
 
-        return results
+def _read_dict_group(filename: str, key: str) -> Ensemble:
+    """Read one Ensemble group from a file, this is run in the worker processes of
+    `Factory.read_dict`."""
+    with h5py.File(filename, "r") as infp:
+        return _read_group_tables(infp[key])
 
 
 _FACTORY = Factory()
@@ -765,7 +1062,9 @@ create = _FACTORY.create
 read = _FACTORY.read
 read_metadata = _FACTORY.read_metadata
 iterator = _FACTORY.iterator
+iterate_ranges = _FACTORY.iterate_ranges
 convert = _FACTORY.convert
+explain_conversion = _FACTORY.explain_conversion
 concatenate = _FACTORY.concatenate
 data_length = _FACTORY.data_length
 from_tables = _FACTORY.from_tables
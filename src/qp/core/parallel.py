@@ -0,0 +1,573 @@
+"""This module implements drivers that process the chunks of an Ensemble file in parallel"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import timeit
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import reduce as functools_reduce
+from operator import add
+from typing import Any, Callable, Mapping, Optional, Union
+
+import h5py
+import numpy as np
+from tables_io import hdf5
+
+from .ensemble import Ensemble
+from .factory import concatenate, convert, data_length, iterate_ranges, iterator
+from .lazy_modules import pytdigest
+from ..parameterizations.base import Pdf_gen
+
+logger = logging.getLogger(__name__)
+
+
+def reduce_concat(results: list) -> Any:
+    """Concatenate the per-chunk results, in the order of the chunks.
+
+    Ensembles are combined with `qp.concatenate`, dictionaries of arrays are
+    concatenated key by key, and anything else with `numpy.concatenate`.
+
+    Parameters
+    ----------
+    results : list
+        The per-chunk results
+
+    Returns
+    -------
+    Any
+        The concatenated results
+    """
+    if not results:  # pragma: no cover
+        return None
+    first = results[0]
+    if isinstance(first, Ensemble):
+        return concatenate(results)
+    if isinstance(first, Mapping):
+        return {
+            key: np.concatenate([np.atleast_1d(res[key]) for res in results])
+            for key in first.keys()
+        }
+    return np.concatenate([np.atleast_1d(res) for res in results])
+
+
+def reduce_sum(results: list) -> Any:
+    """Sum the per-chunk results, which can be numbers or arrays of the same shape.
+
+    Parameters
+    ----------
+    results : list
+        The per-chunk results
+
+    Returns
+    -------
+    Any
+        The sum of the results
+    """
+    if not results:  # pragma: no cover
+        return None
+    return functools_reduce(add, results)
+
+
+def reduce_tdigest(results: list, compression: int = 1000) -> "pytdigest.TDigest":
+    """Merge per-chunk t-digests into a single digest.
+
+    Each result can either be a `pytdigest.TDigest` or an array of centroids, as
+    returned by the ``accumulate`` method of the digest based metrics.
+
+    Parameters
+    ----------
+    results : list
+        The per-chunk digests or centroid arrays
+    compression : int, optional
+        The compression of digests built from centroids, by default 1000
+
+    Returns
+    -------
+    pytdigest.TDigest
+        The merged digest
+    """
+    if not results:  # pragma: no cover
+        return None
+    digests = (
+        (
+            res
+            if isinstance(res, pytdigest.TDigest)
+            else pytdigest.TDigest.of_centroids(
+                np.asarray(res), compression=compression
+            )
+        )
+        for res in results
+    )
+    return functools_reduce(add, digests)
+
+
+REDUCERS = dict(
+    concat=reduce_concat,
+    sum=reduce_sum,
+    tdigest=reduce_tdigest,
+)
+
+
+def _get_reducer(
+    reducer: Union[str, Callable, None],
+) -> Optional[Callable]:
+    """Return the reduction function given its name, a callable, or None."""
+    if reducer is None or callable(reducer):
+        return reducer
+    try:
+        return REDUCERS[reducer]
+    except KeyError as err:
+        raise ValueError(
+            f"Unknown reducer {reducer}, options are {list(REDUCERS.keys())} or a callable"
+        ) from err
+
+
+def _map_chunk(
+    filename: str, func: Callable, start: int, end: int, func_kwds: Mapping
+) -> tuple[Any, float, float]:
+    """Read the distributions in [start:end] from a file and apply `func` to them.
+    This runs in the worker processes, so that only the range is sent to the worker.
+
+    Returns
+    -------
+    result : Any
+        The output of `func`
+    read_time : float
+        The time spent reading the chunk, in seconds
+    func_time : float
+        The time spent in `func`, in seconds
+    """
+    t_start = timeit.default_timer()
+    for c_start, c_end, ens_chunk in iterate_ranges(filename, [(start, end)]):
+        t_read = timeit.default_timer()
+        result = func(c_start, c_end, ens_chunk, **func_kwds)
+    t_end = timeit.default_timer()
+    return result, t_read - t_start, t_end - t_read
+
+
+def _report_progress(n_done: int, n_chunks: int, start: int, end: int, elapsed: float):
+    """Log a progress line for a finished chunk"""
+    logger.info(
+        "map_chunks: chunk %d/%d [%d:%d] done in %.3f s",
+        n_done,
+        n_chunks,
+        start,
+        end,
+        elapsed,
+    )
+
+
+def map_chunks(
+    filename: str,
+    func: Callable,
+    reduce: Union[str, Callable, None] = "concat",
+    chunk_size: int = 100_000,
+    n_workers: int = 1,
+    backend: str = "process",
+    comm=None,
+    progress: bool = False,
+    return_timings: bool = False,
+    **func_kwds,
+) -> Any:
+    """Apply a function to every chunk of an Ensemble file in parallel, and combine the results.
+
+    The file is split into chunks of ``chunk_size`` distributions with
+    `tables_io.hdf5.data_ranges_by_rank`. Only the (start, end) ranges are sent to
+    the workers, each worker reads its chunks from the file itself and calls
+    ``func(start, end, ens_chunk, **func_kwds)``, the same values that `qp.iterator` yields.
+
+    Two backends are available:
+
+    - "process": the chunks are handed out to a pool of ``n_workers`` processes
+      with `concurrent.futures.ProcessPoolExecutor`. ``func`` must be picklable,
+      i.e. defined at the top level of a module. With ``n_workers=1`` the chunks
+      are processed in the calling process.
+    - "mpi": every MPI process in ``comm`` iterates through its share of the chunks
+      with `qp.iterator`, and the results are gathered and reduced on rank 0.
+
+    Parameters
+    ----------
+    filename : str
+        The path to the '.hdf5' Ensemble file
+    func : Callable
+        The function to apply to each chunk, called as ``func(start, end, ens_chunk, **func_kwds)``
+    reduce : str, Callable or None, optional
+        How to combine the per-chunk results, which are given in chunk order. One of
+        "concat", "sum", "tdigest", a callable that takes the list of results, or None
+        to return the list of results, by default "concat"
+    chunk_size : int, optional
+        The number of distributions in each chunk, by default 100_000
+    n_workers : int, optional
+        The number of worker processes for the "process" backend, by default 1
+    backend : str, optional
+        Either "process" or "mpi", by default "process"
+    comm : MPI communicator, optional
+        The communicator for the "mpi" backend, by default `MPI.COMM_WORLD`
+    progress : bool, optional
+        If True, log a line at the INFO level of the ``qp.core.parallel`` logger
+        as each chunk is finished, by default False
+    return_timings : bool, optional
+        If True, also return a dictionary of timings, by default False
+    func_kwds :
+        Additional keyword arguments passed to ``func``
+
+    Returns
+    -------
+    result : Any
+        The reduced results. With the "mpi" backend this is only returned on rank 0,
+        the other ranks return None.
+    timings : Mapping
+        Only if `return_timings` is True. Has the keys ``chunks``, a list of
+        ``(start, end, read_time, func_time)`` for each chunk processed, ``reduce``, the
+        time spent reducing, and ``total``, the total time, all in seconds.
+
+    Raises
+    ------
+    ValueError
+        Raised if the backend or the reducer are not known.
+
+    Examples
+    --------
+
+    To compute the mean of every distribution in a file, using 4 processes:
+
+    >>> import qp
+    >>> def chunk_means(start, end, ens):
+    ...     return ens.mean().flatten()
+    >>> means = qp.map_chunks("test.hdf5", chunk_means, reduce="concat", n_workers=4)
+
+    """
+    reducer = _get_reducer(reduce)
+    t_start = timeit.default_timer()
+
+    if backend == "process":
+        results, chunk_timings = _map_chunks_process(
+            filename, func, chunk_size, n_workers, progress, func_kwds
+        )
+    elif backend == "mpi":
+        results, chunk_timings = _map_chunks_mpi(
+            filename, func, chunk_size, comm, progress, func_kwds
+        )
+    else:
+        raise ValueError(f"Unknown backend {backend}, options are 'process' or 'mpi'")
+
+    t_reduce = timeit.default_timer()
+    if results is not None and reducer is not None:
+        results = reducer(results)
+    t_end = timeit.default_timer()
+
+    if not return_timings:
+        return results
+    timings = dict(
+        chunks=chunk_timings,
+        reduce=t_end - t_reduce,
+        total=t_end - t_start,
+    )
+    return results, timings
+
+
+def _map_chunks_process(
+    filename: str,
+    func: Callable,
+    chunk_size: int,
+    n_workers: int,
+    progress: bool,
+    func_kwds: Mapping,
+) -> tuple[list, list]:
+    """Run the map step of `map_chunks` with a pool of processes"""
+    num_rows = data_length(filename)
+    ranges = list(hdf5.data_ranges_by_rank(num_rows, chunk_size, 1, 0))
+    n_chunks = len(ranges)
+    results = [None] * n_chunks
+    chunk_timings = [None] * n_chunks
+
+    if n_workers <= 1:
+        for i, (start, end) in enumerate(ranges):
+            result, read_time, func_time = _map_chunk(
+                filename, func, start, end, func_kwds
+            )
+            results[i] = result
+            chunk_timings[i] = (start, end, read_time, func_time)
+            if progress:
+                _report_progress(i + 1, n_chunks, start, end, read_time + func_time)
+        return results, chunk_timings
+
+    with ProcessPoolExecutor(max_workers=n_workers) as executor:
+        futures = {
+            executor.submit(_map_chunk, filename, func, start, end, func_kwds): i
+            for i, (start, end) in enumerate(ranges)
+        }
+        for n_done, future in enumerate(as_completed(futures)):
+            i = futures[future]
+            start, end = ranges[i]
+            result, read_time, func_time = future.result()
+            results[i] = result
+            chunk_timings[i] = (start, end, read_time, func_time)
+            if progress:
+                _report_progress(
+                    n_done + 1, n_chunks, start, end, read_time + func_time
+                )
+    return results, chunk_timings
+
+
+def _map_chunks_mpi(
+    filename: str,
+    func: Callable,
+    chunk_size: int,
+    comm,
+    progress: bool,
+    func_kwds: Mapping,
+) -> tuple[Optional[list], list]:
+    """Run the map step of `map_chunks` on the MPI processes of `comm`"""
+    if comm is None:  # pragma: no cover
+        from mpi4py import MPI  # pylint: disable=import-outside-toplevel
+
+        comm = MPI.COMM_WORLD
+    rank = comm.Get_rank()
+    size = comm.Get_size()
+
+    local_results = []
+    chunk_timings = []
+    t_read = timeit.default_timer()
+    for start, end, ens_chunk in iterator(filename, chunk_size, rank, size):
+        t_func = timeit.default_timer()
+        local_results.append((start, func(start, end, ens_chunk, **func_kwds)))
+        t_end = timeit.default_timer()
+        chunk_timings.append((start, end, t_func - t_read, t_end - t_func))
+        if progress:
+            logger.info(
+                "map_chunks: rank %d chunk [%d:%d] done in %.3f s",
+                rank,
+                start,
+                end,
+                t_end - t_read,
+            )
+        t_read = timeit.default_timer()
+
+    all_results = comm.gather(local_results, root=0)
+    if rank != 0:
+        return None, chunk_timings
+    merged = sorted(
+        (item for rank_results in all_results for item in rank_results),
+        key=lambda item: item[0],
+    )
+    return [result for _, result in merged], chunk_timings
+
+
+def _convert_chunk(
+    infile: str,
+    start: int,
+    end: int,
+    class_name: str,
+    keep_ancil: bool,
+    convert_kwds: Mapping,
+) -> Mapping:
+    """Read the distributions in [start:end] from a file, convert them and return
+    the tables to write. This runs in the worker processes, so that only the range
+    is sent to the worker and only numpy arrays are sent back.
+    """
+    for _, _, ens_chunk in iterate_ranges(infile, [(start, end)]):
+        out_ens = convert(ens_chunk, class_name, **convert_kwds)
+        if keep_ancil and ens_chunk.ancil:
+            out_ens.set_ancil(ens_chunk.ancil)
+    tables = out_ens.build_tables(encode=True, ext="hdf5")
+    tables.pop("meta")
+    return tables
+
+
+def _read_checkpoint(checkpoint: str, num_rows: int, chunk_size: int) -> set:
+    """Read the completed ranges from a checkpoint file, checking that the
+    checkpoint was made with the same chunking."""
+    with open(checkpoint, encoding="utf-8") as fin:
+        state = json.load(fin)
+    if state["num_rows"] != num_rows or state["chunk_size"] != chunk_size:
+        raise ValueError(
+            f"Checkpoint {checkpoint} was made with num_rows={state['num_rows']} "
+            f"and chunk_size={state['chunk_size']}, not {num_rows} and {chunk_size}"
+        )
+    return set(tuple(completed) for completed in state["completed"])
+
+
+def _write_checkpoint(
+    checkpoint: str, num_rows: int, chunk_size: int, completed: set
+) -> None:
+    """Atomically replace the checkpoint file with the current set of completed ranges"""
+    state = dict(
+        num_rows=num_rows,
+        chunk_size=chunk_size,
+        completed=sorted(list(completed)),
+    )
+    tmp_file = f"{checkpoint}.tmp"
+    with open(tmp_file, "w", encoding="utf-8") as fout:
+        json.dump(state, fout)
+    os.replace(tmp_file, checkpoint)
+
+
+def convert_file(
+    infile: str,
+    outfile: str,
+    to_class: Union[str, Pdf_gen],
+    chunk_size: int = 100_000,
+    n_workers: int = 1,
+    resume: bool = False,
+    keep_ancil: bool = True,
+    write_options: Optional[Mapping] = None,
+    progress: bool = False,
+    **convert_kwds,
+) -> None:
+    """Convert an Ensemble file to a different parameterization, one chunk at a time.
+
+    The chunks are read and converted by a pool of ``n_workers`` processes and written
+    into an output file that is preallocated to the full size, so that at most a few chunks
+    per worker are held in memory at any time.
+
+    After each chunk is written the output file is flushed and its range is recorded in a
+    checkpoint file, ``outfile + ".checkpoint"``. If the conversion is interrupted, calling
+    `convert_file` again with ``resume=True`` converts only the missing chunks. The
+    checkpoint file is removed once the output file is complete.
+
+    Parameters
+    ----------
+    infile : str
+        The path to the input '.hdf5' Ensemble file
+    outfile : str
+        The path to the output '.hdf5' file
+    to_class : str or Pdf_gen subclass
+        The parameterization to convert to
+    chunk_size : int, optional
+        The number of distributions in each chunk, by default 100_000
+    n_workers : int, optional
+        The number of worker processes, by default 1, which converts the chunks
+        in the calling process.
+    resume : bool, optional
+        If True, continue an interrupted conversion using its checkpoint file, by default False
+    keep_ancil : bool, optional
+        If True, copy the ancillary data table of the input file to the output file, by default True
+    write_options : Optional[Mapping], optional
+        The compression and chunking options passed to `Ensemble.initializeHdf5Write`, by default None
+    progress : bool, optional
+        If True, log a line at the INFO level of the ``qp.core.parallel`` logger
+        as each chunk is written, by default False
+    convert_kwds :
+        The keyword arguments for the conversion, as for `qp.convert`
+
+    Raises
+    ------
+    ValueError
+        Raised if the input file does not contain any distributions, or if resuming
+        from a checkpoint made with a different input length or chunk size.
+
+    Examples
+    --------
+
+    >>> import qp
+    >>> import numpy as np
+    >>> qp.convert_file("mixmod.hdf5", "quant.hdf5", "quant",
+    ... quants=np.linspace(0.01, 0.99, 50), chunk_size=10_000, n_workers=8)
+
+    """
+    if not isinstance(to_class, str):
+        to_class = to_class.name
+    write_options = {} if write_options is None else dict(write_options)
+    checkpoint = f"{outfile}.checkpoint"
+
+    num_rows = data_length(infile)
+    if num_rows == 0:
+        # there is no chunk to set the layout and metadata of the output file
+        raise ValueError(f"The input file {infile} does not contain any distributions")
+    ranges = list(hdf5.data_ranges_by_rank(num_rows, chunk_size, 1, 0))
+
+    completed = set()
+    if resume and os.path.exists(checkpoint) and os.path.exists(outfile):
+        completed = _read_checkpoint(checkpoint, num_rows, chunk_size)
+
+    # The first chunk sets the layout of the output file and provides the metadata
+    first_start, first_end = ranges[0]
+    for _, _, first_chunk in iterate_ranges(infile, [(first_start, first_end)]):
+        first_ens = convert(first_chunk, to_class, **convert_kwds)
+        if keep_ancil and first_chunk.ancil:
+            first_ens.set_ancil(first_chunk.ancil)
+
+    if completed:
+        fout = h5py.File(outfile, "r+")
+        groups = {
+            group_name: fout[group_name]
+            for group_name in first_ens.build_tables()
+            if group_name != "meta"
+        }
+    else:
+        groups, fout = first_ens.initializeHdf5Write(outfile, num_rows, **write_options)
+        _write_checkpoint(checkpoint, num_rows, chunk_size, completed)
+
+    def _record(start: int, end: int, n_done: int):
+        fout.flush()
+        completed.add((start, end))
+        _write_checkpoint(checkpoint, num_rows, chunk_size, completed)
+        if progress:
+            logger.info(
+                "convert_file: chunk %d/%d [%d:%d] written",
+                n_done,
+                len(ranges),
+                start,
+                end,
+            )
+
+    try:
+        if (first_start, first_end) not in completed:
+            first_ens.writeHdf5Chunk(groups, first_start, first_end)
+            _record(first_start, first_end, len(completed) + 1)
+
+        todo = [(start, end) for start, end in ranges if (start, end) not in completed]
+        if n_workers <= 1:
+            for start, end in todo:
+                tables = _convert_chunk(
+                    infile, start, end, to_class, keep_ancil, convert_kwds
+                )
+                hdf5.write_dict_to_HDF5_chunk(groups, tables, start, end)
+                _record(start, end, len(completed) + 1)
+        else:
+            # keep a bounded number of chunks in flight, and write them in order
+            max_pending = 2 * n_workers
+            pending = deque()
+            with ProcessPoolExecutor(max_workers=n_workers) as executor:
+                for start, end in todo:
+                    pending.append(
+                        (
+                            start,
+                            end,
+                            executor.submit(
+                                _convert_chunk,
+                                infile,
+                                start,
+                                end,
+                                to_class,
+                                keep_ancil,
+                                convert_kwds,
+                            ),
+                        )
+                    )
+                    if len(pending) < max_pending:
+                        continue
+                    p_start, p_end, future = pending.popleft()
+                    hdf5.write_dict_to_HDF5_chunk(
+                        groups, future.result(), p_start, p_end
+                    )
+                    _record(p_start, p_end, len(completed) + 1)
+                while pending:
+                    p_start, p_end, future = pending.popleft()
+                    hdf5.write_dict_to_HDF5_chunk(
+                        groups, future.result(), p_start, p_end
+                    )
+                    _record(p_start, p_end, len(completed) + 1)
+    except BaseException:
+        # leave the partial output and checkpoint in place for resume=True
+        fout.close()
+        raise
+
+    if "meta" in fout:
+        del fout["meta"]
+    first_ens.finalizeHdf5Write(fout)
+    os.remove(checkpoint)
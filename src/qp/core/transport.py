@@ -0,0 +1,231 @@
+"""This module implements helpers to send Ensembles to other processes without copying their arrays"""
+
+from __future__ import annotations
+
+import gc
+import inspect
+import weakref
+from multiprocessing import shared_memory
+from typing import Mapping, Optional
+
+import numpy as np
+
+# Byte alignment of each array in a shared memory block
+SHM_ALIGNMENT = 64
+
+# Keyword arguments that turn off input validation and normalization in the
+# parameterization constructors, used when rebuilding from already valid data
+SKIP_VALIDATION_KWDS = dict(norm=False, warn=False)
+
+
+def rebuild_kwds(the_class) -> Mapping:
+    """Return the keywords that skip validation and normalization that the
+    constructor of a parameterization class accepts.
+
+    Parameters
+    ----------
+    the_class : Pdf_gen subclass
+        The parameterization class
+
+    Returns
+    -------
+    Mapping
+        The keywords to add to the data dictionary when rebuilding an Ensemble
+    """
+    try:
+        params = inspect.signature(the_class.__init__).parameters
+    except (TypeError, ValueError):  # pragma: no cover
+        return {}
+    return {key: val for key, val in SKIP_VALIDATION_KWDS.items() if key in params}
+
+
+class SharedEnsembleHandle:
+    """A picklable description of an Ensemble whose object data and ancillary data
+    arrays are stored in a `multiprocessing.shared_memory.SharedMemory` block.
+
+    This is created by `Ensemble.to_shared_memory`, and can be sent to other processes,
+    which use `Ensemble.from_shared_memory` to build an Ensemble on top of the shared arrays.
+    Only the small metadata and the array layout are pickled.
+
+    The process that created the handle owns the shared memory block, and should call
+    `unlink` once all processes are done with it. The handle can also be used as a context
+    manager that unlinks the block on exit.
+
+    Parameters
+    ----------
+    pdf_name : str
+        The name of the parameterization
+    meta : Mapping
+        The metadata needed to rebuild the Ensemble
+    layout : Mapping
+        For each of the ``data`` and ``ancil`` tables, a dictionary of
+        ``{key: (offset, shape, dtype)}`` that locates the arrays in the block
+    inband : Mapping
+        For each table, the arrays that can not be put in shared memory (i.e. object arrays)
+    shm : shared_memory.SharedMemory
+        The shared memory block
+    """
+
+    def __init__(
+        self,
+        pdf_name: str,
+        meta: Mapping,
+        layout: Mapping,
+        inband: Mapping,
+        shm: shared_memory.SharedMemory,
+    ):
+        self.pdf_name = pdf_name
+        self.meta = meta
+        self.layout = layout
+        self.inband = inband
+        self.name = shm.name
+        self.nbytes = shm.size
+        self._shm = shm
+
+    def __repr__(self) -> str:
+        return f"SharedEnsembleHandle(pdf_name={self.pdf_name},name={self.name},nbytes={self.nbytes})"
+
+    def __getstate__(self) -> Mapping:
+        state = self.__dict__.copy()
+        state["_shm"] = None
+        return state
+
+    def __enter__(self) -> SharedEnsembleHandle:
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.unlink()
+
+    @classmethod
+    def from_tables(
+        cls, pdf_name: str, meta: Mapping, tables: Mapping[str, Optional[Mapping]]
+    ) -> SharedEnsembleHandle:
+        """Copy the arrays of the given tables into a new shared memory block.
+
+        Parameters
+        ----------
+        pdf_name : str
+            The name of the parameterization
+        meta : Mapping
+            The metadata needed to rebuild the Ensemble
+        tables : Mapping[str, Optional[Mapping]]
+            The ``data`` and ``ancil`` tables, ``ancil`` can be None
+
+        Returns
+        -------
+        SharedEnsembleHandle
+            The handle to the new block
+        """
+        layout = {}
+        inband = {}
+        offset = 0
+        for table_name, table in tables.items():
+            if table is None:
+                continue
+            layout[table_name] = {}
+            inband[table_name] = {}
+            for key, val in table.items():
+                arr = np.asarray(val)
+                if arr.dtype.hasobject:
+                    inband[table_name][key] = arr
+                    continue
+                layout[table_name][key] = (offset, arr.shape, arr.dtype.str)
+                offset += -(-arr.nbytes // SHM_ALIGNMENT) * SHM_ALIGNMENT
+
+        shm = shared_memory.SharedMemory(create=True, size=max(offset, 1))
+        for table_name, table_layout in layout.items():
+            for key, (arr_offset, shape, dtype) in table_layout.items():
+                dest = np.ndarray(shape, dtype=dtype, buffer=shm.buf, offset=arr_offset)
+                dest[...] = tables[table_name][key]
+        return cls(pdf_name, meta, layout, inband, shm)
+
+    def attach(self) -> SharedMemoryAttachment:
+        """Attach to the shared memory block.
+
+        Returns
+        -------
+        SharedMemoryAttachment
+            The mapping of the block in this process, which builds the arrays on the block
+            and must be closed once they are not used anymore
+        """
+        return SharedMemoryAttachment(self)
+
+    def unlink(self) -> None:
+        """Close and release the shared memory block. This should only be called by the
+        process that created the handle, once no process needs the shared arrays anymore.
+        """
+        if self._shm is None:  # pragma: no cover
+            raise RuntimeError(
+                "Only the process that created the shared memory block can unlink it"
+            )
+        self._shm.close()
+        self._shm.unlink()
+
+
+class SharedMemoryAttachment:
+    """The mapping of a shared memory block made by `SharedEnsembleHandle.from_tables`
+    in one process, which keeps track of the numpy arrays built on the block.
+
+    numpy arrays built on the block keep a reference to its memory map rather than a
+    buffer export, so `SharedMemory.close` would succeed even while they are in use,
+    and using them afterwards crashes the process. The arrays returned by `tables` are
+    therefore tracked with weak references: the views derived from them keep them
+    alive through their ``base``, and `close` refuses to close the block while any of
+    them exists.
+
+    Parameters
+    ----------
+    handle : SharedEnsembleHandle
+        The handle to the block
+    """
+
+    def __init__(self, handle: SharedEnsembleHandle):
+        self.handle = handle
+        # each attachment maps the block separately, so that it can be closed independently
+        self.shm = shared_memory.SharedMemory(name=handle.name)
+        self._refs = []
+
+    def tables(self) -> Mapping[str, Mapping]:
+        """Return new views of the arrays in the block.
+
+        Returns
+        -------
+        Mapping[str, Mapping]
+            The ``data`` and (if present) ``ancil`` tables, with arrays that are views into the block
+        """
+        tables = {}
+        for table_name, table_layout in self.handle.layout.items():
+            table = {
+                key: np.ndarray(shape, dtype=dtype, buffer=self.shm.buf, offset=offset)
+                for key, (offset, shape, dtype) in table_layout.items()
+            }
+            self._refs.extend(weakref.ref(arr) for arr in table.values())
+            table.update(self.handle.inband.get(table_name, {}))
+            tables[table_name] = table
+        return tables
+
+    def is_shared(self, arr) -> bool:
+        """Return True if ``arr`` is one of the arrays returned by `tables`"""
+        return any(arr is ref() for ref in self._refs)
+
+    def in_use(self) -> bool:
+        """Return True if any of the arrays returned by `tables`, or views of them, still exists"""
+        # arrays may only be released when reference cycles are collected
+        gc.collect()
+        self._refs = [ref for ref in self._refs if ref() is not None]
+        return bool(self._refs)
+
+    def close(self) -> None:
+        """Close the mapping of the block in this process.
+
+        Raises
+        ------
+        BufferError
+            Raised if arrays built on the block are still in use
+        """
+        if self.in_use():
+            raise BufferError(
+                "Arrays built on the shared memory block are still in use, "
+                "delete them before closing it"
+            )
+        self.shm.close()
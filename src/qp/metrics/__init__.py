@@ -4,6 +4,8 @@ from .goodness_of_fit import *
 from .base_metric_classes import *
 from .concrete_metric_classes import *
 from .point_estimate_metric_classes import *
+from .metric_suite import MetricSuite
+from .pit import PITSketch
 
 # added for testing purposes
 
@@ -103,6 +103,24 @@ def quick_rmse(p_eval, q_eval, N):
     return rms
 
 
+def rbpe_loss(x):
+    """
+    The loss function used for the risk based point estimate, as defined in
+    Tanaka et al. 2018, with a width of 0.15.
+
+    Parameters
+    ----------
+    x: numpy.ndarray, float
+        The scaled differences, (z_p - z) / (1 + z)
+
+    Returns
+    -------
+    loss: numpy.ndarray, float
+        The value of the loss function
+    """
+    return 1.0 - (1.0 / (1.0 + np.square(x / 0.15)))
+
+
 def quick_rbpe(pdf_function, integration_bounds, limits=(np.inf, np.inf)):
     """
     Calculates the risk based point estimate of a qp.Ensemble object with npdf == 1.
@@ -141,3 +159,86 @@ def quick_rbpe(pdf_function, integration_bounds, limits=(np.inf, np.inf)):
     return minimize_scalar(
         find_z_risk, bounds=(limits[0], limits[1]), method="bounded"
     ).x
+
+
+def _parabolic_vertex(x, h, f_lower, f_mid, f_upper):
+    """Return the vertex of the parabola through (x - h, f_lower), (x, f_mid) and
+    (x + h, f_upper), clipped to [x - h, x + h]. Where the points are not convex,
+    x is returned."""
+    curvature = f_lower - 2.0 * f_mid + f_upper
+    with np.errstate(divide="ignore", invalid="ignore"):
+        step = 0.5 * h * (f_lower - f_upper) / curvature
+    step = np.where(curvature > 0.0, np.clip(step, -h, h), 0.0)
+    return x + step
+
+
+def quick_rbpe_batch(weights, grid, candidates, n_refine=2):
+    """
+    Calculates the risk based point estimates of many PDFs that have been
+    evaluated on a shared grid.
+
+    The risk of every candidate point estimate is computed for all PDFs at once,
+    as the product of the integration weights with the loss kernel between the
+    grid and the candidates. The minimum of each row is then refined with
+    vectorized parabolic interpolation steps, each of which shrinks the spacing
+    between the interpolated points by a factor of 8.
+
+    Parameters
+    ----------
+    weights: numpy.ndarray, float
+        The PDFs evaluated on the grid, multiplied by the integration weights
+        of each grid point, with shape (npdf, ngrid). Grid points outside of the
+        integration bounds of a PDF should have a weight of zero.
+    grid: numpy.ndarray, float
+        The integration grid, with shape (ngrid,)
+    candidates: numpy.ndarray, float
+        The evenly spaced candidate point estimates, with shape (ncand,), ncand >= 3.
+        The estimates are restricted to the range of the candidates.
+    n_refine: int
+        The number of parabolic refinement steps after the first interpolation
+        between the candidates
+
+    Returns
+    -------
+    rbpes: numpy.ndarray, float
+        The risk based point estimates, with shape (npdf,)
+    """
+    inv_one_plus_z = 1.0 / (1.0 + grid)
+
+    def find_z_risk(zp):
+        # zp has shape (npdf,)
+        loss = rbpe_loss((zp[:, np.newaxis] - grid) * inv_one_plus_z)
+        return np.sum(weights * loss, axis=-1)
+
+    # risk of all the candidates for all the rows, shape (npdf, ncand)
+    kernel = rbpe_loss(
+        (candidates - grid[:, np.newaxis]) * inv_one_plus_z[:, np.newaxis]
+    )
+    risk = weights @ kernel
+    coarse_best = np.argmin(risk, axis=-1)
+
+    # interpolate between the best candidate and its neighbours
+    best = np.clip(coarse_best, 1, candidates.size - 2)
+    f_lower, f_mid, f_upper = (
+        np.take_along_axis(risk, (best + offset)[:, np.newaxis], axis=-1)[:, 0]
+        for offset in (-1, 0, 1)
+    )
+    step = candidates[1] - candidates[0]
+    rbpes = _parabolic_vertex(candidates[best], step, f_lower, f_mid, f_upper)
+
+    for _ in range(n_refine):
+        step /= 8.0
+        rbpes = np.clip(rbpes, candidates[0] + step, candidates[-1] - step)
+        rbpes = _parabolic_vertex(
+            rbpes,
+            step,
+            find_z_risk(rbpes - step),
+            find_z_risk(rbpes),
+            find_z_risk(rbpes + step),
+        )
+    rbpes = np.clip(rbpes, candidates[0], candidates[-1])
+
+    # keep the best candidate where the interpolation did not improve on it,
+    # which happens when the minimum is at one of the limits
+    coarse_risk = np.take_along_axis(risk, coarse_best[:, np.newaxis], axis=-1)[:, 0]
+    return np.where(find_z_risk(rbpes) <= coarse_risk, rbpes, candidates[coarse_best])
@@ -1,6 +1,9 @@
 import enum
 
 from abc import ABC
+from concurrent.futures import ProcessPoolExecutor
+
+from .metrics import _calculate_grid_dx, _calculate_grid_parameters
 
 
 class MetricInputType(enum.Enum):
@@ -80,6 +83,7 @@ class BaseMetric(ABC):
     metric_output_type = (
         MetricOutputType.unknown
     )  # The form of the output data from this metric
+    uses_grid = False  # True if the metric evaluates the pdfs on the grid given by limits and dx
 
     def __init__(self, limits: tuple = (0.0, 3.0), dx: float = 0.01) -> None:
         self._limits = limits
@@ -91,6 +95,26 @@ class BaseMetric(ABC):
     def finalize(self):
         pass
 
+    def grid(self):
+        """Return the grid on which this metric evaluates the pdfs of the distributions
+        (with `Ensemble.gridded`), or None if it does not use a fixed grid.
+        """
+        if not self.uses_grid:
+            return None
+        return _calculate_grid_parameters(self._limits, self._dx).grid_values
+
+    def set_grid(
+        self, limits: tuple, dx: float = None, cardinality: int = None
+    ) -> None:
+        """Make this metric evaluate the pdfs on the grid given by limits and either
+        dx or the number of points, cardinality, if it uses a fixed grid.
+        """
+        if cardinality is not None:
+            dx = _calculate_grid_dx(limits, cardinality)
+        if self.uses_grid:
+            self._limits = limits
+            self._dx = dx
+
     @classmethod
     def uses_distribution_for_estimate(cls) -> bool:
         return cls.metric_input_type.uses_distribution_for_estimate()
@@ -155,11 +179,23 @@ class PointToPointMetric(BaseMetric):
 
     metric_input_type = MetricInputType.point_to_point
 
-    def eval_from_iterator(self, estimate, reference):
+    def eval_from_iterator(self, estimate, reference, n_workers: int = 1):
+        """Accumulate the metric over matching chunks of estimated and reference
+        values, and combine the outputs of all the chunks with `finalize`.
+
+        With ``n_workers > 1`` the chunks are accumulated in parallel, in a pool of
+        ``n_workers`` processes.
+        """
         self.initialize()
-        for estimate, reference in zip(estimate, reference):
-            centroids = self.accumulate(estimate, reference)
-        return self.finalize([centroids])
+        if n_workers > 1:
+            with ProcessPoolExecutor(max_workers=n_workers) as executor:
+                partials = list(executor.map(self.accumulate, estimate, reference))
+        else:
+            partials = [
+                self.accumulate(est_chunk, ref_chunk)
+                for est_chunk, ref_chunk in zip(estimate, reference)
+            ]
+        return self.finalize(partials)
 
     def evaluate(self, estimate, reference):
         raise NotImplementedError()
@@ -10,10 +10,12 @@ class Brier:
     prediction: NxM array, float
         Predicted probability for N distributions to have a true value in
         one of M bins. The sum of values along each row N should be 1.
-    truth: NxM array, int
+    truth: NxM array, int or N array, int
         True values for N distributions, where Mth bin for the
         true value will have value 1, all other bins will have a value of
-        0.
+        0. For a 2d prediction, this can instead be given as the N indices
+        of the bins that contain the true values, with -1 for a true value
+        that is in none of the bins. The one-hot truth array is then never built.
     """
 
     def __init__(self, prediction, truth):
@@ -22,6 +24,7 @@ class Brier:
         self._prediction = prediction
         self._truth = truth
         self._axis_for_summation = None  # axis to sum for metric calculation
+        self._truth_is_bin_index = False  # truth holds one bin index per row
 
     def evaluate(self):
         """Evaluate the Brier score.
@@ -78,8 +81,19 @@ class Brier:
         if not np.issubdtype(self._truth.dtype, np.number):
             raise TypeError("Input truth array could not be converted to a Numpy array")
 
+        # A 1d integer truth with a 2d prediction gives the bin index of each row
+        self._truth_is_bin_index = (
+            self._prediction.ndim == 2
+            and self._truth.ndim == 1
+            and np.issubdtype(self._truth.dtype, np.integer)
+        )
+        if self._truth_is_bin_index:
+            if self._truth.size != self._prediction.shape[0]:
+                raise ValueError(
+                    "Input truth bin indices do not match the number of predictions"
+                )
         # Raise ValueError if the arrays have different shapes
-        if self._prediction.shape != self._truth.shape:
+        elif self._prediction.shape != self._truth.shape:
             raise ValueError(
                 "Input prediction and truth arrays do not have the same shape"
             )
@@ -97,11 +111,25 @@ class Brier:
         """
         Calculate the Brier metric for the input data.
         """
-        return np.mean(
-            np.sum((self._prediction - self._truth) ** 2, axis=self._axis_for_summation)
-        )
+        return np.mean(self._calculate_scores())
 
     def _calculate_metric_for_accumulation(self):
-        return np.sum(
-            np.sum((self._prediction - self._truth) ** 2, axis=self._axis_for_summation)
+        return np.sum(self._calculate_scores())
+
+    def _calculate_scores(self):
+        """
+        Calculate the Brier score of each distribution. With bin indices as the truth,
+        this uses sum((p - t)**2) = sum(p**2) - 2 * p[bin] + 1, so that neither
+        the one-hot truth array nor the squared differences are allocated.
+        """
+        if not self._truth_is_bin_index:
+            return np.sum(
+                (self._prediction - self._truth) ** 2, axis=self._axis_for_summation
+            )
+        scores = np.einsum("ij,ij->i", self._prediction, self._prediction).astype(
+            np.float64
         )
+        in_bins = self._truth >= 0
+        rows = np.flatnonzero(in_bins)
+        scores[rows] += 1.0 - 2.0 * self._prediction[rows, self._truth[rows]]
+        return scores
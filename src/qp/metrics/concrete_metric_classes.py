@@ -9,6 +9,8 @@ from .base_metric_classes import (
     SingleEnsembleMetric,
 )
 from .metrics import (
+    _calculate_grid_dx,
+    _calculate_grid_parameters,
     calculate_brier,
     calculate_brier_for_accumulation,
     calculate_goodness_of_fit,
@@ -18,11 +20,10 @@ from .metrics import (
     calculate_rmse,
     calculate_rbpe,
 )
-from .pit import PIT
+from .pit import PIT, gather_pit_samples, produce_output_ensemble
+from .util_funcs import merge_centroids, nearest_index
 
 from .lazy_modules import pytdigest
-from functools import reduce
-from operator import add
 
 
 class DistToPointMetricDigester(DistToPointMetric):
@@ -53,13 +54,7 @@ class DistToPointMetricDigester(DistToPointMetric):
             The result of the specific metric calculation defined in the subclasses
             `compute_from_digest` method.
         """
-        digests = (
-            pytdigest.TDigest.of_centroids(
-                np.array(centroid), compression=self._tdigest_compression
-            )
-            for centroid in centroids
-        )
-        digest = reduce(add, digests)
+        digest = merge_centroids(centroids, self._tdigest_compression)
 
         return self.compute_from_digest(digest)
 
@@ -67,11 +62,85 @@ class DistToPointMetricDigester(DistToPointMetric):
         raise NotImplementedError()
 
 
-class MomentMetric(SingleEnsembleMetric):
+def _compute_centroids(values, compression: int) -> np.ndarray:
+    """Return the centroids of a t-digest of the given per-distribution values"""
+    values = np.ravel(np.asarray(values, dtype=float))
+    return pytdigest.TDigest.compute(values, compression=compression).get_centroids()
+
+
+class _MetricDigesterMixin:
+    """Shared implementation of the metrics with one value per distribution, that
+    are accumulated over chunks of distributions as a t-digest of the values.
+
+    The centroids returned by `accumulate` can be gathered from several processes,
+    and `finalize` merges them, so that the metric is computed with constant memory.
+    By default, `finalize` returns the mean of the values over all the distributions.
+    """
+
+    def __init__(
+        self,
+        limits: tuple = (0.0, 3.0),
+        dx: float = 0.01,
+        tdigest_compression: int = 1000,
+        **kwargs,
+    ) -> None:
+        super().__init__(limits, dx)
+        self._tdigest_compression = tdigest_compression
+
+    def finalize(self, centroids: np.ndarray = None):
+        """Combine the centroids calculated by `accumulate` for chunks of distributions.
+
+        Parameters
+        ----------
+        centroids : Numpy 2d array, optional
+            The output collected from prior calls to `accumulate`, by default None
+
+        Returns
+        -------
+        float
+            The result of `compute_from_digest`, or None if nothing was accumulated.
+        """
+        if centroids is None:
+            return None
+        digest = merge_centroids(centroids, self._tdigest_compression)
+        if digest is None:
+            return None
+        return self.compute_from_digest(digest)
+
+    def compute_from_digest(self, digest):
+        return digest.mean
+
+
+class SingleEnsembleMetricDigester(_MetricDigesterMixin, SingleEnsembleMetric):
+    """Base class for single ensemble metrics accumulated as a t-digest of the
+    values for each distribution.
+
+    See `_MetricDigesterMixin`.
+    """
+
+    def accumulate(self, estimate):
+        return _compute_centroids(self.evaluate(estimate), self._tdigest_compression)
+
+
+class DistToDistMetricDigester(_MetricDigesterMixin, DistToDistMetric):
+    """Base class for metrics comparing two ensembles, accumulated as a t-digest of
+    the values for each pair of distributions.
+
+    See `_MetricDigesterMixin`.
+    """
+
+    def accumulate(self, estimate, reference):
+        return _compute_centroids(
+            self.evaluate(estimate, reference), self._tdigest_compression
+        )
+
+
+class MomentMetric(SingleEnsembleMetricDigester):
     """Class wrapper around the `calculate_moment` function."""
 
     metric_name = "moment"
     metric_output_type = MetricOutputType.one_value_per_distribution
+    uses_grid = True
 
     def __init__(
         self,
@@ -80,47 +149,49 @@ class MomentMetric(SingleEnsembleMetric):
         dx: float = 0.01,
         **kwargs,
     ) -> None:
-        super().__init__(limits, dx)
+        super().__init__(limits, dx, **kwargs)
         self._moment_order = moment_order
 
     def evaluate(self, estimate) -> list:
         return calculate_moment(estimate, self._moment_order, self._limits, self._dx)
 
 
-class KLDMetric(DistToDistMetric):
+class KLDMetric(DistToDistMetricDigester):
     """Class wrapper around the KLD metric"""
 
     metric_name = "kld"
     metric_output_type = MetricOutputType.one_value_per_distribution
+    uses_grid = True
 
     def __init__(self, limits: tuple = (0.0, 3.0), dx: float = 0.01, **kwargs) -> None:
-        super().__init__(limits, dx)
+        super().__init__(limits, dx, **kwargs)
 
     def evaluate(self, estimate, reference) -> list:
         return calculate_kld(estimate, reference, self._limits, self._dx)
 
 
-class RMSEMetric(DistToDistMetric):
+class RMSEMetric(DistToDistMetricDigester):
     """Class wrapper around the Root Mean Square Error metric"""
 
     metric_name = "rmse"
     metric_output_type = MetricOutputType.one_value_per_distribution
+    uses_grid = True
 
     def __init__(self, limits: tuple = (0.0, 3.0), dx: float = 0.01, **kwargs) -> None:
-        super().__init__(limits, dx)
+        super().__init__(limits, dx, **kwargs)
 
     def evaluate(self, estimate, reference) -> list:
         return calculate_rmse(estimate, reference, self._limits, self._dx)
 
 
-class RBPEMetric(SingleEnsembleMetric):
+class RBPEMetric(SingleEnsembleMetricDigester):
     """Class wrapper around the Risk Based Point Estimate metric."""
 
     metric_name = "rbpe"
     metric_output_type = MetricOutputType.one_value_per_distribution
 
     def __init__(self, limits: tuple = (np.inf, np.inf), **kwargs) -> None:
-        super().__init__(limits)
+        super().__init__(limits, **kwargs)
 
     def evaluate(self, estimate) -> list:
         return calculate_rbpe(estimate, self._limits)
@@ -133,6 +204,7 @@ class BrierMetric(DistToPointMetricDigester):
 
     metric_name = "brier"
     metric_output_type = MetricOutputType.single_value
+    uses_grid = True
 
     def __init__(self, limits: tuple = (0.0, 3.0), dx: float = 0.01, **kwargs) -> None:
         kwargs.update({"limits": limits, "dx": dx})
@@ -156,14 +228,14 @@ class BrierMetric(DistToPointMetricDigester):
         return summed_terms[0] / summed_terms[1]
 
 
-class OutlierMetric(SingleEnsembleMetric):
+class OutlierMetric(SingleEnsembleMetricDigester):
     """Class wrapper around the outlier calculation metric."""
 
     metric_name = "outlier"
     metric_output_type = MetricOutputType.one_value_per_distribution
 
     def __init__(self, cdf_limits: tuple = (0.0001, 0.9999), **kwargs) -> None:
-        super().__init__()
+        super().__init__(**kwargs)
         self._cdf_limits = cdf_limits
 
     def evaluate(self, estimate) -> list:
@@ -172,18 +244,26 @@ class OutlierMetric(SingleEnsembleMetric):
         )
 
 
-class ADMetric(DistToDistMetric):
+class ADMetric(DistToDistMetricDigester):
     """Class wrapper for Anderson Darling metric."""
 
     metric_name = "ad"
     metric_output_type = MetricOutputType.one_value_per_distribution
 
     def __init__(
-        self, num_samples: int = 100, _random_state: float = None, **kwargs
+        self,
+        num_samples: int = 100,
+        _random_state: float = None,
+        method: str = "sampling",
+        num_points: int = 1000,
+        limits: tuple = None,
+        **kwargs,
     ) -> None:
-        super().__init__()
+        super().__init__(limits, **kwargs)
         self._num_samples = num_samples
         self._random_state = _random_state
+        self._method = method
+        self._num_points = num_points
 
     @property
     def random_state(self):
@@ -200,21 +280,32 @@ class ADMetric(DistToDistMetric):
             fit_metric=self.metric_name,
             num_samples=self._num_samples,
             _random_state=self._random_state,
+            method=self._method,
+            num_points=self._num_points,
+            limits=self._limits,
         )
 
 
-class CvMMetric(DistToDistMetric):
+class CvMMetric(DistToDistMetricDigester):
     """Class wrapper for Cramer von Mises metric."""
 
     metric_name = "cvm"
     metric_output_type = MetricOutputType.one_value_per_distribution
 
     def __init__(
-        self, num_samples: int = 100, _random_state: float = None, **kwargs
+        self,
+        num_samples: int = 100,
+        _random_state: float = None,
+        method: str = "sampling",
+        num_points: int = 1000,
+        limits: tuple = None,
+        **kwargs,
     ) -> None:
-        super().__init__()
+        super().__init__(limits, **kwargs)
         self._num_samples = num_samples
         self._random_state = _random_state
+        self._method = method
+        self._num_points = num_points
 
     @property
     def random_state(self):
@@ -231,21 +322,32 @@ class CvMMetric(DistToDistMetric):
             fit_metric=self.metric_name,
             num_samples=self._num_samples,
             _random_state=self._random_state,
+            method=self._method,
+            num_points=self._num_points,
+            limits=self._limits,
         )
 
 
-class KSMetric(DistToDistMetric):
+class KSMetric(DistToDistMetricDigester):
     """Class wrapper for Kolmogorov Smirnov metric."""
 
     metric_name = "ks"
     metric_output_type = MetricOutputType.one_value_per_distribution
 
     def __init__(
-        self, num_samples: int = 100, _random_state: float = None, **kwargs
+        self,
+        num_samples: int = 100,
+        _random_state: float = None,
+        method: str = "sampling",
+        num_points: int = 1000,
+        limits: tuple = None,
+        **kwargs,
     ) -> None:
-        super().__init__()
+        super().__init__(limits, **kwargs)
         self._num_samples = num_samples
         self._random_state = _random_state
+        self._method = method
+        self._num_points = num_points
 
     @property
     def random_state(self):
@@ -262,6 +364,9 @@ class KSMetric(DistToDistMetric):
             fit_metric=self.metric_name,
             num_samples=self._num_samples,
             _random_state=self._random_state,
+            method=self._method,
+            num_points=self._num_points,
+            limits=self._limits,
         )
 
 
@@ -281,9 +386,7 @@ class PITMetric(DistToPointMetricDigester):
         return pit_object.pit
 
     def accumulate(self, estimate, reference):
-        pit_samples = PIT(estimate, reference, self._eval_grid)._gather_pit_samples(
-            estimate, reference
-        )
+        pit_samples = gather_pit_samples(estimate, reference)
         digest = pytdigest.TDigest.compute(
             pit_samples, compression=self._tdigest_compression
         )
@@ -306,7 +409,7 @@ class PITMetric(DistToPointMetricDigester):
             eval_grid = np.linspace(0, 1, n_pit)
 
         data_quants = digest.inverse_cdf(eval_grid)
-        return PIT._produce_output_ensemble(data_quants, eval_grid)
+        return produce_output_ensemble(data_quants, eval_grid)
 
 
 class CDELossMetric(DistToPointMetricDigester):
@@ -318,34 +421,51 @@ class CDELossMetric(DistToPointMetricDigester):
 
     def __init__(self, eval_grid: list = default_eval_grid, **kwargs) -> None:
         super().__init__()
-        self._xvals = eval_grid
+        self._set_eval_grid(eval_grid)
+
+    def _set_eval_grid(self, eval_grid):
+        self._xvals = np.asarray(eval_grid)
+        # trapezoid rule weights, so that the integral of each row is a dot product
+        dx = np.diff(self._xvals)
+        self._trapz_weights = 0.5 * (
+            np.concatenate([dx, [0.0]]) + np.concatenate([[0.0], dx])
+        )
 
-    def evaluate(self, estimate, reference):
-        """Evaluate the estimated conditional density loss described in
-        Izbicki & Lee 2017 (arXiv:1704.08095).
-        """
+    def grid(self):
+        return self._xvals
 
-        pdfs = estimate.pdf(self._xvals)
+    def set_grid(
+        self, limits: tuple, dx: float = None, cardinality: int = None
+    ) -> None:
+        if cardinality is not None:
+            dx = _calculate_grid_dx(limits, cardinality)
+        self._set_eval_grid(_calculate_grid_parameters(limits, dx).grid_values)
+
+    def _calculate_terms(self, estimate, reference):
+        """Calculate the sums of the two terms of the loss over the distributions,
+        from a single evaluation of the pdfs on the grid."""
+        pdfs = estimate.gridded(self._xvals)[1]
         npdf = estimate.npdf
 
-        # Calculate first term E[\int f*(z | X)^2 dz]
-        term1 = np.mean(np.trapz(pdfs**2, x=self._xvals))
+        # Sum of the first term \int f*(z | X)^2 dz
+        term1_sum = np.sum(np.square(pdfs) @ self._trapz_weights)
         # z bin closest to ztrue
-        nns = [np.argmin(np.abs(self._xvals - z)) for z in reference]
-        # Calculate second term E[f*(Z | X)]
-        term2 = np.mean(pdfs[range(npdf), nns])
-        cdeloss = term1 - 2 * term2
+        nns = nearest_index(self._xvals, np.ravel(reference))
+        # Sum of the second term f*(Z | X)
+        term2_sum = np.sum(pdfs[np.arange(npdf), nns])
+        return term1_sum, term2_sum, npdf
+
+    def evaluate(self, estimate, reference):
+        """Evaluate the estimated conditional density loss described in
+        Izbicki & Lee 2017 (arXiv:1704.08095).
+        """
+        term1_sum, term2_sum, npdf = self._calculate_terms(estimate, reference)
+        # E[\int f*(z | X)^2 dz] - 2 * E[f*(Z | X)]
+        cdeloss = (term1_sum - 2 * term2_sum) / npdf
         return cdeloss
 
     def accumulate(self, estimate, reference):
-        pdfs = estimate.pdf(self._xvals)
-        npdf = estimate.npdf
-        term1_sum = np.sum(np.trapz(pdfs**2, x=self._xvals))
-
-        nns = [np.argmin(np.abs(self._xvals - z)) for z in reference]
-        term2_sum = np.sum(pdfs[range(npdf), nns])
-
-        return (term1_sum, term2_sum, npdf)
+        return self._calculate_terms(estimate, reference)
 
     def finalize(self, tuples):
         summed_terms = np.sum(np.atleast_2d(tuples), axis=0)
@@ -47,6 +47,47 @@ def _cramer_von_mises(dist, data):
     return w
 
 
+# The following methods compute the population versions of the statistics
+# directly from the CDFs of the estimate and reference distributions, evaluated
+# on the same (per-row) grid of points, instead of from random variates.
+# The integrals over dG of the reference CDF are evaluated cell by cell, so that
+# no pdf evaluation is needed.
+
+
+def _squared_cdf_differences(est_cdf, ref_cdf):
+    # average of the squared CDF differences at the two ends of each grid cell
+    diff2 = (est_cdf - ref_cdf) ** 2
+    return 0.5 * (diff2[..., 1:] + diff2[..., :-1])
+
+
+def _anderson_darling_cdf(est_cdf, ref_cdf, eps=1e-12):
+    # the weight 1 / (G(1 - G)) is integrated exactly over each cell,
+    # as the difference of the logit of the reference CDF at the cell edges
+    ref_cdf = np.clip(ref_cdf, eps, 1.0 - eps)
+    logit = np.log(ref_cdf) - np.log1p(-ref_cdf)
+    return np.sum(
+        _squared_cdf_differences(est_cdf, ref_cdf) * np.diff(logit, axis=-1), axis=-1
+    )
+
+
+def _kolmogorov_smirnov_cdf(est_cdf, ref_cdf):
+    return np.max(np.abs(est_cdf - ref_cdf), axis=-1)
+
+
+def _cramer_von_mises_cdf(est_cdf, ref_cdf):
+    return np.sum(
+        _squared_cdf_differences(est_cdf, ref_cdf) * np.diff(ref_cdf, axis=-1),
+        axis=-1,
+    )
+
+
+goodness_of_fit_cdf_metrics = {
+    "ad": _anderson_darling_cdf,
+    "cvm": _cramer_von_mises_cdf,
+    "ks": _kolmogorov_smirnov_cdf,
+}
+
+
 # The following methods can be replaced by:
 # scipy.stats._fit._anderson_darling,
 # scipy.stats._fit._cramer_von_mises, and
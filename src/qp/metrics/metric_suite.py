@@ -0,0 +1,297 @@
+"""This module implements a suite that evaluates several metrics on the same data"""
+
+import timeit
+from collections import OrderedDict
+from typing import Mapping, Optional, Sequence, Union
+
+import numpy as np
+
+from .base_metric_classes import BaseMetric, MetricInputType
+from .factory import MetricFactory
+
+# The input types that can be evaluated from an Ensemble of estimates
+SUITE_INPUT_TYPES = [
+    MetricInputType.single_ensemble,
+    MetricInputType.dist_to_dist,
+    MetricInputType.dist_to_point,
+]
+
+
+class MetricSuite:
+    """Evaluates several metrics on the same Ensemble, evaluating the pdfs of the
+    distributions only once on each grid that the metrics use.
+
+    The metrics are grouped by the grid on which they evaluate the pdfs
+    (see `BaseMetric.grid`). For each group, the pdfs of the estimate (and of the
+    reference Ensemble, if a metric in the group compares two Ensembles) are
+    evaluated once with `Ensemble.gridded`, and every metric of the group reuses them.
+    With ``common_grid=True``, all the metrics that use a grid are moved to a single
+    grid that covers all of their limits at the finest of their resolutions.
+
+    The suite can evaluate the metrics on an Ensemble in memory with `evaluate`, or
+    accumulate them over chunks with `initialize`, `accumulate` and `finalize`, which
+    is what `evaluate_file` does over the chunks of a file read with `qp.iterator`.
+    The time spent in each metric, and in evaluating the pdfs, is kept in `timings`.
+
+    Parameters
+    ----------
+    metrics : Union[Sequence, Mapping]
+        The metrics to evaluate, either as a list of metric objects or metric names,
+        or as a dictionary of ``{label: metric}``. With a list, the results are
+        labelled by the ``metric_name`` of each metric.
+    common_grid : bool, optional
+        If True, evaluate all the metrics that use a grid on a single grid, by default False
+    limits : Optional[tuple], optional
+        The limits of the common grid, by default None, which covers the limits of all the metrics
+    dx : Optional[float], optional
+        The resolution of the common grid, by default None, which uses the finest
+        resolution of all the metrics
+
+    Raises
+    ------
+    ValueError
+        Raised if two metrics have the same label, or if a metric does not take
+        an Ensemble of estimates as input.
+
+    Examples
+    --------
+
+    >>> import qp
+    >>> suite = qp.metrics.MetricSuite(["moment", "kld", "rmse", "brier"])
+    >>> results = suite.evaluate(ens, reference=ref_ens, truth=ztrue)
+    >>> suite.timings
+    """
+
+    def __init__(
+        self,
+        metrics: Union[Sequence, Mapping],
+        common_grid: bool = False,
+        limits: Optional[tuple] = None,
+        dx: Optional[float] = None,
+    ) -> None:
+        if isinstance(metrics, Mapping):
+            items = list(metrics.items())
+        else:
+            items = []
+            for metric in metrics:
+                name = metric if isinstance(metric, str) else metric.metric_name
+                items.append((name, metric))
+
+        self._metrics = OrderedDict()
+        for label, metric in items:
+            if isinstance(metric, str):
+                metric = MetricFactory.create_metric(metric)
+            if label in self._metrics:
+                raise ValueError(
+                    f"More than one metric is labelled {label}, "
+                    "pass a dictionary of {label: metric} to tell them apart"
+                )
+            if not isinstance(metric, BaseMetric) or (
+                metric.metric_input_type not in SUITE_INPUT_TYPES
+            ):
+                raise ValueError(
+                    f"Metric {label} does not take an Ensemble of estimates as input"
+                )
+            self._metrics[label] = metric
+
+        if common_grid:
+            self._set_common_grid(limits, dx)
+        self._groups = self._plan_groups()
+        self._partials = OrderedDict()
+        self.timings = OrderedDict()
+
+    @property
+    def metrics(self) -> Mapping[str, BaseMetric]:
+        """The metrics in this suite, by label"""
+        return self._metrics
+
+    @property
+    def grids(self) -> list:
+        """The grids on which the pdfs are evaluated"""
+        return [grid for grid, _ in self._groups if grid is not None]
+
+    def _set_common_grid(self, limits: Optional[tuple], dx: Optional[float]) -> None:
+        """Move all the metrics that use a grid to a single grid"""
+        grids = [
+            metric.grid()
+            for metric in self._metrics.values()
+            if metric.grid() is not None
+        ]
+        if not grids:
+            return
+        if limits is None:
+            limits = (
+                min(grid[0] for grid in grids),
+                max(grid[-1] for grid in grids),
+            )
+        cardinality = None
+        if dx is None:
+            # as many points as the finest grid would have over the limits
+            resolution = min((grid[-1] - grid[0]) / (len(grid) - 1) for grid in grids)
+            cardinality = int(np.round((limits[-1] - limits[0]) / resolution)) + 1
+        for metric in self._metrics.values():
+            if metric.grid() is not None:
+                metric.set_grid(limits, dx, cardinality)
+
+    def _plan_groups(self) -> list:
+        """Group the metric labels by the grid they use, in order of first use.
+        Metrics that do not use a grid are in a last group with a grid of None.
+        """
+        groups = []
+        no_grid = []
+        for label, metric in self._metrics.items():
+            grid = metric.grid()
+            if grid is None:
+                no_grid.append(label)
+                continue
+            for group_grid, labels in groups:
+                if np.array_equal(group_grid, grid):
+                    labels.append(label)
+                    break
+            else:
+                groups.append((grid, [label]))
+        if no_grid:
+            groups.append((None, no_grid))
+        return groups
+
+    def _metric_args(self, label: str, estimate, reference, truth) -> tuple:
+        """Select the inputs of a metric according to its input type"""
+        input_type = self._metrics[label].metric_input_type
+        if input_type == MetricInputType.single_ensemble:
+            return (estimate,)
+        if input_type == MetricInputType.dist_to_dist:
+            if reference is None:
+                raise ValueError(f"Metric {label} requires a reference Ensemble")
+            return (estimate, reference)
+        if truth is None:
+            raise ValueError(f"Metric {label} requires truth values")
+        return (estimate, truth)
+
+    def _run(self, method: str, estimate, reference, truth) -> Mapping:
+        """Call ``method`` of every metric, one grid group at a time"""
+        results = OrderedDict()
+        for grid, labels in self._groups:
+            if grid is not None:
+                t_start = timeit.default_timer()
+                estimate.gridded(grid)
+                if reference is not None and any(
+                    self._metrics[label].metric_input_type
+                    == MetricInputType.dist_to_dist
+                    for label in labels
+                ):
+                    reference.gridded(grid)
+                self._add_time("gridding", timeit.default_timer() - t_start)
+            for label in labels:
+                args = self._metric_args(label, estimate, reference, truth)
+                metric_method = getattr(self._metrics[label], method, None)
+                if metric_method is None:
+                    raise NotImplementedError(
+                        f"Metric {label} can not be accumulated over chunks"
+                    )
+                t_start = timeit.default_timer()
+                results[label] = metric_method(*args)
+                self._add_time(label, timeit.default_timer() - t_start)
+        return results
+
+    def _add_time(self, key: str, elapsed: float) -> None:
+        self.timings[key] = self.timings.get(key, 0.0) + elapsed
+
+    def evaluate(self, estimate, reference=None, truth=None) -> Mapping:
+        """Evaluate all the metrics on an Ensemble.
+
+        Parameters
+        ----------
+        estimate : Ensemble
+            The Ensemble of estimated distributions
+        reference : Ensemble, optional
+            The reference Ensemble, required by metrics that compare two Ensembles, by default None
+        truth : ArrayLike, optional
+            The true values, required by metrics that compare distributions to points, by default None
+
+        Returns
+        -------
+        Mapping
+            The result of each metric, by label
+        """
+        self.timings = OrderedDict()
+        return self._run("evaluate", estimate, reference, truth)
+
+    def initialize(self) -> None:
+        """Prepare the metrics to accumulate over chunks, and reset the timings"""
+        self.timings = OrderedDict()
+        self._partials = OrderedDict((label, []) for label in self._metrics)
+        for metric in self._metrics.values():
+            metric.initialize()
+
+    def accumulate(self, estimate, reference=None, truth=None) -> None:
+        """Accumulate all the metrics on one chunk of distributions.
+
+        Parameters
+        ----------
+        estimate : Ensemble
+            The chunk of estimated distributions
+        reference : Ensemble, optional
+            The matching chunk of the reference Ensemble, by default None
+        truth : ArrayLike, optional
+            The matching chunk of true values, by default None
+        """
+        for label, partial in self._run(
+            "accumulate", estimate, reference, truth
+        ).items():
+            self._partials[label].append(partial)
+
+    def finalize(self) -> Mapping:
+        """Combine the accumulated chunks into the result of each metric.
+
+        Returns
+        -------
+        Mapping
+            The result of each metric, by label
+        """
+        results = OrderedDict()
+        for label, metric in self._metrics.items():
+            t_start = timeit.default_timer()
+            results[label] = metric.finalize(self._partials[label])
+            self._add_time(label, timeit.default_timer() - t_start)
+        return results
+
+    def evaluate_file(
+        self,
+        filename: str,
+        reference: Optional[str] = None,
+        truth=None,
+        chunk_size: int = 100_000,
+    ) -> Mapping:
+        """Accumulate all the metrics over the chunks of an Ensemble file, so that
+        only one chunk is held in memory at a time.
+
+        Parameters
+        ----------
+        filename : str
+            The ``hdf5`` file with the estimated distributions
+        reference : Optional[str], optional
+            The ``hdf5`` file with the reference distributions, in the same order, by default None
+        truth : ArrayLike, optional
+            The true values of all the distributions, by default None
+        chunk_size : int, optional
+            The number of distributions in each chunk, by default 100_000
+
+        Returns
+        -------
+        Mapping
+            The result of each metric, by label
+        """
+        # qp.core imports qp.metrics, so the factory can only be imported here
+        from ..core.factory import iterator  # pylint: disable=import-outside-toplevel
+
+        self.initialize()
+        ref_chunks = (
+            iterator(reference, chunk_size=chunk_size)
+            if reference is not None
+            else None
+        )
+        for start, end, estimate in iterator(filename, chunk_size=chunk_size):
+            ref_chunk = next(ref_chunks)[2] if ref_chunks is not None else None
+            truth_chunk = truth[start:end] if truth is not None else None
+            self.accumulate(estimate, reference=ref_chunk, truth=truth_chunk)
+        return self.finalize()
@@ -2,15 +2,24 @@
 
 import logging
 from collections import namedtuple
-from functools import partial
 
 import numpy as np
 from deprecated import deprecated
+from scipy import stats
 
 from . import array_metrics
 from .brier import Brier
-from .goodness_of_fit import goodness_of_fit_metrics
-from .util_funcs import epsilon
+from .goodness_of_fit import goodness_of_fit_cdf_metrics, goodness_of_fit_metrics
+from .util_funcs import epsilon, safelog
+
+# Number of Gauss-Legendre points per interval when integrating the KLD of interp PDFs
+KLD_QUADRATURE_POINTS = 8
+
+# The range of the number of grid points between the integration bounds of each
+# PDF in calculate_rbpe, and the maximum number of points of a grid shared by PDFs
+RBPE_MIN_PDF_POINTS = 100
+RBPE_MAX_PDF_POINTS = 250
+RBPE_MAX_GRID_POINTS = 512
 
 Grid = namedtuple(
     "Grid", ["grid_values", "cardinality", "resolution", "hist_bin_edges", "limits"]
@@ -48,6 +57,17 @@ def _calculate_grid_parameters(limits, dx: float = 0.01) -> Grid:
     return Grid(grid_values, cardinality, resolution, hist_bin_edges, limits)
 
 
+def _calculate_grid_dx(limits, cardinality: int) -> float:
+    """Return a dx for which `_calculate_grid_parameters` gives a grid of
+    ``cardinality`` points between the limits.
+
+    The grid has ``int((limits[-1] - limits[0]) / dx)`` points, so dx is taken
+    halfway between the values that give ``cardinality`` and ``cardinality + 1``
+    points, to be safe from rounding errors.
+    """
+    return (limits[-1] - limits[0]) / (cardinality + 0.5)
+
+
 def calculate_moment(p, N, limits, dx=0.01):
     """
     Calculates a moment of a qp.Ensemble object
@@ -81,10 +101,147 @@ def calculate_moment(p, N, limits, dx=0.01):
     return M
 
 
-def calculate_kld(p, q, limits, dx=0.01):
+def _native_representation(p, q):
+    """Return the name of the parameterization of p and q if the metrics can be
+    computed directly from their stored arrays, i.e. if they are both ``hist`` with
+    the same bins, both ``interp`` with the same xvals, or both ``mixmod``,
+    and None otherwise."""
+    if p.gen_class is not q.gen_class or p.npdf != q.npdf:
+        return None
+    name = p.gen_class.name
+    if name == "hist" and np.array_equal(p.dist.bins, q.dist.bins):
+        return name
+    if name == "interp" and np.array_equal(p.dist.xvals, q.dist.xvals):
+        return name
+    if name == "mixmod":
+        return name
+    return None
+
+
+def _hist_overlaps(bins, limits):
+    """Return the length of the overlap of each histogram bin with the limits"""
+    return np.clip(
+        np.minimum(bins[1:], limits[-1]) - np.maximum(bins[:-1], limits[0]), 0.0, None
+    )
+
+
+def _interp_nodes(p, q, limits):
+    """Return the interpolation points of p and q within the limits, adding the
+    limits themselves, and the values of the pdfs of p and q on these points"""
+    xvals = p.dist.xvals
+    lower = max(limits[0], xvals[0])
+    upper = min(limits[-1], xvals[-1])
+    if lower >= upper:
+        return None
+    nodes = np.unique(
+        np.concatenate([[lower], xvals[(xvals > lower) & (xvals < upper)], [upper]])
+    )
+    # the pdfs are linear between the interpolation points, so the values on the
+    # nodes are the same linear combination of two stored values for all the rows
+    upper_idx = np.clip(np.searchsorted(xvals, nodes, side="right"), 1, xvals.size - 1)
+    frac = (nodes - xvals[upper_idx - 1]) / (xvals[upper_idx] - xvals[upper_idx - 1])
+
+    def on_nodes(yvals):
+        return yvals[:, upper_idx - 1] * (1.0 - frac) + yvals[:, upper_idx] * frac
+
+    return nodes, on_nodes(p.dist.yvals), on_nodes(q.dist.yvals)
+
+
+def _gaussian_mixture_overlap(mix_a, mix_b, limits):
+    """Return the integral between the limits of the product of two Gaussian mixtures.
+
+    The product of two Gaussians is a Gaussian times the overlap of the two, so each
+    pair of components contributes a normal density to the overlap, times the
+    probability of the product Gaussian between the limits.
+    """
+    mean_a, std_a, weight_a = (arr[:, :, np.newaxis] for arr in mix_a)
+    mean_b, std_b, weight_b = (arr[:, np.newaxis, :] for arr in mix_b)
+    var_sum = std_a**2 + std_b**2
+    overlap = stats.norm.pdf(mean_a, loc=mean_b, scale=np.sqrt(var_sum))
+    prod_mean = (mean_a * std_b**2 + mean_b * std_a**2) / var_sum
+    prod_std = std_a * std_b / np.sqrt(var_sum)
+    in_limits = stats.norm.cdf(limits[-1], prod_mean, prod_std) - stats.norm.cdf(
+        limits[0], prod_mean, prod_std
+    )
+    return np.sum(weight_a * weight_b * overlap * in_limits, axis=(1, 2))
+
+
+def _native_kld(p, q, limits):
+    """Calculate the KLD from the stored arrays of p and q, or return None if their
+    representations can not be compared directly.
+
+    For ``hist`` the pdfs are constant in each bin, so the integral is exact. For
+    ``interp`` the pdfs are linear between the interpolation points, and the
+    integrand is integrated with Gauss-Legendre quadrature between them.
+    """
+    name = _native_representation(p, q)
+    if name == "hist":
+        widths = _hist_overlaps(p.dist.bins, limits)
+        pn = p.dist.pdfs
+        qn = q.dist.pdfs
+        return np.sum(widths * pn * (safelog(pn) - safelog(qn)), axis=-1)
+    if name == "interp":
+        nodes = _interp_nodes(p, q, limits)
+        if nodes is None:
+            return np.zeros(p.npdf)
+        xvals, pn, qn = nodes
+        # Gauss-Legendre quadrature in each interval between the interpolation points
+        points, weights = np.polynomial.legendre.leggauss(KLD_QUADRATURE_POINTS)
+        points = 0.5 * (points + 1.0)
+        weights = 0.5 * weights * np.diff(xvals)[:, np.newaxis]
+        pq = pn[:, :-1, np.newaxis] * (1.0 - points) + pn[:, 1:, np.newaxis] * points
+        qq = qn[:, :-1, np.newaxis] * (1.0 - points) + qn[:, 1:, np.newaxis] * points
+        return np.sum(weights * pq * (safelog(pq) - safelog(qq)), axis=(1, 2))
+    return None
+
+
+def _native_rmse(p, q, limits):
+    """Calculate the RMSE from the stored arrays of p and q, or return None if their
+    representations can not be compared directly.
+
+    The square of the difference of the pdfs is integrated exactly between the
+    limits, for ``hist`` as it is constant in each bin, for ``interp`` as it is
+    quadratic between the interpolation points, and for ``mixmod`` from the
+    overlaps of the Gaussian components.
+    """
+    name = _native_representation(p, q)
+    length = limits[-1] - limits[0]
+    if name == "hist":
+        widths = _hist_overlaps(p.dist.bins, limits)
+        sq_integral = np.sum(widths * (p.dist.pdfs - q.dist.pdfs) ** 2, axis=-1)
+    elif name == "interp":
+        nodes = _interp_nodes(p, q, limits)
+        if nodes is None:
+            return np.zeros(p.npdf)
+        xvals, pn, qn = nodes
+        diff = pn - qn
+        sq_integral = np.sum(
+            np.diff(xvals)
+            * (diff[:, :-1] ** 2 + diff[:, :-1] * diff[:, 1:] + diff[:, 1:] ** 2)
+            / 3.0,
+            axis=-1,
+        )
+    elif name == "mixmod":
+        mix_p = (p.dist.means, p.dist.stds, p.dist.weights)
+        mix_q = (q.dist.means, q.dist.stds, q.dist.weights)
+        sq_integral = (
+            _gaussian_mixture_overlap(mix_p, mix_p, limits)
+            - 2.0 * _gaussian_mixture_overlap(mix_p, mix_q, limits)
+            + _gaussian_mixture_overlap(mix_q, mix_q, limits)
+        )
+    else:
+        return None
+    return np.sqrt(np.clip(sq_integral, 0.0, None) / length)
+
+
+def calculate_kld(p, q, limits, dx=0.01, native=True):
     """
     Calculates the Kullback-Leibler Divergence between two qp.Ensemble objects.
 
+    If both Ensembles are ``hist`` with the same bins, or ``interp`` with the same
+    xvals, the KLD is computed directly from their stored arrays, without
+    evaluating the PDFs on a grid.
+
     Parameters
     ----------
     p: Ensemble object
@@ -95,6 +252,8 @@ def calculate_kld(p, q, limits, dx=0.01):
         endpoints of integration interval in which to calculate KLD
     dx: float
         resolution of integration grid
+    native: bool
+        if False, always evaluate the PDFs on the integration grid
 
     Returns
     -------
@@ -110,30 +269,36 @@ def calculate_kld(p, q, limits, dx=0.01):
             "Cannot calculate KLD between two ensembles with different shapes"
         )
 
-    # Make a grid from the limits and resolution
-    grid = _calculate_grid_parameters(limits, dx)
+    Dpq = _native_kld(p, q, limits) if native else None
+    if Dpq is None:
+        # Make a grid from the limits and resolution
+        grid = _calculate_grid_parameters(limits, dx)
 
-    # Evaluate the functions on the grid and normalize
-    pe = p.gridded(grid.grid_values)
-    pn = pe[1]
-    qe = q.gridded(grid.grid_values)
-    qn = qe[1]
+        # Evaluate the functions on the grid and normalize
+        pe = p.gridded(grid.grid_values)
+        pn = pe[1]
+        qe = q.gridded(grid.grid_values)
+        qn = qe[1]
 
-    # Calculate the KLD from q to p
-    Dpq = array_metrics.quick_kld(
-        pn, qn, grid.resolution
-    )  # np.dot(pn * logquotient, np.ones(len(grid)) * dx)
+        # Calculate the KLD from q to p
+        Dpq = array_metrics.quick_kld(
+            pn, qn, grid.resolution
+        )  # np.dot(pn * logquotient, np.ones(len(grid)) * dx)
 
     if np.any(Dpq < 0.0):  # pragma: no cover
-        print("broken KLD: " + str((Dpq, pn, qn, grid.resolution)))
+        print("broken KLD: " + str(Dpq))
         Dpq = epsilon * np.ones(Dpq.shape)
     return Dpq
 
 
-def calculate_rmse(p, q, limits, dx=0.01):
+def calculate_rmse(p, q, limits, dx=0.01, native=True):
     """
     Calculates the Root Mean Square Error between two qp.Ensemble objects.
 
+    If both Ensembles are ``hist`` with the same bins, ``interp`` with the same
+    xvals, or ``mixmod``, the RMSE is computed exactly from their stored arrays,
+    without evaluating the PDFs on a grid.
+
     Parameters
     ----------
     p: qp.Ensemble object
@@ -146,6 +311,8 @@ def calculate_rmse(p, q, limits, dx=0.01):
         endpoints of integration interval in which to calculate RMS
     dx: float
         resolution of integration grid
+    native: bool
+        if False, always evaluate the PDFs on the integration grid
 
     Returns
     -------
@@ -161,6 +328,11 @@ def calculate_rmse(p, q, limits, dx=0.01):
             "Cannot calculate RMSE between two ensembles with different shapes"
         )
 
+    if native:
+        rms = _native_rmse(p, q, limits)
+        if rms is not None:
+            return rms
+
     # Make a grid from the limits and resolution
     grid = _calculate_grid_parameters(limits, dx)
 
@@ -176,20 +348,55 @@ def calculate_rmse(p, q, limits, dx=0.01):
     return rms
 
 
-def calculate_rbpe(p, limits=(np.inf, np.inf)):
+def _group_by_extent(lower, upper, step, max_points):
+    """Split PDFs into groups that can share an integration grid.
+
+    PDFs with the same grid ``step`` are sorted by their lower integration bound,
+    and each group takes consecutive PDFs while the extent of their integration
+    bounds fits in ``max_points`` grid points.
+    Returns a list of the row indices of each group.
+    """
+    groups = []
+    for group_step in np.unique(step):
+        rows = np.flatnonzero(step == group_step)
+        rows = rows[np.argsort(lower[rows], kind="stable")]
+        first = 0
+        while first < rows.size:
+            reach = np.maximum.accumulate(upper[rows[first:]]) - lower[rows[first]]
+            n_rows = np.searchsorted(reach, (max_points - 1) * group_step, "right")
+            last = first + max(int(n_rows), 1)
+            groups.append(rows[first:last])
+            first = last
+    return groups
+
+
+def calculate_rbpe(p, limits=(np.inf, np.inf), dx=0.005, batch_size=10_000):
     """
     Calculates the risk based point estimates of a qp.Ensemble object.
     Algorithm as defined in 4.2 of 'Photometric redshifts for Hyper Suprime-Cam
     Subaru Strategic Program Data Release 1' (Tanaka et al. 2018).
 
+    Each PDF is integrated between its 1st and 99th percentiles, on a grid with a
+    spacing of ``dx``, refined or coarsened so that there are between
+    `RBPE_MIN_PDF_POINTS` and `RBPE_MAX_PDF_POINTS` points between the bounds.
+    PDFs with similar spacings and overlapping bounds share a grid of at most
+    `RBPE_MAX_GRID_POINTS` points, and the risk is minimized for all the PDFs
+    of a grid together with `array_metrics.quick_rbpe_batch`.
+
     Parameters
     ----------
     p: qp.Ensemble object
         Ensemble of PDFs to be evalutated
     limits: tuple
         The limits at which to evaluate possible z_best estimates.
-        If custom limits are not provided then all potential z value will be
-        considered using the scipy.optimize.minimize_scalar function.
+        If custom limits are not provided then all z values within the
+        integration range of the PDFs are considered.
+    dx: float
+        The spacing of the integration grid of PDFs of typical width, by default
+        0.005. The candidate estimates are spaced by twice the grid spacing before
+        being refined.
+    batch_size: int
+        The number of PDFs that are evaluated together, by default 10,000.
 
     Returns
     -------
@@ -197,25 +404,78 @@ def calculate_rbpe(p, limits=(np.inf, np.inf)):
         The risk based point estimates of the provided ensemble.
     """
     rbpes = []
-
-    def evaluate_pdf_at_z(z, dist):
-        return dist.pdf(z)
-
-    for n in range(0, p.npdf):
-        if p[n].npdf != 1:
-            raise ValueError(
-                "quick_rbpe only handles Ensembles with a single PDF "
-                "for ensembles with more than one PDF, use the qp.metrics.risk_based_point_estimate function."
+    for start in range(0, p.npdf, batch_size):
+        batch = p if p.npdf <= batch_size else p[start : start + batch_size]
+        lower = np.atleast_1d(np.squeeze(batch.ppf(0.01), axis=-1))
+        upper = np.atleast_1d(np.squeeze(batch.ppf(0.99), axis=-1))
+        width = upper - lower
+
+        # PDFs without any width are their own estimate
+        batch_rbpes = lower.astype(float)
+        if limits[0] != np.inf:
+            batch_rbpes = np.clip(batch_rbpes, limits[0], limits[1])
+        valid = np.flatnonzero(width > 0)
+        if valid.size == 0:
+            rbpes.append(batch_rbpes)
+            continue
+
+        # round the grid spacing of each PDF down to dx times a power of two,
+        # so that PDFs of similar widths can share a grid
+        spacing = np.clip(
+            dx, width[valid] / RBPE_MAX_PDF_POINTS, width[valid] / RBPE_MIN_PDF_POINTS
+        )
+        steps = np.full(lower.size, dx)
+        steps[valid] = dx * np.exp2(np.floor(np.log2(spacing / dx)))
+        groups = [
+            valid[rows]
+            for rows in _group_by_extent(
+                lower[valid], upper[valid], steps[valid], RBPE_MAX_GRID_POINTS
             )
-
-        this_dist_pdf_at_z = partial(evaluate_pdf_at_z, dist=p[n])
-        integration_bounds = (p[n].ppf(0.01), p[n].ppf(0.99))
-
-        rbpes.append(
-            array_metrics.quick_rbpe(this_dist_pdf_at_z, integration_bounds, limits)
+        ]
+
+        # evaluate all the PDFs at once, each on the grid of its group
+        grid_starts = lower.astype(float)
+        n_points = []
+        for rows in groups:
+            grid_starts[rows] = lower[rows[0]]
+            n_points.append(
+                int(np.ceil((np.max(upper[rows]) - lower[rows[0]]) / steps[rows[0]]))
+                + 1
+            )
+        grids = grid_starts[:, np.newaxis] + steps[:, np.newaxis] * np.arange(
+            max(n_points)
         )
+        pdfs = batch.pdf(grids)
+
+        for rows, n_grid in zip(groups, n_points):
+            step = steps[rows[0]]
+            grid = grids[rows[0], :n_grid]
+            # each point is weighted by the overlap of its cell with the bounds of each PDF
+            cell_lower = np.maximum(grid - 0.5 * step, lower[rows, np.newaxis])
+            cell_upper = np.minimum(grid + 0.5 * step, upper[rows, np.newaxis])
+            weights = np.clip(cell_upper - cell_lower, 0.0, None) * pdfs[rows, :n_grid]
+
+            candidate_limits = (grid[0], grid[-1])
+            if limits[0] != np.inf:
+                candidate_limits = (max(limits[0], grid[0]), min(limits[1], grid[-1]))
+                if candidate_limits[0] >= candidate_limits[1]:
+                    # the limits are all on one side of the PDFs, which are
+                    # already estimated by the nearest limit
+                    continue
+            n_candidates = max(
+                int(np.ceil((candidate_limits[1] - candidate_limits[0]) / (2 * step)))
+                + 1,
+                3,
+            )
+            candidates = np.linspace(
+                candidate_limits[0], candidate_limits[1], n_candidates
+            )
+            batch_rbpes[rows] = array_metrics.quick_rbpe_batch(
+                weights, grid, candidates
+            )
+        rbpes.append(batch_rbpes)
 
-    return np.array(rbpes)
+    return np.concatenate(rbpes)
 
 
 def _prepare_for_brier(p, truth, limits, dx=0.01):
@@ -246,13 +506,17 @@ def _prepare_for_brier(p, truth, limits, dx=0.01):
     # the 1st index is the array of PDF values. Thus we call p.gridded(...)[1]
     pdf_values = p.gridded(grid.grid_values)[1]
 
-    # Create the NxM truth_array.
-    # Note np.histogram returns a 2-tuple. The 0th index is the histogram array,
-    # thus we call np.squeeze to remove extra dimensions.
-    truth_array = np.squeeze([np.histogram(t, grid.hist_bin_edges)[0] for t in truth])
+    # Find the histogram bin of each truth value, matching np.histogram in that
+    # the last bin includes its right edge, and values outside of the bins get -1.
+    # Brier builds the one-hot NxM truth array from these implicitly.
+    truth = np.ravel(truth)
+    edges = grid.hist_bin_edges
+    truth_bins = np.searchsorted(edges, truth, side="right") - 1
+    truth_bins[truth == edges[-1]] = edges.size - 2
+    truth_bins[(truth < edges[0]) | (truth > edges[-1])] = -1
 
     # instantiate the Brier metric object
-    return Brier(pdf_values, truth_array)
+    return Brier(pdf_values, truth_bins)
 
 
 def calculate_brier(p, truth, limits, dx=0.01):
@@ -389,14 +653,21 @@ def calculate_outlier_rate(p, lower_limit=0.0001, upper_limit=0.9999):
             "Each element in the ensemble `p` must be a single distribution."
         )
 
-    outlier_rates = np.array(
-        [(dist.cdf(lower_limit) + (1.0 - dist.cdf(upper_limit))) for dist in p]
-    )
+    # evaluate the CDF of all the distributions at both limits in one call
+    cdfs = np.reshape(p.cdf(np.array([lower_limit, upper_limit])), (-1, 2))
+    outlier_rates = cdfs[:, 0] + (1.0 - cdfs[:, 1])
     return outlier_rates
 
 
 def calculate_goodness_of_fit(
-    estimate, reference, fit_metric="ks", num_samples=100, _random_state=None
+    estimate,
+    reference,
+    fit_metric="ks",
+    num_samples=100,
+    _random_state=None,
+    method="sampling",
+    num_points=1000,
+    limits=None,
 ):
     """This method calculates goodness of fit between the distributions in the
     `estimate` and `reference` Ensembles using the specified fit_metric.
@@ -415,6 +686,17 @@ def calculate_goodness_of_fit(
         Number of random variates to draw from each distribution in `estimate`, by default 100
     _random_state : _type_, optional
         Used for testing to create reproducible sets of random variates, by default None
+    method : string, optional
+        One of ['sampling', 'quadrature'], by default 'sampling'. With 'sampling', the
+        statistic is computed from `num_samples` random variates of `estimate`. With
+        'quadrature', the distance is computed deterministically from the CDFs of
+        both Ensembles on a grid of `num_points` points, see Notes.
+    num_points : int, optional
+        Number of grid points for the 'quadrature' method, by default 1000
+    limits : 2-tuple of floats, optional
+        The limits of a grid shared by all the distributions for the 'quadrature' method.
+        By default None, in which case each row gets its own grid that spans the
+        1e-6 and 1 - 1e-6 quantiles of both the `estimate` and `reference` distributions.
 
     Returns
     -------
@@ -426,14 +708,19 @@ def calculate_goodness_of_fit(
     KeyError
         If the requested `fit_metric` is not contained in `goodness_of_fit_metrics` dictionary,
         raise a KeyError.
+    ValueError
+        If `method` is not one of 'sampling' or 'quadrature'.
 
     Notes
     -----
     The calculation of the goodness of fit metrics is not symmetric.
     i.e. `calculate_goodness_of_fit(p, q, ...) != calculate_goodness_of_fit(q, p, ...)`
 
-    In the future, we should be able to do this directly from the PDFs without needing to
-    take random variates from the `estimate` Ensemble.
+    With the 'quadrature' method, the results are the population versions of the statistics,
+    with F the CDF of `estimate` and G the CDF of `reference`: sup |F - G| for 'ks',
+    the integral of (F - G)^2 dG for 'cvm', and the integral of (F - G)^2 / (G (1 - G)) dG
+    for 'ad'. These are the large sample limits of the sample statistics divided by the
+    number of samples, and do not depend on `num_samples` or `_random_state`.
 
     The vectorized implementations of fit metrics are copied over (unmodified) from
     the developer branch of Scipy 1.10.0dev. When Scipy 1.10 is released, we can replace
@@ -472,12 +759,40 @@ def calculate_goodness_of_fit(
         metrics = list(goodness_of_fit_metrics.keys())
         raise KeyError(f"`fit_metric` should be one of {metrics}.")
 
+    if method == "quadrature":
+        grid = _goodness_of_fit_grid(estimate, reference, num_points, limits)
+        return goodness_of_fit_cdf_metrics[fit_metric](
+            estimate.cdf(grid), reference.cdf(grid)
+        )
+    if method != "sampling":
+        raise ValueError(
+            f"`method` should be one of ['sampling', 'quadrature'], not {method}."
+        )
+
     return goodness_of_fit_metrics[fit_metric](
         reference,
         np.squeeze(estimate.rvs(size=num_samples, random_state=_random_state)),
     )
 
 
+def _goodness_of_fit_grid(estimate, reference, num_points, limits=None, tail=1e-6):
+    """Build the grid on which the CDFs are compared by the 'quadrature' method of
+    `calculate_goodness_of_fit`. This is either a single grid between `limits`,
+    or one grid per row that spans the `tail` and 1 - `tail` quantiles of both
+    the estimate and the reference distributions, with shape (npdf, num_points).
+    """
+    if limits is not None:
+        return np.linspace(limits[0], limits[1], num_points)
+    # one row of quantiles per distribution, which every parameterization accepts
+    quantiles = np.tile([tail, 1.0 - tail], (estimate.npdf, 1))
+    est_bounds = np.reshape(estimate.ppf(quantiles), (-1, 2))
+    ref_bounds = np.reshape(reference.ppf(quantiles), (-1, 2))
+    lower = np.minimum(est_bounds[:, 0], ref_bounds[:, 0])
+    upper = np.maximum(est_bounds[:, 1], ref_bounds[:, 1])
+    steps = np.linspace(0.0, 1.0, num_points)
+    return lower[:, np.newaxis] + (upper - lower)[:, np.newaxis] * steps
+
+
 def _check_ensembles_are_same_size(p, q):
     """This utility function ensures checks that two Ensembles contain equal numbers of distributions"
 
@@ -501,11 +816,12 @@ def _check_ensemble_is_not_nested(p):
     Raises:
         ValueError: If there are any elements of the input Ensemble that contain more than 1 PDF.
     """
-    for dist in p:
-        if dist.npdf != 1:
-            raise ValueError(
-                "Each element in the input Ensemble should be a single distribution."
-            )
+    # Every element has the shape of the Ensemble without its first axis, so the
+    # elements are single distributions unless there are extra axes before the last one.
+    if np.prod(p.shape[1:-1], dtype=int) != 1:
+        raise ValueError(
+            "Each element in the input Ensemble should be a single distribution."
+        )
 
 
 def _check_ensembles_contain_correct_number_of_distributions(estimate, reference):
@@ -3,9 +3,80 @@ from .base_metric_classes import (
     MetricOutputType,
     PointToPointMetric,
 )
-from functools import reduce
-from operator import add
 from .lazy_modules import pytdigest
+from .util_funcs import merge_centroids, tree_reduce
+
+SIGMA_IQR_SCALE_FACTOR = 1.349
+SIGMA_MAD_SCALE_FACTOR = 1.4826
+
+
+def _calculate_ez(estimate, reference):
+    """Return the scaled residuals (estimate - reference) / (1 + reference)"""
+    return (estimate - reference) / (1.0 + reference)
+
+
+def _merge_moments(left, right):
+    """Combine the (count, mean, sum of squared deviations) of two sets of values,
+    with the pairwise update of Chan et al."""
+    count_a, mean_a, m2_a = left
+    count_b, mean_b, m2_b = right
+    count = count_a + count_b
+    if count == 0:
+        return left
+    delta = mean_b - mean_a
+    mean = mean_a + delta * count_b / count
+    m2 = m2_a + m2_b + delta**2 * count_a * count_b / count
+    return count, mean, m2
+
+
+def _sigma_iqr_from_digest(digest):
+    x75, x25 = digest.inverse_cdf([0.75, 0.25])
+    iqr = x75 - x25
+    return iqr / SIGMA_IQR_SCALE_FACTOR
+
+
+def _outlier_rate_from_digest(digest):
+    # the outlier cut is max(0.06, 3 sigma_IQR)
+    cut_criterion = np.maximum(0.06, 3.0 * _sigma_iqr_from_digest(digest))
+
+    # here we use the number of points in the centroids as an approximation
+    # of ez.
+    centroids = digest.get_centroids()
+    mask = np.fabs(centroids[:, 0]) > cut_criterion
+    outlier = np.sum(centroids[mask, 1])
+
+    # Since we use equal weights for all the values in the digest
+    # digest.weight is the total number of values, and is stored as a float.
+    return float(outlier) / digest.weight
+
+
+def _sigma_mad_from_digest(digest, num_bins: int):
+    # calculation of `np.median(np.fabs(ez - np.median(ez)))` as suggested by Eric Charles
+    this_median = digest.inverse_cdf(0.50)
+    this_min = digest.inverse_cdf(0)
+    this_max = digest.inverse_cdf(1)
+    bins = np.linspace(this_min, this_max, num_bins)
+    bin_cents = (bins[0:-1] + bins[1:]) / 2.0
+    this_pdf = digest.cdf(bins[1:]) - digest.cdf(
+        bins[0:-1]
+    )  # len(this_pdf) = lots_of_bins - 1
+    bin_dist = np.fabs(
+        bin_cents - this_median
+    )  # get the distance to the center for each bin in the hist
+
+    sorted_bins_dist_idx = np.argsort(bin_dist)  # sort the bins by dist to median
+    sorted_bins_dist = bin_dist[sorted_bins_dist_idx]  # get the sorted distances
+    cumulative_sorted = this_pdf[
+        sorted_bins_dist_idx
+    ].cumsum()  # the cumulate PDF within the nearest bins
+    median_sorted_bin = np.searchsorted(
+        cumulative_sorted, 0.5
+    )  # which bins are the nearest 50% of the PDF
+    dist_to_median = sorted_bins_dist[
+        median_sorted_bin
+    ]  # return the corresponding distance to the median
+
+    return dist_to_median * SIGMA_MAD_SCALE_FACTOR
 
 
 class PointToPointMetricDigester(PointToPointMetric):
@@ -34,7 +105,7 @@ class PointToPointMetricDigester(PointToPointMetric):
             The centroids of the TDigest. Roughly approximates a histogram with
             centroid locations and weights.
         """
-        ez = (estimate - reference) / (1.0 + reference)
+        ez = _calculate_ez(estimate, reference)
         digest = pytdigest.TDigest.compute(ez, compression=self._tdigest_compression)
         centroids = digest.get_centroids()
         return centroids
@@ -55,13 +126,7 @@ class PointToPointMetricDigester(PointToPointMetric):
             The result of the specific metric calculation defined in the subclasses
             `compute_from_digest` method.
         """
-        digests = (
-            pytdigest.TDigest.of_centroids(
-                np.array(centroid), compression=self._tdigest_compression
-            )
-            for centroid in centroids
-        )
-        digest = reduce(add, digests)
+        digest = merge_centroids(centroids, self._tdigest_compression)
 
         return self.compute_from_digest(digest)
 
@@ -98,7 +163,7 @@ class PointStatsEz(PointToPointMetric):
             The result of calculating (estimate-reference)/(1+reference)
         """
 
-        return (estimate - reference) / (1.0 + reference)
+        return _calculate_ez(estimate, reference)
 
 
 class PointSigmaIQR(PointToPointMetricDigester):
@@ -126,17 +191,14 @@ class PointSigmaIQR(PointToPointMetricDigester):
         float
             The interquartile range.
         """
-        ez = (estimate - reference) / (1.0 + reference)
+        ez = _calculate_ez(estimate, reference)
         x75, x25 = np.percentile(ez, [75.0, 25.0])
         iqr = x75 - x25
-        sigma_iqr = iqr / 1.349
+        sigma_iqr = iqr / SIGMA_IQR_SCALE_FACTOR
         return sigma_iqr
 
     def compute_from_digest(self, digest):
-        x75, x25 = digest.inverse_cdf([0.75, 0.25])
-        iqr = x75 - x25
-        sigma_iqr = iqr / 1.349
-        return sigma_iqr
+        return _sigma_iqr_from_digest(digest)
 
 
 class PointBias(PointToPointMetricDigester):
@@ -165,7 +227,7 @@ class PointBias(PointToPointMetricDigester):
         float
             Median of the ez values
         """
-        return np.median((estimate - reference) / (1.0 + reference))
+        return np.median(_calculate_ez(estimate, reference))
 
     def compute_from_digest(self, digest):
         return digest.inverse_cdf(0.50)
@@ -200,7 +262,7 @@ class PointOutlierRate(PointToPointMetricDigester):
             Fraction of catastrophic outliers for full sample
         """
 
-        ez = (estimate - reference) / (1.0 + reference)
+        ez = _calculate_ez(estimate, reference)
         num = len(ez)
         sig_iqr = PointSigmaIQR().evaluate(estimate, reference)
         three_sig = 3.0 * sig_iqr
@@ -210,23 +272,7 @@ class PointOutlierRate(PointToPointMetricDigester):
         return float(outlier) / float(num)
 
     def compute_from_digest(self, digest):
-        # this replaces the call to PointSigmaIQR().evaluate()
-        x75, x25 = digest.inverse_cdf([0.75, 0.25])
-        iqr = x75 - x25
-        sigma_iqr = iqr / 1.349
-
-        three_sig = 3.0 * sigma_iqr
-        cut_criterion = np.maximum(0.06, three_sig)
-
-        # here we use the number of points in the centroids as an approximation
-        # of ez.
-        centroids = digest.get_centroids()
-        mask = np.fabs(centroids[:, 0]) > cut_criterion
-        outlier = np.sum(centroids[mask, 1])
-
-        # Since we use equal weights for all the values in the digest
-        # digest.weight is the total number of values, and is stored as a float.
-        return float(outlier) / digest.weight
+        return _outlier_rate_from_digest(digest)
 
 
 class PointSigmaMAD(PointToPointMetricDigester):
@@ -246,7 +292,7 @@ class PointSigmaMAD(PointToPointMetricDigester):
 
     def evaluate(self, estimate, reference):
         """Function to calculate SigmaMAD (the median absolute deviation scaled
-        up by constant factor, ``SCALE_FACTOR``.
+        up by constant factor, ``SIGMA_MAD_SCALE_FACTOR``.
 
         Parameters
         ----------
@@ -261,37 +307,134 @@ class PointSigmaMAD(PointToPointMetricDigester):
             sigma_MAD for full sample
         """
 
-        SCALE_FACTOR = 1.4826
-        ez = (estimate - reference) / (1.0 + reference)
+        ez = _calculate_ez(estimate, reference)
         mad = np.median(np.fabs(ez - np.median(ez)))
-        return mad * SCALE_FACTOR
+        return mad * SIGMA_MAD_SCALE_FACTOR
+
+    def compute_from_digest(self, digest):
+        return _sigma_mad_from_digest(digest, self._num_bins)
+
+
+class PointStats(PointToPointMetricDigester):
+    """Calculate all the point statistics of the ez values in a single pass.
+
+    `accumulate` computes the ez values of a chunk only once, and returns a single
+    t-digest of them together with their exact count, mean and sum of squared
+    deviations. `finalize` merges the digests and the moments of all the chunks,
+    which can be accumulated in parallel (see `eval_from_iterator`), and derives
+    the statistics of `PointBias`, `PointSigmaIQR`, `PointOutlierRate` and
+    `PointSigmaMAD` from the merged digest, and the exact mean and standard
+    deviation of ez from the merged moments.
+
+    The results are given as a dictionary, keyed by the ``metric_name`` of the
+    corresponding metric, and ``mean``, ``std`` and ``count``.
+    """
+
+    metric_name = "point_stats"
+    metric_output_type = MetricOutputType.single_value
+
+    def __init__(self, **kwargs) -> None:
+        super().__init__(**kwargs)
+        self._num_bins = kwargs.get("num_bins", 1_000_000)
+
+    def evaluate(self, estimate, reference):
+        """Calculate all the point statistics of the ez values in memory
+
+        Parameters
+        ----------
+        estimate : Numpy 1d array
+            Point estimate values
+        reference : Numpy 1d array
+            True values
+
+        Returns
+        -------
+        dict
+            The point statistics
+        """
+        ez = _calculate_ez(estimate, reference)
+        x75, x50, x25 = np.percentile(ez, [75.0, 50.0, 25.0])
+        sigma_iqr = (x75 - x25) / SIGMA_IQR_SCALE_FACTOR
+        cut_criterion = np.maximum(0.06, 3.0 * sigma_iqr)
+        return {
+            PointBias.metric_name: x50,
+            PointSigmaIQR.metric_name: sigma_iqr,
+            PointOutlierRate.metric_name: float(np.mean(np.fabs(ez) > cut_criterion)),
+            PointSigmaMAD.metric_name: np.median(np.fabs(ez - x50))
+            * SIGMA_MAD_SCALE_FACTOR,
+            "mean": np.mean(ez),
+            "std": np.std(ez),
+            "count": ez.size,
+        }
+
+    def accumulate(self, estimate, reference):
+        """Compress the ez values of a chunk into a TDigest and their moments.
+
+        Parameters
+        ----------
+        estimate : Numpy 1d array
+            Point estimate values
+        reference : Numpy 1d array
+            True values
+
+        Returns
+        -------
+        dict
+            The ``centroids`` of the TDigest of the ez values, and their
+            ``count``, ``mean`` and sum of squared deviations from the mean, ``m2``
+        """
+        ez = np.ravel(_calculate_ez(estimate, reference))
+        digest = pytdigest.TDigest.compute(ez, compression=self._tdigest_compression)
+        mean = np.mean(ez) if ez.size else 0.0
+        return dict(
+            centroids=digest.get_centroids(),
+            count=ez.size,
+            mean=mean,
+            m2=np.sum((ez - mean) ** 2),
+        )
+
+    def finalize(self, centroids: list = None):
+        """Combine the outputs of `accumulate` and derive all the point statistics.
+
+        Parameters
+        ----------
+        centroids : list, optional
+            The output collected from prior calls to `accumulate`, by default None.
+            The parameter keeps the name used by the other metrics, but each item is
+            the dictionary returned by `accumulate`, with the ``centroids`` of the
+            TDigest of the ez values of a chunk, and their ``count``, ``mean`` and
+            sum of squared deviations from the mean, ``m2``.
+
+        Returns
+        -------
+        dict
+            The point statistics, or None if no values were accumulated
+        """
+        if not centroids:
+            return None
+        count, mean, m2 = tree_reduce(
+            _merge_moments,
+            [
+                (partial["count"], partial["mean"], partial["m2"])
+                for partial in centroids
+            ],
+        )
+        if count == 0:
+            return None
+        digest = merge_centroids(
+            [partial["centroids"] for partial in centroids if partial["count"]],
+            self._tdigest_compression,
+        )
+        results = self.compute_from_digest(digest)
+        results["mean"] = mean
+        results["std"] = np.sqrt(m2 / count)
+        results["count"] = count
+        return results
 
     def compute_from_digest(self, digest):
-        SCALE_FACTOR = 1.4826
-
-        # calculation of `np.median(np.fabs(ez - np.median(ez)))` as suggested by Eric Charles
-        this_median = digest.inverse_cdf(0.50)
-        this_min = digest.inverse_cdf(0)
-        this_max = digest.inverse_cdf(1)
-        bins = np.linspace(this_min, this_max, self._num_bins)
-        bin_cents = (bins[0:-1] + bins[1:]) / 2.0
-        this_pdf = digest.cdf(bins[1:]) - digest.cdf(
-            bins[0:-1]
-        )  # len(this_pdf) = lots_of_bins - 1
-        bin_dist = np.fabs(
-            bin_cents - this_median
-        )  # get the distance to the center for each bin in the hist
-
-        sorted_bins_dist_idx = np.argsort(bin_dist)  # sort the bins by dist to median
-        sorted_bins_dist = bin_dist[sorted_bins_dist_idx]  # get the sorted distances
-        cumulative_sorted = this_pdf[
-            sorted_bins_dist_idx
-        ].cumsum()  # the cumulate PDF within the nearest bins
-        median_sorted_bin = np.searchsorted(
-            cumulative_sorted, 0.5
-        )  # which bins are the nearest 50% of the PDF
-        dist_to_median = sorted_bins_dist[
-            median_sorted_bin
-        ]  # return the corresponding distance to the median
-
-        return dist_to_median * SCALE_FACTOR
+        return {
+            PointBias.metric_name: digest.inverse_cdf(0.50),
+            PointSigmaIQR.metric_name: _sigma_iqr_from_digest(digest),
+            PointOutlierRate.metric_name: _outlier_rate_from_digest(digest),
+            PointSigmaMAD.metric_name: _sigma_mad_from_digest(digest, self._num_bins),
+        }
@@ -1,6 +1,10 @@
 import sys
+from operator import add
+
 import numpy as np
 
+from .lazy_modules import pytdigest
+
 epsilon = sys.float_info.epsilon
 
 
@@ -21,3 +25,82 @@ def safelog(arr, threshold=epsilon):
         logarithms, with approximation in place of zeros and negative numbers
     """
     return np.log(np.array(arr).clip(threshold, np.inf))
+
+
+def nearest_index(grid, values):
+    """
+    Finds the index of the nearest grid point for each value, using a binary
+    search rather than comparing every value with every grid point
+
+    Parameters
+    ----------
+    grid: numpy.ndarray, float
+        sorted grid points
+    values: numpy.ndarray, float
+        values to locate on the grid
+
+    Returns
+    -------
+    indices: numpy.ndarray, int
+        indices of the nearest grid points, the lower one in case of a tie
+    """
+    grid = np.asarray(grid)
+    values = np.asarray(values)
+    upper = np.clip(np.searchsorted(grid, values), 1, grid.size - 1)
+    lower = upper - 1
+    take_lower = (values - grid[lower]) <= (grid[upper] - values)
+    return np.where(take_lower, lower, upper)
+
+
+def tree_reduce(func, items):
+    """
+    Combines a sequence of items pairwise, as a balanced binary tree, rather
+    than folding them one after the other. When the items are sketches such as
+    t-digests, every item then goes through the same number of merges, whatever
+    the number of chunks or processes that produced them
+
+    Parameters
+    ----------
+    func: callable
+        function that combines two items into one
+    items: sequence
+        items to combine, in order
+
+    Returns
+    -------
+    reduced: object
+        the combination of all the items, or None if there are no items
+    """
+    items = list(items)
+    if not items:
+        return None
+    while len(items) > 1:
+        merged = [func(left, right) for left, right in zip(items[::2], items[1::2])]
+        if len(items) % 2:
+            merged.append(items[-1])
+        items = merged
+    return items[0]
+
+
+def merge_centroids(centroids, compression: int):
+    """
+    Merges the centroids of several t-digests, e.g. the outputs of the
+    `accumulate` method of the metrics for several chunks, into a single TDigest
+
+    Parameters
+    ----------
+    centroids: sequence
+        the (mean, weight) centroids of each t-digest, as 2d arrays
+    compression: int
+        the compression of the merged TDigest
+
+    Returns
+    -------
+    digest: pytdigest.TDigest
+        the merged TDigest, or None if there are no centroids
+    """
+    digests = [
+        pytdigest.TDigest.of_centroids(np.array(centroid), compression=compression)
+        for centroid in centroids
+    ]
+    return tree_reduce(add, digests)
@@ -43,11 +43,20 @@ class Pdf_gen:
     possible coordinate data such as the bin edges used for histogram representations.
 
     Object data are elements that differ for each of the PDFs.
+
+    The ``evaluation_costs`` are the relative costs of evaluating the pdf, cdf, ppf
+    or of drawing a sample, for one distribution at one point, in units of a linear
+    interpolation. They are used to choose how to convert distributions of this
+    type, see `qp.explain_conversion`.
     """
 
     _reader_map = {}
     _creation_map = {}
     _extraction_map = {}
+    _extraction_evaluates_map = {}
+    _shortcut_map = {}
+
+    evaluation_costs = dict(pdf=1.0, cdf=1.0, ppf=1.0, rvs=1.0)
 
     def __init__(self, *args, **kwargs):
         """C'tor"""
@@ -90,6 +99,18 @@ class Pdf_gen:
         """Return the method used to extract data to create a PDF of this type"""
         return get_val_or_default(cls._extraction_map, method)
 
+    @classmethod
+    def extraction_evaluates(cls, method=None):
+        """Return which function of the input distributions the extraction method
+        evaluates, one of ``pdf``, ``cdf``, ``ppf`` or ``rvs``"""
+        return get_val_or_default(cls._extraction_evaluates_map, method)
+
+    @classmethod
+    def shortcut_method(cls, from_name):
+        """Return the shortcut used to extract data to create a PDF of this type
+        from a PDF of type ``from_name``, and its cost, or None"""
+        return cls._shortcut_map.get(from_name)
+
     @classmethod
     def reader_method(cls, version=None):
         """Return the method used to convert data read from a file PDF of this type"""
@@ -101,6 +122,8 @@ class Pdf_gen:
         cls._reader_map = {}
         cls._creation_map = {}
         cls._extraction_map = {}
+        cls._extraction_evaluates_map = {}
+        cls._shortcut_map = {}
 
     @classmethod
     def _add_creation_method(cls, the_func, method):
@@ -108,9 +131,18 @@ class Pdf_gen:
         set_val_or_default(cls._creation_map, method, the_func)
 
     @classmethod
-    def _add_extraction_method(cls, the_func, method):
-        """Add a method used to extract data to create a PDF of this type"""
+    def _add_extraction_method(cls, the_func, method, evaluates="pdf"):
+        """Add a method used to extract data to create a PDF of this type, which
+        evaluates the ``evaluates`` function of the input distributions"""
         set_val_or_default(cls._extraction_map, method, the_func)
+        set_val_or_default(cls._extraction_evaluates_map, method, evaluates)
+
+    @classmethod
+    def _add_shortcut_method(cls, the_func, from_name, cost):
+        """Add a method used to extract data to create a PDF of this type directly
+        from the data of a PDF of type ``from_name``, with a cost per extracted value
+        in the same units as ``evaluation_costs``"""
+        cls._shortcut_map[from_name] = (the_func, cost)
 
     @classmethod
     def _add_reader_method(cls, the_func, version):  # pragma: no cover
@@ -122,6 +154,7 @@ class Pdf_gen:
         """Print the maps showing the methods"""
         pretty_print(cls._creation_map, ["Create  "], stream=stream)
         pretty_print(cls._extraction_map, ["Extract "], stream=stream)
+        pretty_print(cls._shortcut_map, ["Shortcut"], stream=stream)
         pretty_print(cls._reader_map, ["Reader  "], stream=stream)
 
     @classmethod
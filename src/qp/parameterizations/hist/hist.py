@@ -12,6 +12,8 @@ import warnings
 
 from .hist_utils import (
     evaluate_hist_x_multi_y,
+    extract_hist_from_interp,
+    extract_hist_from_mixmod,
     extract_hist_values,
     extract_hist_samples,
 )
@@ -66,6 +68,10 @@ class hist_gen(Pdf_rows_gen):
     |                        | size (int, optional, number of samples to generate) |            |
     +------------------------+-----------------------------------------------------+------------+
 
+    When no method key is given, ``interp`` and ``mixmod`` distributions are converted
+    with the shortcuts `.extract_hist_from_interp` and `.extract_hist_from_mixmod`,
+    which give the same histograms as `.extract_hist_values` directly from their data.
+
     Implementation notes:
 
     Inside a given bin `pdf()` will return the `hist_gen.pdfs` value.
@@ -84,6 +90,8 @@ class hist_gen(Pdf_rows_gen):
     name = "hist"
     version = 0
 
+    evaluation_costs = dict(pdf=1.0, cdf=1.0, ppf=5.0, rvs=5.0)
+
     _support_mask = rv_continuous._support_mask
 
     def __init__(
@@ -331,8 +339,10 @@ class hist_gen(Pdf_rows_gen):
         Add this classes mappings to the conversion dictionary
         """
         cls._add_creation_method(cls.create, None)
-        cls._add_extraction_method(extract_hist_values, None)
-        cls._add_extraction_method(extract_hist_samples, "samples")
+        cls._add_extraction_method(extract_hist_values, None, evaluates="cdf")
+        cls._add_extraction_method(extract_hist_samples, "samples", evaluates="rvs")
+        cls._add_shortcut_method(extract_hist_from_interp, "interp", cost=0.3)
+        cls._add_shortcut_method(extract_hist_from_mixmod, "mixmod", cost=1.0)
 
     @classmethod
     def create_ensemble(
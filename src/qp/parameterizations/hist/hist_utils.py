@@ -1,9 +1,12 @@
 from __future__ import annotations  # for autodoc type annotations
 import numpy as np
 
+from scipy.special import ndtr
+
 from ...utils.array import (
     get_bin_indices,
     get_eval_case,
+    histogram_rows,
     CASE_PRODUCT,
     CASE_FACTOR,
     CASE_2D,
@@ -12,6 +15,9 @@ from typing import Any
 
 from numpy.typing import ArrayLike
 
+# Maximum number of component cdf values evaluated at once in extract_hist_from_mixmod
+MIXMOD_CDF_BLOCK_SIZE = 1_000_000
+
 
 #
 # PDF evaluation functions
@@ -223,12 +229,94 @@ def extract_hist_samples(in_dist: "Ensemble", **kwargs) -> dict[str, Any]:
     if bins is None:  # pragma: no cover
         raise ValueError("To convert using extract_hist_samples you must specify bins")
     samples = in_dist.rvs(size=size)
+    pdfs = histogram_rows(np.reshape(samples, (-1, size)), bins)
+    return dict(bins=bins, pdfs=pdfs)
 
-    def hist_helper(sample):
-        return np.histogram(sample, bins=bins)[0]
 
-    vv = np.vectorize(
-        hist_helper, signature="(%i)->(%i)" % (samples.shape[0], bins.size - 1)
-    )
-    pdfs = vv(samples)
-    return dict(bins=bins, pdfs=pdfs)
+def extract_hist_from_interp(in_dist: "Ensemble", **kwargs) -> dict[str, Any]:
+    """Convert an interp Ensemble to a histogram from the cumulative trapezoid
+    sums of its values, without evaluating the CDF through the distributions.
+
+    The CDF of each distribution is interpolated at the bin edges from the same
+    cumulative sums that `interp_gen` uses, with the interpolation weights
+    shared by all the rows, so this gives the same histograms as
+    `extract_hist_values`.
+
+    Parameters
+    ----------
+    in_dist : Ensemble
+        Input Ensemble of interp distributions
+
+    Other Parameters
+    ----------------
+    bins : np.ndarray[float]
+        The bin edges for the new histogram, by default the ``xvals`` of ``in_dist``
+
+    Returns
+    -------
+    data : dict[str, Any]
+        The extracted data
+    """
+    xvals = np.asarray(in_dist.metadata["xvals"], dtype=float).ravel()
+    yvals = np.reshape(in_dist.objdata["yvals"], (-1, xvals.size))
+    bins = kwargs.pop("bins", None)
+    bins = xvals if bins is None else np.asarray(bins, dtype=float)
+
+    steps = np.diff(xvals)
+    ycumul = np.empty(yvals.shape)
+    ycumul[:, 0] = 0.5 * yvals[:, 0] * steps[0]
+    ycumul[:, 1:] = np.cumsum(steps * 0.5 * (yvals[:, 1:] + yvals[:, :-1]), axis=1)
+
+    # linear interpolation between the grid points on either side of each edge
+    hi = np.searchsorted(xvals, bins, side="left").clip(1, xvals.size - 1)
+    lo = hi - 1
+    frac = (bins - xvals[lo]) / (xvals[hi] - xvals[lo])
+    cdfs = ycumul[:, lo] + (ycumul[:, hi] - ycumul[:, lo]) * frac
+    cdfs[:, bins < xvals[0]] = 0.0
+    cdfs[:, bins > xvals[-1]] = 1.0
+    return dict(bins=bins, pdfs=np.diff(cdfs, axis=1))
+
+
+def extract_hist_from_mixmod(in_dist: "Ensemble", **kwargs) -> dict[str, Any]:
+    """Convert a mixmod Ensemble to a histogram from the closed form CDF of the
+    Gaussian components at the bin edges.
+
+    This gives the same histograms as `extract_hist_values`, evaluating all the
+    components of a block of rows at once instead of going through the
+    distributions.
+
+    Parameters
+    ----------
+    in_dist : Ensemble
+        Input Ensemble of mixmod distributions
+
+    Other Parameters
+    ----------------
+    bins : np.ndarray[float]
+        The bin edges for the new histogram
+
+    Returns
+    -------
+    data : dict[str, Any]
+        The extracted data
+    """
+    bins = kwargs.pop("bins", None)
+    if bins is None:  # pragma: no cover
+        raise ValueError(
+            "To convert using extract_hist_from_mixmod you must specify bins"
+        )
+    bins = np.asarray(bins, dtype=float)
+    weights = np.atleast_2d(in_dist.objdata["weights"])
+    means = np.atleast_2d(in_dist.objdata["means"])
+    stds = np.atleast_2d(in_dist.objdata["stds"])
+    npdf, ncomp = weights.shape
+
+    cdfs = np.empty((npdf, bins.size))
+    block_size = max(1, MIXMOD_CDF_BLOCK_SIZE // (ncomp * bins.size))
+    for start in range(0, npdf, block_size):
+        block = slice(start, start + block_size)
+        comp_cdfs = ndtr(
+            (bins - means[block, :, np.newaxis]) / stds[block, :, np.newaxis]
+        )
+        cdfs[block] = np.einsum("ij,ijk->ik", weights[block], comp_cdfs)
+    return dict(bins=bins, pdfs=np.diff(cdfs, axis=1))
@@ -10,6 +10,7 @@ import warnings
 from .interp_utils import (
     irreg_interp_extract_xy_vals,
     extract_vals_at_x,
+    extract_vals_from_hist,
     extract_xy_sparse,
 )
 from ...core.factory import add_class
@@ -60,6 +61,10 @@ class interp_gen(Pdf_rows_gen):
     | `.extract_vals_at_x`| xvals     | None       |
     +---------------------+-----------+------------+
 
+    When no method key is given, ``hist`` distributions are converted with the shortcut
+    `.extract_vals_from_hist`, which looks up the bin values directly, and uses the
+    bin centers if ``xvals`` is not given.
+
     Implementation notes:
 
     This uses the same xvals for all the the PDFs, unlike `interp_irregular_gen` which
@@ -86,6 +91,8 @@ class interp_gen(Pdf_rows_gen):
     name = "interp"
     version = 0
 
+    evaluation_costs = dict(pdf=1.0, cdf=1.0, ppf=5.0, rvs=5.0)
+
     _support_mask = rv_continuous._support_mask
 
     def __init__(
@@ -343,6 +350,7 @@ class interp_gen(Pdf_rows_gen):
         """
         cls._add_creation_method(cls.create, None)
         cls._add_extraction_method(extract_vals_at_x, None)
+        cls._add_shortcut_method(extract_vals_from_hist, "hist", cost=0.05)
 
     @classmethod
     def create_ensemble(
@@ -459,6 +467,8 @@ class interp_irregular_gen(Pdf_rows_gen):
     name = "interp_irregular"
     version = 0
 
+    evaluation_costs = dict(pdf=1.0, cdf=1.0, ppf=5.0, rvs=5.0)
+
     _support_mask = rv_continuous._support_mask
 
     def __init__(
@@ -5,6 +5,7 @@ import numpy as np
 from scipy import integrate as sciint
 from scipy import interpolate as sciinterp
 
+from ...utils.array import get_bin_indices
 from ...utils.conversion import extract_xy_vals
 from ..sparse_interp.sparse_rep import (
     build_sparse_representation,
@@ -61,6 +62,39 @@ def extract_vals_at_x(in_dist: "Ensemble", **kwargs) -> dict[str, np.ndarray[flo
     return dict(xvals=xvals, yvals=yvals)
 
 
+def extract_vals_from_hist(
+    in_dist: "Ensemble", **kwargs
+) -> dict[str, np.ndarray[float]]:
+    """Convert a hist Ensemble by looking up the bin values directly, without
+    evaluating the pdf through the distributions.
+
+    This gives the same values as `extract_vals_at_x`. If ``xvals`` is not given,
+    the bin centers are used, and the values are the bin values themselves.
+
+    Parameters
+    ----------
+    in_dist : Ensemble
+        Input Ensemble of hist distributions
+
+    Other Parameters
+    ----------------
+    xvals : np.ndarray[float]
+        Locations at which the pdf is evaluated, by default the bin centers of ``in_dist``
+
+    Returns
+    -------
+    data : dict[str, np.ndarray[float]]
+        The extracted data
+    """
+    bins = np.asarray(in_dist.metadata["bins"], dtype=float).ravel()
+    pdfs = np.reshape(in_dist.objdata["pdfs"], (-1, bins.size - 1))
+    xvals = kwargs.pop("xvals", None)
+    if xvals is None:
+        return dict(xvals=0.5 * (bins[1:] + bins[:-1]), yvals=np.array(pdfs))
+    idx, mask = get_bin_indices(bins, np.asarray(xvals))
+    return dict(xvals=xvals, yvals=np.where(mask, pdfs[:, idx], 0.0))
+
+
 def extract_xy_sparse(
     in_dist: "Ensemble", **kwargs
 ) -> dict[str, Any]:  # pragma: no cover
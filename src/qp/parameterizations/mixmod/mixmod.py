@@ -8,11 +8,10 @@ from typing import Mapping, Optional
 from numpy.typing import ArrayLike
 import warnings
 
-from .mixmod_utils import extract_mixmod_fit_samples
+from .mixmod_utils import extract_mixmod_fit_grid, extract_mixmod_fit_samples
 from ...core.factory import add_class
 from ..base import Pdf_rows_gen
 from ...utils.array import (
-    get_eval_case,
     reshape_to_pdf_size,
 )
 from ...utils.interpolation import interpolate_multi_x_y
@@ -57,7 +56,11 @@ class mixmod_gen(Pdf_rows_gen):
     +------------------------------+--------------------------------------------+------------+
     | Function                     | Arguments                                  | Method key |
     +------------------------------+--------------------------------------------+------------+
-    |`.extract_mixmod_fit_samples` | ncomps=3, nsamples=1000, random_state=None | None       |
+    |`.extract_mixmod_fit_samples` | ncomps=3, nsamples=1000, random_state=None,| None       |
+    |                              | max_iter=100, tol=1e-3                     |            |
+    +------------------------------+--------------------------------------------+------------+
+    |`.extract_mixmod_fit_grid`    | ncomps=3, xvals=None, max_iter=100,        | grid       |
+    |                              | tol=1e-3                                   |            |
     +------------------------------+--------------------------------------------+------------+
 
     Implementation Notes:
@@ -78,6 +81,8 @@ class mixmod_gen(Pdf_rows_gen):
     name = "mixmod"
     version = 0
 
+    evaluation_costs = dict(pdf=3.0, cdf=3.0, ppf=13.0, rvs=13.0)
+
     _support_mask = rv_continuous._support_mask
 
     def __init__(
@@ -250,17 +255,16 @@ class mixmod_gen(Pdf_rows_gen):
         min_val = np.min(self._means - 6 * self._stds)
         max_val = np.max(self._means + 6 * self._stds)
         grid = np.linspace(min_val, max_val, 201)
-        case_idx, _, rr = get_eval_case(x, row)
-        if case_idx == 1:
-            cdf_vals = self.cdf(grid, rr)
-        elif case_idx == 3:
-            cdf_vals = self.cdf(grid, np.expand_dims(rr, -1))
-        else:  # pragma: no cover
-            raise ValueError(
-                f"Oops, we can't handle this kind of input to mixmod._ppf {case_idx}"
-            )
+        # only tabulate the CDFs of the distinct requested rows
+        rows, local_row = np.unique(row, return_inverse=True)
+        cdf_vals = self.cdf(grid, np.expand_dims(rows.astype(int), -1))
         return interpolate_multi_x_y(
-            x, row, cdf_vals, grid, bounds_error=False, fill_value=(min_val, max_val)
+            x,
+            local_row.reshape(np.shape(row)),
+            cdf_vals,
+            grid,
+            bounds_error=False,
+            fill_value=(min_val, max_val),
         ).ravel()
 
     def _updated_ctor_param(self):
@@ -321,7 +325,8 @@ class mixmod_gen(Pdf_rows_gen):
         Add this classes mappings to the conversion dictionary
         """
         cls._add_creation_method(cls.create, None)
-        cls._add_extraction_method(extract_mixmod_fit_samples, None)
+        cls._add_extraction_method(extract_mixmod_fit_samples, None, evaluates="rvs")
+        cls._add_extraction_method(extract_mixmod_fit_grid, "grid")
 
     @classmethod
     def create_ensemble(
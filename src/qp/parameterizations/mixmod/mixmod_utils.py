@@ -1,8 +1,185 @@
 from __future__ import annotations
 
 import numpy as np
+from numpy.typing import ArrayLike
 
-from ...core.lazy_modules import mixture
+
+def _weighted_quantiles(
+    x: np.ndarray, weights: np.ndarray, quants: np.ndarray
+) -> np.ndarray:
+    """Return the given quantiles of each row of values, with a weight for each value
+
+    Parameters
+    ----------
+    x : np.ndarray
+        The values, with shape (nrow, n)
+    weights : np.ndarray
+        The weights of the values, normalized to sum to 1 on each row, with shape (nrow, n)
+    quants : np.ndarray
+        The quantiles to compute
+
+    Returns
+    -------
+    np.ndarray
+        The quantiles of each row, with shape (nrow, len(quants))
+    """
+    order = np.argsort(x, axis=1)
+    x_sorted = np.take_along_axis(x, order, axis=1)
+    cumul = np.cumsum(np.take_along_axis(weights, order, axis=1), axis=1)
+    idx = np.sum(cumul[:, :, np.newaxis] < quants, axis=1)
+    return np.take_along_axis(x_sorted, np.minimum(idx, x.shape[1] - 1), axis=1)
+
+
+def _fit_gaussian_mixture_rows(
+    x: np.ndarray,
+    weights: np.ndarray,
+    ncomps: int,
+    max_iter: int,
+    tol: float,
+    reg_var: float,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Run EM on a batch of rows, see `fit_gaussian_mixtures`"""
+    nrow = x.shape[0]
+
+    # deterministic initialization: the means at evenly spaced quantiles of each
+    # row, equal weights, and the width of each row divided among the components
+    means = _weighted_quantiles(x, weights, (np.arange(ncomps) + 0.5) / ncomps)
+    row_mean = np.sum(weights * x, axis=1, keepdims=True)
+    row_var = np.sum(weights * (x - row_mean) ** 2, axis=1, keepdims=True)
+    variances = np.repeat(row_var / ncomps**2 + reg_var, ncomps, axis=1)
+    comp_weights = np.full((nrow, ncomps), 1.0 / ncomps)
+
+    active = np.arange(nrow)
+    prev_ll = np.full(nrow, -np.inf)
+    for _ in range(max_iter):
+        # the components are along axis 1 and the values along axis 2, so that
+        # the sums over the values run over contiguous memory
+        xa = x[active][:, np.newaxis, :]
+        wa = weights[active][:, np.newaxis, :]
+        va = variances[active][:, :, np.newaxis]
+
+        # E-step: log of the weighted density of each component at each value
+        log_prob = (
+            np.log(comp_weights[active]) - 0.5 * np.log(2.0 * np.pi * variances[active])
+        )[:, :, np.newaxis] - 0.5 * (xa - means[active][:, :, np.newaxis]) ** 2 / va
+        max_log_prob = np.max(log_prob, axis=1, keepdims=True)
+        prob = np.exp(log_prob - max_log_prob)
+        norm = np.sum(prob, axis=1, keepdims=True)
+        resp = prob * (wa / norm)
+        mean_ll = np.sum(wa[:, 0] * (np.log(norm[:, 0]) + max_log_prob[:, 0]), axis=1)
+
+        # M-step, keeping the previous parameters of components that lost all their weight
+        comp_sum = np.sum(resp, axis=2)
+        has_weight = comp_sum > 10 * np.finfo(float).eps
+        safe_sum = np.where(has_weight, comp_sum, 1.0)
+        new_means = np.sum(resp * xa, axis=2) / safe_sum
+        new_vars = (
+            np.sum(resp * (xa - new_means[:, :, np.newaxis]) ** 2, axis=2) / safe_sum
+            + reg_var
+        )
+        means[active] = np.where(has_weight, new_means, means[active])
+        variances[active] = np.where(has_weight, new_vars, variances[active])
+        comp_weights[active] = comp_sum / np.sum(comp_sum, axis=1, keepdims=True)
+
+        # rows stop as soon as their mean log-likelihood stops improving
+        converged = np.abs(mean_ll - prev_ll[active]) < tol
+        prev_ll[active] = mean_ll
+        active = active[~converged]
+        if active.size == 0:
+            break
+
+    # order the components by their means, so that the result does not depend
+    # on the order in which they were found
+    order = np.argsort(means, axis=1)
+    return (
+        np.take_along_axis(comp_weights, order, axis=1),
+        np.take_along_axis(means, order, axis=1),
+        np.sqrt(np.take_along_axis(variances, order, axis=1)),
+    )
+
+
+def fit_gaussian_mixtures(
+    x: ArrayLike,
+    ncomps: int = 3,
+    sample_weights: ArrayLike | None = None,
+    max_iter: int = 100,
+    tol: float = 1e-3,
+    reg_var: float = 1e-6,
+    batch_size: int = 256,
+) -> dict[str, np.ndarray[float]]:
+    """Fit a one dimensional Gaussian mixture model to each row of values with EM,
+    updating the models of all the rows of a batch together.
+
+    The means are initialized at evenly spaced quantiles of the values of each row,
+    so that the fit is deterministic. Each row stops iterating as soon as the change
+    of its mean log-likelihood is below ``tol``.
+
+    Parameters
+    ----------
+    x : ArrayLike
+        The values, either with shape (npdf, n), or with shape (n,) if all the rows
+        share the same values (e.g. a grid) and only ``sample_weights`` differ.
+    ncomps : int, optional
+        Number of components in each mixture model, by default 3
+    sample_weights : ArrayLike | None, optional
+        The weights of the values, with shape (npdf, n), by default None, which
+        gives the same weight to all the values of a row
+    max_iter : int, optional
+        The maximum number of EM iterations, by default 100
+    tol : float, optional
+        The convergence threshold on the mean log-likelihood, by default 1e-3
+    reg_var : float, optional
+        Added to the variances of the components to keep them positive, by default 1e-6
+    batch_size : int, optional
+        The number of rows fitted together, which bounds the memory used to
+        ``batch_size * n * ncomps`` values, by default 256
+
+    Returns
+    -------
+    dict[str, np.ndarray[float]]
+        The ``weights``, ``means`` and ``stds`` of the components, with shape (npdf, ncomps),
+        with the components of each row ordered by their means
+
+    Raises
+    ------
+    ValueError
+        Raised if the ``sample_weights`` of a row do not sum to a positive value,
+        e.g. for a pdf that is zero everywhere on the grid, as it can not be fit.
+    """
+    x = np.asarray(x, dtype=float)
+    if sample_weights is None:
+        x = np.atleast_2d(x)
+        sample_weights = np.ones(x.shape)
+    sample_weights = np.atleast_2d(np.asarray(sample_weights, dtype=float))
+    x = np.broadcast_to(x, sample_weights.shape)
+    npdf = x.shape[0]
+
+    weight_sums = np.sum(sample_weights, axis=1)
+    bad_rows = np.flatnonzero(~(weight_sums > 0))
+    if bad_rows.size:
+        raise ValueError(
+            f"The sample weights of {bad_rows.size} rows do not sum to a positive "
+            f"value, so they can not be fit, e.g. rows {bad_rows[:10].tolist()}"
+        )
+
+    weights = np.zeros((npdf, ncomps))
+    means = np.zeros((npdf, ncomps))
+    stds = np.zeros((npdf, ncomps))
+    for start in range(0, npdf, batch_size):
+        end = min(start + batch_size, npdf)
+        batch_weights = sample_weights[start:end]
+        batch_weights = batch_weights / weight_sums[start:end, np.newaxis]
+        weights[start:end], means[start:end], stds[start:end] = (
+            _fit_gaussian_mixture_rows(
+                np.array(x[start:end]),
+                batch_weights,
+                ncomps,
+                max_iter,
+                tol,
+                reg_var,
+            )
+        )
+    return dict(weights=weights, means=means, stds=stds)
 
 
 def extract_mixmod_fit_samples(
@@ -10,6 +187,9 @@ def extract_mixmod_fit_samples(
 ) -> dict[str, np.ndarray[float]]:
     """Convert to a mixture model using a set of values sampled from the pdf
 
+    The mixture models of all the distributions are fit together with
+    `fit_gaussian_mixtures`.
+
     Parameters
     ----------
     in_dist : Ensemble
@@ -23,6 +203,10 @@ def extract_mixmod_fit_samples(
         Number of samples to generate
     random_state : int
         Used to reproducibly generate random variate from in_dist
+    max_iter : int
+        The maximum number of EM iterations
+    tol : float
+        The convergence threshold of the EM iterations
 
     Returns
     -------
@@ -32,19 +216,102 @@ def extract_mixmod_fit_samples(
     n_comps = kwargs.pop("ncomps", 3)
     n_sample = kwargs.pop("nsamples", 1000)
     random_state = kwargs.pop("random_state", None)
+    max_iter = kwargs.pop("max_iter", 100)
+    tol = kwargs.pop("tol", 1e-3)
     samples = in_dist.rvs(size=n_sample, random_state=random_state)
 
-    def mixmod_helper(samps):
-        estimator = mixture.GaussianMixture(n_components=n_comps)
-        estimator.fit(samps.reshape(-1, 1))
-        weights = estimator.weights_
-        means = estimator.means_[:, 0]
-        stdevs = np.sqrt(estimator.covariances_[:, 0, 0])
-        ov = np.vstack([weights, means, stdevs])
-        return ov
-
-    vv = np.vectorize(mixmod_helper, signature="(%i)->(3,%i)" % (n_sample, n_comps))
-    fit_vals = vv(samples)
-    return dict(
-        weights=fit_vals[:, 0, :], means=fit_vals[:, 1, :], stds=fit_vals[:, 2, :]
+    return fit_gaussian_mixtures(
+        np.reshape(samples, (-1, n_sample)),
+        ncomps=n_comps,
+        max_iter=max_iter,
+        tol=tol,
+    )
+
+
+def extract_mixmod_fit_grid(
+    in_dist: "Ensemble", **kwargs
+) -> dict[str, np.ndarray[float]]:
+    """Convert to a mixture model by fitting it directly to the tabulated pdf values
+
+    The values of the pdf, weighted by the width of the grid around each point, are
+    used as the weights of a weighted EM fit on the grid points, see
+    `fit_gaussian_mixtures`. This does not sample the distributions, so the
+    conversion is deterministic.
+
+    For ``hist`` distributions the grid is the bin centers, and the variance of a
+    uniform distribution across the bins (Sheppard's correction) is added back to
+    the components. For ``interp`` distributions the grid is the ``xvals``. Other
+    distributions are evaluated on ``xvals``, which must then be given.
+
+    Parameters
+    ----------
+    in_dist : Ensemble
+        Input distributions
+
+    Other Parameters
+    ----------------
+    ncomps : int
+        Number of components in mixture model to use
+    xvals : ArrayLike
+        Locations at which the pdf is evaluated, required unless ``in_dist``
+        is a ``hist`` or ``interp`` Ensemble
+    max_iter : int
+        The maximum number of EM iterations
+    tol : float
+        The convergence threshold of the EM iterations
+
+    Returns
+    -------
+    data : dict[str, np.ndarray[float]]
+        The extracted data
+
+    Raises
+    ------
+    ValueError
+        Raised if ``xvals`` is not given and ``in_dist`` is not a ``hist`` or ``interp`` Ensemble
+    """
+    n_comps = kwargs.pop("ncomps", 3)
+    xvals = kwargs.pop("xvals", None)
+    max_iter = kwargs.pop("max_iter", 100)
+    tol = kwargs.pop("tol", 1e-3)
+
+    bin_widths = None
+    bin_variance = None
+    if xvals is not None:
+        xvals = np.asarray(xvals, dtype=float)
+        pdfs = np.reshape(in_dist.pdf(xvals), (-1, xvals.size))
+    elif in_dist.gen_class.name == "hist":
+        bins = np.asarray(in_dist.metadata["bins"], dtype=float).ravel()
+        bin_widths = np.diff(bins)
+        bin_variance = bin_widths**2 / 12.0
+        xvals = 0.5 * (bins[1:] + bins[:-1])
+        pdfs = np.reshape(in_dist.objdata["pdfs"], (-1, xvals.size))
+    elif in_dist.gen_class.name == "interp":
+        xvals = np.asarray(in_dist.metadata["xvals"], dtype=float).ravel()
+        pdfs = np.reshape(in_dist.objdata["yvals"], (-1, xvals.size))
+    else:
+        raise ValueError(
+            "To convert using extract_mixmod_fit_grid you must specify xvals, "
+            "unless converting from a hist or interp Ensemble"
+        )
+
+    if bin_widths is None:
+        # trapezoid rule weights of the grid points
+        steps = np.diff(xvals)
+        bin_widths = 0.5 * (np.append(steps, 0.0) + np.insert(steps, 0, 0.0))
+    sample_weights = np.clip(pdfs, 0.0, None) * bin_widths
+
+    fit = fit_gaussian_mixtures(
+        xvals,
+        ncomps=n_comps,
+        sample_weights=sample_weights,
+        max_iter=max_iter,
+        tol=tol,
     )
+    if bin_variance is not None:
+        # the EM only sees the bin centers, add back the spread within the bins
+        spread = np.sum(sample_weights * bin_variance, axis=1) / np.sum(
+            sample_weights, axis=1
+        )
+        fit["stds"] = np.sqrt(fit["stds"] ** 2 + spread[:, np.newaxis])
+    return fit
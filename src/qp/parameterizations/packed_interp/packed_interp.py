@@ -8,12 +8,15 @@ from numpy.typing import ArrayLike
 
 from ...core.factory import add_class
 from ...core.ensemble import Ensemble
-from .packing_utils import PackingType, pack_array, unpack_array
+from .packing_utils import PackingType, pack_array, packing_dtype, unpack_array
 from ..base import Pdf_rows_gen
 from ...plotting import get_axes_and_xlims, plot_pdf_on_axes
-from ...utils.array import reshape_to_pdf_size
+from ...utils.array import get_eval_case, reshape_to_pdf_size
 from ...utils.interpolation import interpolate_multi_x_y, interpolate_x_multi_y
 
+# Maximum number of values unpacked at once when looping over all the rows
+UNPACK_BLOCK_SIZE = 1_000_000
+
 
 def extract_and_pack_vals_at_x(in_dist: "Ensemble", **kwargs):
     """Convert using a set of x and packed y values
@@ -64,6 +67,8 @@ class packed_interp_gen(Pdf_rows_gen):  # pylint: disable=too-many-instance-attr
     name = "packed_interp"
     version = 0
 
+    evaluation_costs = dict(pdf=1.0, cdf=1.0, ppf=5.0, rvs=5.0)
+
     _support_mask = rv_continuous._support_mask
 
     def __init__(
@@ -88,7 +93,8 @@ class packed_interp_gen(Pdf_rows_gen):  # pylint: disable=too-many-instance-attr
         ymax : ArrayLike
           The maximum y-values for each pdf
         packing_type: PackingType
-            By default `PackingType.linear_from_rowmax`
+            By default `PackingType.linear_from_rowmax`, the ``_16`` packing types
+            store the values as 16 bit integers
         log_floor: float
             By default -3
         """
@@ -104,7 +110,6 @@ class packed_interp_gen(Pdf_rows_gen):  # pylint: disable=too-many-instance-attr
         self._xmax = self._xvals[-1]
         # kwargs["shape"] = np.shape(ypacked)[:-1]
 
-        self._yvals = None
         if isinstance(packing_type, PackingType):
             self._packing_type = packing_type.value
         else:
@@ -114,13 +119,18 @@ class packed_interp_gen(Pdf_rows_gen):  # pylint: disable=too-many-instance-attr
         self._ypacked = reshape_to_pdf_size(ypacked, -1)
         kwargs["shape"] = np.shape(self._ypacked)
 
+        # only the packed values are kept, with the integral of each row that
+        # normalizes the pdfs, the rows are unpacked when they are evaluated
         check_input = kwargs.pop("check_input", True)
         if check_input:
-            self._compute_ycumul()
-            self._yvals = (self._yvals.T / self._ycumul[:, -1]).T
-            self._ycumul = (self._ycumul.T / self._ycumul[:, -1]).T
+            self._norms = np.concatenate(
+                [
+                    self._integrate_rows(self._unpack_rows(rows))[:, -1]
+                    for rows in self._row_blocks()
+                ]
+            )
         else:  # pragma: no cover
-            self._ycumul = None
+            self._norms = np.ones(self._ypacked.shape[0])
 
         super().__init__(*args, **kwargs)
         self._addmetadata("xvals", self._xvals)
@@ -129,26 +139,46 @@ class packed_interp_gen(Pdf_rows_gen):  # pylint: disable=too-many-instance-attr
         self._addobjdata("ypacked", self._ypacked)
         self._addobjdata("ymax", self._ymax)
 
-    def _compute_ycumul(self):
-        if self._yvals is None:
-            self._unpack()
-        copy_shape = np.array(self._yvals.shape)
-        self._ycumul = np.ndarray(copy_shape)
-        self._ycumul[:, 0] = 0.5 * self._yvals[:, 0] * (self._xvals[1] - self._xvals[0])
-        self._ycumul[:, 1:] = np.cumsum(
+    def _row_blocks(self):
+        """Return the rows in blocks of at most UNPACK_BLOCK_SIZE values"""
+        n_rows = self._ypacked.shape[0]
+        block_rows = max(1, UNPACK_BLOCK_SIZE // max(1, self._xvals.size))
+        return [
+            np.arange(start, min(start + block_rows, n_rows))
+            for start in range(0, n_rows, block_rows)
+        ]
+
+    def _dequantize(self, packed, rows):
+        """Unpack the packed values of the given rows, which have the same shape"""
+        return unpack_array(
+            PackingType(self._packing_type),
+            packed,
+            row_max=self._ymax[rows, 0],
+            log_floor=self._log_floor,
+        )
+
+    def _unpack_rows(self, rows):
+        """Return the unpacked y-values of the given rows, before normalization"""
+        return self._dequantize(self._ypacked[rows], rows[:, np.newaxis])
+
+    def _integrate_rows(self, yvals):
+        """Return the cumulative integral of each row of y-values at the xvals"""
+        ycumul = np.empty(yvals.shape)
+        ycumul[:, 0] = 0.5 * yvals[:, 0] * (self._xvals[1] - self._xvals[0])
+        ycumul[:, 1:] = np.cumsum(
             (self._xvals[1:] - self._xvals[:-1])
             * 0.5
-            * np.add(self._yvals[:, 1:], self._yvals[:, :-1]),
+            * np.add(yvals[:, 1:], yvals[:, :-1]),
             axis=1,
         )
+        return ycumul
 
-    def _unpack(self):
-        self._yvals = unpack_array(
-            PackingType(self._packing_type),
-            self._ypacked,
-            row_max=self._ymax,
-            log_floor=self._log_floor,
-        )
+    def _requested_cumul(self, row):
+        """Return the normalized cumulative integrals of the distinct requested rows,
+        and the positions of the requested rows in them"""
+        rows, local_row = np.unique(row, return_inverse=True)
+        ycumul = self._integrate_rows(self._unpack_rows(rows))
+        return ycumul / self._norms[rows, np.newaxis], local_row.reshape(np.shape(row))
 
     @property
     def xvals(self):
@@ -177,34 +207,40 @@ class packed_interp_gen(Pdf_rows_gen):  # pylint: disable=too-many-instance-attr
 
     @property
     def yvals(self):
-        """Return the y-valus used to do the interpolation"""
-        return self._yvals
+        """Return the y-values used to do the interpolation, which are unpacked each time"""
+        rows = np.arange(self._ypacked.shape[0])
+        return self._unpack_rows(rows) / self._norms[:, np.newaxis]
 
     def _pdf(self, x, row):
         # pylint: disable=arguments-differ
-        if self._yvals is None:  # pragma: no cover
-            self._unpack()
-        return interpolate_x_multi_y(
-            x, row, self._xvals, self._yvals, bounds_error=False, fill_value=0.0
-        ).ravel()
+        # only the packed values on each side of each x are unpacked
+        _, xx, rr = get_eval_case(x, row)
+        xx, rr = np.broadcast_arrays(xx, rr)
+        idx = np.clip(
+            np.searchsorted(self._xvals, xx, side="right") - 1, 0, self._xvals.size - 2
+        )
+        x_lo = self._xvals[idx]
+        frac = (xx - x_lo) / (self._xvals[idx + 1] - x_lo)
+        y_lo = self._dequantize(self._ypacked[rr, idx], rr)
+        y_hi = self._dequantize(self._ypacked[rr, idx + 1], rr)
+        vals = (y_lo + frac * (y_hi - y_lo)) / self._norms[rr]
+        inside = (xx >= self._xmin) & (xx <= self._xmax)
+        return np.where(inside, vals, 0.0).ravel()
 
     def _cdf(self, x, row):
         # pylint: disable=arguments-differ
-        if self._ycumul is None:  # pragma: no cover
-            self._compute_ycumul()
+        ycumul, local_row = self._requested_cumul(row)
         return interpolate_x_multi_y(
-            x, row, self._xvals, self._ycumul, bounds_error=False, fill_value=(0.0, 1.0)
+            x, local_row, self._xvals, ycumul, bounds_error=False, fill_value=(0.0, 1.0)
         ).ravel()
 
     def _ppf(self, x, row):
         # pylint: disable=arguments-differ
-        if self._ycumul is None:  # pragma: no cover
-            self._compute_ycumul()
-
+        ycumul, local_row = self._requested_cumul(row)
         return interpolate_multi_x_y(
             x,
-            row,
-            self._ycumul,
+            local_row,
+            ycumul,
             self._xvals,
             bounds_error=False,
             fill_value=(self._xmin, self._xmax),
@@ -222,9 +258,17 @@ class packed_interp_gen(Pdf_rows_gen):  # pylint: disable=too-many-instance-attr
         """Compute the mth moment"""
         m = np.asarray(m)
         dx = self._xvals[1] - self._xvals[0]
-        if self._yvals is None:  # pragma: no cover
-            self._unpack()
-        return np.sum(self._xvals**m * self._yvals, axis=1) * dx
+        x_m = self._xvals**m
+        return (
+            np.concatenate(
+                [
+                    np.sum(x_m * self._unpack_rows(rows), axis=1)
+                    for rows in self._row_blocks()
+                ]
+            )
+            / self._norms
+            * dx
+        )
 
     def _updated_ctor_param(self):
         """
@@ -260,8 +304,11 @@ class packed_interp_gen(Pdf_rows_gen):  # pylint: disable=too-many-instance-attr
         if "xvals" not in kwargs:  # pragma: no cover
             raise ValueError("required argument xvals not included in kwargs")
         ngrid = np.shape(kwargs["xvals"])[-1]
+        dtype = packing_dtype(
+            kwargs.get("packing_type", PackingType.linear_from_rowmax)
+        )
         return dict(
-            ypacked=((npdf, ngrid), "u1"),
+            ypacked=((npdf, ngrid), dtype.str),
             ymax=((npdf, 1), "f4"),
         )
 
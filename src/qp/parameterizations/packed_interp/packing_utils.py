@@ -11,10 +11,43 @@ from numpy.typing import ArrayLike
 class PackingType(enum.Enum):
     linear_from_rowmax = 0
     log_from_rowmax = 1
+    linear_from_rowmax_16 = 2
+    log_from_rowmax_16 = 3
+    asinh_from_rowmax = 4
+    asinh_from_rowmax_16 = 5
 
 
-def linear_pack_from_rowmax(input_array: ArrayLike) -> tuple[np.ndarray, np.ndarray]:
-    """Pack an array into 8bit unsigned integers, using the maximum of each row as a reference
+# The unsigned integer type used by each packing type
+PACKING_DTYPES = {
+    PackingType.linear_from_rowmax: np.uint8,
+    PackingType.log_from_rowmax: np.uint8,
+    PackingType.linear_from_rowmax_16: np.uint16,
+    PackingType.log_from_rowmax_16: np.uint16,
+    PackingType.asinh_from_rowmax: np.uint8,
+    PackingType.asinh_from_rowmax_16: np.uint16,
+}
+
+
+def packing_dtype(packing_type: PackingType) -> np.dtype:
+    """Return the unsigned integer type used by a packing type
+
+    Parameters
+    ----------
+    packing_type : PackingType
+        Enum specifying the type of packing
+
+    Returns
+    -------
+    np.dtype
+        The type of the packed values
+    """
+    return np.dtype(PACKING_DTYPES[PackingType(packing_type)])
+
+
+def linear_pack_from_rowmax(
+    input_array: ArrayLike, dtype=np.uint8
+) -> tuple[np.ndarray, np.ndarray]:
+    """Pack an array into unsigned integers, using the maximum of each row as a reference
 
     This packs the values onto a linear grid for each row, running from 0 to row_max
 
@@ -22,6 +55,8 @@ def linear_pack_from_rowmax(input_array: ArrayLike) -> tuple[np.ndarray, np.ndar
     ----------
     input_array : ArrayLike
         The values we are packing
+    dtype : optional
+        The unsigned integer type of the packed values, by default np.uint8
 
     Returns
     -------
@@ -30,14 +65,15 @@ def linear_pack_from_rowmax(input_array: ArrayLike) -> tuple[np.ndarray, np.ndar
     row_max : np.ndarray
         The max for each row, need to unpack the array
     """
+    max_code = np.iinfo(dtype).max
     row_max = np.expand_dims(input_array.max(axis=1), -1)
-    return np.round(255 * input_array / row_max).astype(np.uint8), row_max
+    return np.round(max_code * input_array / row_max).astype(dtype), row_max
 
 
 def linear_unpack_from_rowmax(
-    packed_array: ArrayLike, row_max: ArrayLike
+    packed_array: ArrayLike, row_max: ArrayLike, dtype=np.uint8
 ) -> np.ndarray[float]:
-    """Unpack an array into 8bit unsigned integers, using the maximum of each row as a reference
+    """Unpack an array from unsigned integers, using the maximum of each row as a reference
 
     Parameters
     ----------
@@ -45,6 +81,8 @@ def linear_unpack_from_rowmax(
         The packed values
     row_max : ArrayLike
         The max for each row, need to unpack the array
+    dtype : optional
+        The unsigned integer type of the packed values, by default np.uint8
 
 
     Returns
@@ -52,14 +90,14 @@ def linear_unpack_from_rowmax(
     unpacked_array : np.ndarray[float]
         The unpacked values
     """
-    unpacked_array = row_max * packed_array / 255.0
+    unpacked_array = row_max * packed_array / float(np.iinfo(dtype).max)
     return unpacked_array
 
 
 def log_pack_from_rowmax(
-    input_array: ArrayLike, log_floor: float = -3.0
+    input_array: ArrayLike, log_floor: float = -3.0, dtype=np.uint8
 ) -> tuple[np.ndarray[np.uint8], np.ndarray]:
-    """Pack an array into 8bit unsigned integers, using the maximum of each row as a reference
+    """Pack an array into unsigned integers, using the maximum of each row as a reference
 
     This packs the values onto a log grid for each row, running from row_max / 10**log_floor to row_max
 
@@ -69,6 +107,8 @@ def log_pack_from_rowmax(
         The values we are packing
     log_floor : float, optional
         The logarithmic floor used for the packing, by default -3.
+    dtype : optional
+        The unsigned integer type of the packed values, by default np.uint8
 
     Returns
     -------
@@ -77,25 +117,26 @@ def log_pack_from_rowmax(
     row_max : np.ndarray
         The max for each row, need to unpack the array
     """
+    max_code = np.iinfo(dtype).max
     neg_log_floor = -1.0 * log_floor
     epsilon = np.power(10.0, 3 * log_floor)
     row_max = np.expand_dims(input_array.max(axis=1), -1)
     return (
         np.round(
-            255
+            max_code
             * (np.log10((input_array + epsilon) / row_max) + neg_log_floor)
             / neg_log_floor
         )
-        .clip(0.0, 255.0)
-        .astype(np.uint8),
+        .clip(0.0, max_code)
+        .astype(dtype),
         row_max,
     )
 
 
 def log_unpack_from_rowmax(
-    packed_array: ArrayLike, row_max: ArrayLike, log_floor: float = -3.0
+    packed_array: ArrayLike, row_max: ArrayLike, log_floor: float = -3.0, dtype=np.uint8
 ) -> np.ndarray:
-    """Unpack an array into 8bit unsigned integers, using the maximum of each row as a reference
+    """Unpack an array from unsigned integers, using the maximum of each row as a reference
 
     Parameters
     ----------
@@ -105,6 +146,8 @@ def log_unpack_from_rowmax(
         The max for each row, need to unpack the array
     log_floor : float, optional
         The logarithmic floor used for the packing, -3 by default.
+    dtype : optional
+        The unsigned integer type of the packed values, by default np.uint8
 
     Returns
     -------
@@ -115,13 +158,87 @@ def log_unpack_from_rowmax(
     unpacked_array = row_max * np.where(
         packed_array == 0,
         0.0,
-        np.power(10, neg_log_floor * ((packed_array / 255.0) - 1.0)),
+        np.power(
+            10, neg_log_floor * ((packed_array / float(np.iinfo(dtype).max)) - 1.0)
+        ),
     )
     return unpacked_array
 
 
+def asinh_pack_from_rowmax(
+    input_array: ArrayLike, log_floor: float = -3.0, dtype=np.uint8
+) -> tuple[np.ndarray, np.ndarray]:
+    """Pack an array into unsigned integers, using the maximum of each row as a reference
+
+    This packs the values onto an inverse hyperbolic sine grid for each row, which
+    is linear for values below about row_max * 10**log_floor, and logarithmic above.
+    Unlike the log packing, this keeps zero exactly and does not cut the tails of the
+    distributions, while keeping most of the precision of the log packing around the
+    peak of each row.
+
+    Parameters
+    ----------
+    input_array : ArrayLike
+        The values we are packing
+    log_floor : float, optional
+        The log10 of the value, relative to the max of each row, at which the grid
+        changes from linear to logarithmic, by default -3.
+    dtype : optional
+        The unsigned integer type of the packed values, by default np.uint8
+
+    Returns
+    -------
+    packed_array : np.ndarray
+        The packed values
+    row_max : np.ndarray
+        The max for each row, need to unpack the array
+    """
+    max_code = np.iinfo(dtype).max
+    row_max = np.expand_dims(input_array.max(axis=1), -1)
+    scale = row_max * np.power(10.0, log_floor)
+    asinh_max = np.arcsinh(np.power(10.0, -log_floor))
+    return (
+        np.round(
+            max_code * np.arcsinh(np.clip(input_array, 0.0, None) / scale) / asinh_max
+        )
+        .clip(0.0, max_code)
+        .astype(dtype),
+        row_max,
+    )
+
+
+def asinh_unpack_from_rowmax(
+    packed_array: ArrayLike, row_max: ArrayLike, log_floor: float = -3.0, dtype=np.uint8
+) -> np.ndarray:
+    """Unpack an array from unsigned integers, using the maximum of each row as a reference
+
+    Parameters
+    ----------
+    packed_array : ArrayLike
+        The packed values
+    row_max : ArrayLike
+        The max for each row, need to unpack the array
+    log_floor : float, optional
+        The log10 of the value, relative to the max of each row, at which the grid
+        changes from linear to logarithmic, -3 by default.
+    dtype : optional
+        The unsigned integer type of the packed values, by default np.uint8
+
+    Returns
+    -------
+    unpacked_array : np.ndarray
+        The unpacked values
+    """
+    asinh_max = np.arcsinh(np.power(10.0, -log_floor))
+    return (
+        row_max
+        * np.power(10.0, log_floor)
+        * np.sinh(asinh_max * packed_array / float(np.iinfo(dtype).max))
+    )
+
+
 def pack_array(packing_type: PackingType, input_array: ArrayLike, **kwargs):
-    """Pack an array into 8bit unsigned integers
+    """Pack an array into unsigned integers
 
     Parameters
     ----------
@@ -137,18 +254,31 @@ def pack_array(packing_type: PackingType, input_array: ArrayLike, **kwargs):
     np.ndarray
         Details depend on packing type used
     """
-
-    if packing_type == PackingType.linear_from_rowmax:
-        return linear_pack_from_rowmax(input_array)
-    if packing_type == PackingType.log_from_rowmax:
-        return log_pack_from_rowmax(input_array, kwargs.get("log_floor", -3))
+    packing_type = PackingType(packing_type)
+    dtype = PACKING_DTYPES[packing_type]
+    if packing_type in (
+        PackingType.linear_from_rowmax,
+        PackingType.linear_from_rowmax_16,
+    ):
+        return linear_pack_from_rowmax(input_array, dtype=dtype)
+    if packing_type in (PackingType.log_from_rowmax, PackingType.log_from_rowmax_16):
+        return log_pack_from_rowmax(
+            input_array, kwargs.get("log_floor", -3), dtype=dtype
+        )
+    if packing_type in (
+        PackingType.asinh_from_rowmax,
+        PackingType.asinh_from_rowmax_16,
+    ):
+        return asinh_pack_from_rowmax(
+            input_array, kwargs.get("log_floor", -3), dtype=dtype
+        )
     raise ValueError(
         f"Packing for packing type {packing_type} is not implemented"
     )  # pragma: no cover
 
 
 def unpack_array(packing_type: PackingType, packed_array: ArrayLike, **kwargs):
-    """Unpack an array from 8bit unsigned integers
+    """Unpack an array from unsigned integers
 
     Parameters
     ----------
@@ -164,13 +294,31 @@ def unpack_array(packing_type: PackingType, packed_array: ArrayLike, **kwargs):
     np.ndarray
         Details depend on packing type used
     """
-    if packing_type == PackingType.linear_from_rowmax:
-        return linear_unpack_from_rowmax(packed_array, row_max=kwargs.get("row_max"))
-    if packing_type == PackingType.log_from_rowmax:
+    packing_type = PackingType(packing_type)
+    dtype = PACKING_DTYPES[packing_type]
+    if packing_type in (
+        PackingType.linear_from_rowmax,
+        PackingType.linear_from_rowmax_16,
+    ):
+        return linear_unpack_from_rowmax(
+            packed_array, row_max=kwargs.get("row_max"), dtype=dtype
+        )
+    if packing_type in (PackingType.log_from_rowmax, PackingType.log_from_rowmax_16):
         return log_unpack_from_rowmax(
             packed_array,
             row_max=kwargs.get("row_max"),
             log_floor=kwargs.get("log_floor", -3),
+            dtype=dtype,
+        )
+    if packing_type in (
+        PackingType.asinh_from_rowmax,
+        PackingType.asinh_from_rowmax_16,
+    ):
+        return asinh_unpack_from_rowmax(
+            packed_array,
+            row_max=kwargs.get("row_max"),
+            log_floor=kwargs.get("log_floor", -3),
+            dtype=dtype,
         )
     raise ValueError(
         f"Unpacking for packing type {packing_type} is not implemented"
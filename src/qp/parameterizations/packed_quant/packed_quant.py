@@ -0,0 +1,300 @@
+"""This module implements a quantile parameterization that stores the locations as packed integers"""
+
+from __future__ import annotations
+
+import numpy as np
+from typing import Mapping, Optional
+from numpy.typing import ArrayLike
+
+from ...core.factory import add_class
+from ...core.ensemble import Ensemble
+from ..quant.quant import DEFAULT_PDF_CONSTRUCTOR, quant_gen
+from .packed_quant_utils import (
+    _packed_quant_dtype,
+    extract_packed_quantiles,
+    unpack_quantile_locs,
+)
+from ...utils.array import reshape_to_pdf_size
+
+
+class packed_quant_gen(quant_gen):
+    """Quantile based distribution, where the locations of the quantiles are
+    stored as packed integers.
+
+    For each distribution this stores the first and last locations, and the
+    increments between the locations quantized onto a grid of ``2**nbits - 1``
+    steps between them, as 8 or 16 bit unsigned integers. The locations are
+    unpacked when the distributions are created, and then evaluated exactly
+    like a `quant_gen` distribution, with the same PDF constructors.
+
+    Parameters
+    ----------
+    quants : ArrayLike
+        The quantiles of the CDF, of shape n
+    loc_min : ArrayLike
+        The first location of each distribution, of shape (npdf, 1)
+    loc_max : ArrayLike
+        The last location of each distribution, of shape (npdf, 1)
+    dlocs : ArrayLike
+        The packed increments between the locations, of shape (npdf, n-1)
+    nbits : int, optional
+        The number of bits of each packed increment, 8 or 16, by default 16
+    pdf_constructor_name : str, optional
+        The constructor or interpolator to use to create the PDF, by default "piecewise_linear".
+    ensure_extent : bool, optional
+        If True, will ensure that the quants start at 0 and end at 1 by adding
+        data points at both ends until this is true. locs are extrapolated linearly
+        from input data. By default True.
+    warn : bool, optional
+        If True, raises warnings if input is not valid data (i.e. if
+        data is not finite). If False, no warnings are raised. By default True.
+
+
+    Notes
+    -----
+
+    Converting to this parameterization:
+
+    This table contains the available methods to convert to this parameterization,
+    their required arguments, and their method keys. If the key is `None`, this is
+    the default conversion method.
+
+    +----------------------------+-----------------+------------+
+    | Function                   | Arguments       | Method key |
+    +----------------------------+-----------------+------------+
+    |`.extract_packed_quantiles` | quants, nbits   | None       |
+    +----------------------------+-----------------+------------+
+
+    Implementation notes:
+
+    The packing is done by `.pack_quantile_locs`. The error on each location is at
+    most half a step of the grid, i.e. ``(loc_max - loc_min) / (2 * (2**nbits - 1))``.
+    Only the packed values are written to files, the unpacked locations are kept in
+    memory to evaluate the distributions.
+
+    See `quant_gen` for details on the evaluation of the distributions.
+
+    """
+
+    # pylint: disable=protected-access
+
+    name = "packed_quant"
+    version = 0
+
+    def __init__(
+        self,
+        quants: ArrayLike,
+        loc_min: ArrayLike,
+        loc_max: ArrayLike,
+        dlocs: ArrayLike,
+        nbits: int = 16,
+        pdf_constructor_name: str = DEFAULT_PDF_CONSTRUCTOR,
+        ensure_extent: bool = True,
+        warn: bool = True,
+        *args,
+        **kwargs,
+    ):
+        """
+        Create a new distribution using the given values
+
+        Parameters
+        ----------
+        quants : ArrayLike
+           The quantiles of the CDF, of shape n
+        loc_min : ArrayLike
+           The first location of each distribution, of shape (npdf, 1)
+        loc_max : ArrayLike
+           The last location of each distribution, of shape (npdf, 1)
+        dlocs : ArrayLike
+           The packed increments between the locations, of shape (npdf, n-1)
+        nbits : int, optional
+            The number of bits of each packed increment, 8 or 16, by default 16
+        pdf_constructor_name : str, optional
+            The constructor to use to create the PDF, by default "piecewise_linear".
+        ensure_extent : bool, optional
+            If True, will ensure that the quants start at 0 and end at 1 by adding
+            data points at both ends until this is true. locs are extrapolated linearly
+            from input data. By default True.
+        warn : bool, optional
+            If True, raises warnings if input is not valid data (i.e. if
+            data is not finite). If False, no warnings are raised. By default True.
+        """
+        self._nbits = int(np.squeeze(nbits))
+        dtype = _packed_quant_dtype(self._nbits)
+        self._packed_quants = np.asarray(quants)
+        self._loc_min = reshape_to_pdf_size(np.asarray(loc_min), -1)
+        self._loc_max = reshape_to_pdf_size(np.asarray(loc_max), -1)
+        self._dlocs = reshape_to_pdf_size(np.asarray(dlocs), -1).astype(
+            dtype, copy=False
+        )
+        if self._dlocs.shape[-1] != self._packed_quants.size - 1:  # pragma: no cover
+            raise ValueError(
+                "Number of packed increments (%i) != number of quantile values - 1 (%i)"
+                % (self._dlocs.shape[-1], self._packed_quants.size - 1)
+            )
+        locs = unpack_quantile_locs(
+            self._loc_min, self._loc_max, self._dlocs, self._nbits
+        )
+        super().__init__(
+            self._packed_quants,
+            locs,
+            pdf_constructor_name,
+            ensure_extent,
+            warn,
+            *args,
+            **kwargs,
+        )
+
+        # the quantiles are stored as given, since the packed values do not
+        # include the points added by ensure_extent
+        self._addmetadata("quants", self._packed_quants)
+        self._addmetadata("nbits", self._nbits)
+        self._clearobjdata()
+        self._addobjdata("loc_min", self._loc_min)
+        self._addobjdata("loc_max", self._loc_max)
+        self._addobjdata("dlocs", self._dlocs)
+
+    @property
+    def nbits(self) -> int:
+        """Return the number of bits of each packed increment"""
+        return self._nbits
+
+    @property
+    def dlocs(self) -> np.ndarray:
+        """Return the packed increments between the locations"""
+        return self._dlocs
+
+    def _updated_ctor_param(self):
+        """
+        Set the quants and packed locations as additional constructor arguments
+        """
+        dct = super()._updated_ctor_param()
+        dct.pop("locs")
+        dct["quants"] = self._packed_quants
+        dct["loc_min"] = self._loc_min
+        dct["loc_max"] = self._loc_max
+        dct["dlocs"] = self._dlocs
+        dct["nbits"] = self._nbits
+        return dct
+
+    @classmethod
+    def get_allocation_kwds(
+        cls, npdf, **kwargs
+    ) -> dict[str, tuple[tuple[int, int], str]]:
+        """Return the kwds necessary to create an `empty` HDF5 file with ``npdf`` entries
+        for iterative write. We only need to allocate the data columns, as
+        the metadata will be written when we finalize the file.
+
+        Parameters
+        ----------
+        npdf : int
+            Total number of distributions that will be written out
+        kwargs :
+            The keys needed to construct the shape of the data to be written.
+
+        Returns
+        -------
+        dict[str, tuple[tuple[int, int], str]]
+            A dictionary with a key for the objdata, a tuple with the shape of that data,
+            and the data type of the data as a string.
+
+        Raises
+        ------
+        ValueError
+            Raises an error if the required kwarg quants is not provided.
+        """
+        if "quants" not in kwargs:  # pragma: no cover
+            raise ValueError("required argument quants not included in kwargs")
+        nquants = np.shape(kwargs["quants"])[-1]
+        dtype = np.dtype(_packed_quant_dtype(kwargs.get("nbits", 16)))
+        return dict(
+            loc_min=((npdf, 1), "f4"),
+            loc_max=((npdf, 1), "f4"),
+            dlocs=((npdf, nquants - 1), dtype.str),
+        )
+
+    @classmethod
+    def add_mappings(cls) -> None:
+        """
+        Add this classes mappings to the conversion dictionary
+        """
+        cls._add_creation_method(cls.create, None)
+        cls._add_extraction_method(extract_packed_quantiles, None, evaluates="ppf")
+
+    @classmethod
+    def create_ensemble(
+        self,
+        quants: ArrayLike,
+        loc_min: ArrayLike,
+        loc_max: ArrayLike,
+        dlocs: ArrayLike,
+        nbits: int = 16,
+        pdf_constructor_name: str = DEFAULT_PDF_CONSTRUCTOR,
+        ensure_extent: bool = True,
+        warn: bool = True,
+        ancil: Optional[Mapping] = None,
+    ) -> Ensemble:
+        """Creates an Ensemble of distributions parameterized as quantiles, with
+        the locations stored as packed integers.
+
+        The packed values can be made from the locations with `.pack_quantile_locs`.
+
+        Parameters
+        ----------
+        quants : ArrayLike
+           The quantiles used to build the CDF, shape n
+        loc_min : ArrayLike
+           The first location of each distribution, shape (npdfs, 1)
+        loc_max : ArrayLike
+           The last location of each distribution, shape (npdfs, 1)
+        dlocs : ArrayLike
+           The packed increments between the locations, shape (npdfs, n-1)
+        nbits : int, optional
+            The number of bits of each packed increment, 8 or 16, by default 16
+        pdf_constructor_name : str, optional
+            The constructor to use to create the PDF, by default "piecewise_linear".
+        ensure_extent : bool, optional
+            If True, will ensure that the quants start at 0 and end at 1 by adding
+            data points at both ends until this is true. locs are extrapolated linearly
+            from input data. By default True.
+        warn : bool, optional
+            If True, raises warnings if input is not valid (i.e. if
+            locs are not finite values). If False, no warnings are raised.
+            By default True.
+        ancil : Optional[Mapping], optional
+            A dictionary of metadata for the distributions, where any arrays have
+            the same length as the number of distributions, by default None
+
+        Returns
+        -------
+        Ensemble
+            An Ensemble object containing all of the given distributions.
+
+        Examples
+        --------
+
+        >>> import qp
+        >>> import numpy as np
+        >>> from qp.parameterizations.packed_quant.packed_quant_utils import pack_quantile_locs
+        >>> quants = np.array([0.0001,0.25,0.5,0.75,0.9999])
+        >>> locs = np.array([[0.0001,0.1,0.3,0.5,0.75],[0.01,0.05,0.15,0.3,0.5]])
+        >>> loc_min, loc_max, dlocs = pack_quantile_locs(locs, nbits=8)
+        >>> ens = qp.packed_quant.create_ensemble(quants, loc_min, loc_max, dlocs, nbits=8)
+        """
+        data = {
+            "quants": quants,
+            "loc_min": loc_min,
+            "loc_max": loc_max,
+            "dlocs": dlocs,
+            "nbits": nbits,
+            "pdf_constructor_name": pdf_constructor_name,
+            "ensure_extent": ensure_extent,
+            "warn": warn,
+        }
+        return Ensemble(self, data, ancil)
+
+
+packed_quant = packed_quant_gen
+
+
+add_class(packed_quant_gen)
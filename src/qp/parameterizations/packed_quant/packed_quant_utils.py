@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+import numpy as np
+from numpy.typing import ArrayLike
+
+# The integer types the location codes can be stored as
+PACKED_QUANT_DTYPES = {8: np.uint8, 16: np.uint16}
+
+
+def _packed_quant_dtype(nbits: int) -> type:
+    """Return the unsigned integer type for a number of bits, see `PACKED_QUANT_DTYPES`"""
+    try:
+        return PACKED_QUANT_DTYPES[int(np.squeeze(nbits))]
+    except KeyError as err:
+        raise ValueError(
+            f"Unsupported number of bits {nbits}, use one of {list(PACKED_QUANT_DTYPES)}"
+        ) from err
+
+
+def pack_quantile_locs(
+    locs: ArrayLike, nbits: int = 16
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Pack the locations of the quantiles of each row into unsigned integers
+
+    The locations of each row are quantized onto a grid of ``2**nbits - 1`` steps
+    running from the first to the last location of the row, and the increments
+    between consecutive grid indices are stored. Since the increments are never
+    negative the unpacked locations are always monotonic, and the quantization
+    error of each location is at most half a step.
+
+    Parameters
+    ----------
+    locs : ArrayLike
+        The locations at which the quantiles are reached, with shape (npdf, n)
+    nbits : int, optional
+        The number of bits of each increment, 8 or 16, by default 16
+
+    Returns
+    -------
+    loc_min : np.ndarray
+        The first location of each row, with shape (npdf, 1)
+    loc_max : np.ndarray
+        The last location of each row, with shape (npdf, 1)
+    dlocs : np.ndarray
+        The increments between the grid indices of consecutive locations,
+        with shape (npdf, n-1)
+
+    Raises
+    ------
+    ValueError
+        Raised if the locations are not finite, or decrease along a row
+    """
+    dtype = _packed_quant_dtype(nbits)
+    max_code = np.iinfo(dtype).max
+    locs = np.atleast_2d(np.asarray(locs, dtype=float))
+    if not np.all(np.isfinite(locs)):
+        raise ValueError("Only finite quantile locations can be packed")
+    if np.any(np.diff(locs, axis=1) < 0):
+        indices = np.where(np.any(np.diff(locs, axis=1) < 0, axis=1))[0]
+        raise ValueError(
+            f"Invalid locs: \n The given data does not produce a one-to-one CDF for the distributions at the following indices: {indices}"
+        )
+
+    loc_min = locs[:, :1]
+    loc_max = locs[:, -1:]
+    loc_range = loc_max - loc_min
+    scale = np.where(loc_range > 0, max_code / np.where(loc_range > 0, loc_range, 1), 0)
+    # round the grid indices rather than the increments, so that the errors do not add up
+    codes = np.round((locs - loc_min) * scale).astype(np.int64)
+    return loc_min, loc_max, np.diff(codes, axis=1).astype(dtype)
+
+
+def unpack_quantile_locs(
+    loc_min: ArrayLike, loc_max: ArrayLike, dlocs: ArrayLike, nbits: int = 16
+) -> np.ndarray[float]:
+    """Unpack the locations of the quantiles packed by `pack_quantile_locs`
+
+    Parameters
+    ----------
+    loc_min : ArrayLike
+        The first location of each row, with shape (npdf, 1)
+    loc_max : ArrayLike
+        The last location of each row, with shape (npdf, 1)
+    dlocs : ArrayLike
+        The increments between the grid indices of consecutive locations,
+        with shape (npdf, n-1)
+    nbits : int, optional
+        The number of bits of each increment, 8 or 16, by default 16
+
+    Returns
+    -------
+    np.ndarray[float]
+        The locations at which the quantiles are reached, with shape (npdf, n)
+    """
+    max_code = np.iinfo(_packed_quant_dtype(nbits)).max
+    dlocs = np.atleast_2d(dlocs)
+    loc_min = np.reshape(loc_min, (-1, 1)).astype(float)
+    loc_max = np.reshape(loc_max, (-1, 1)).astype(float)
+    codes = np.zeros((dlocs.shape[0], dlocs.shape[1] + 1))
+    codes[:, 1:] = np.cumsum(dlocs, axis=1, dtype=np.int64)
+    return loc_min + (loc_max - loc_min) * (codes / max_code)
+
+
+def extract_packed_quantiles(
+    in_dist: "Ensemble", **kwargs
+) -> dict[str, np.ndarray[float]]:
+    """Convert using a set of quantiles, and the locations at which they are reached
+    packed with `pack_quantile_locs`
+
+    Parameters
+    ----------
+    in_dist : Ensemble
+        Input distributions
+
+    Other Parameters
+    ----------------
+    quants : np.ndarray
+        Quantile values to use, by default the quantiles of ``in_dist`` if it is
+        a ``quant`` Ensemble
+    nbits : int
+        The number of bits of each packed value, 8 or 16, by default 16
+
+    Returns
+    -------
+    data : dict[str, Any]
+        The extracted data
+
+    Raises
+    ------
+    ValueError
+        Raised if ``quants`` is not given and ``in_dist`` is not a ``quant`` Ensemble
+    """
+    quants = kwargs.pop("quants", None)
+    nbits = kwargs.pop("nbits", 16)
+    if quants is not None:
+        locs = in_dist.ppf(quants)
+    elif in_dist.gen_class.name in ("quant", "packed_quant"):
+        quants = in_dist.dist.quants
+        locs = in_dist.dist.locs
+    else:
+        raise ValueError(
+            "To convert using extract_packed_quantiles you must specify quants, "
+            "unless converting from a quant Ensemble"
+        )
+    loc_min, loc_max, dlocs = pack_quantile_locs(
+        np.reshape(locs, (-1, np.size(quants))), nbits
+    )
+    return dict(
+        quants=quants, loc_min=loc_min, loc_max=loc_max, dlocs=dlocs, nbits=nbits
+    )
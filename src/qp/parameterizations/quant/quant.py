@@ -10,7 +10,7 @@ from typing import Mapping, Optional
 from numpy.typing import ArrayLike
 import warnings
 
-from .quant_utils import extract_quantiles, pad_quantiles
+from .quant_utils import extract_quantiles, extract_quantiles_from_hist, pad_quantiles
 from ...core.factory import add_class
 from ...core.ensemble import Ensemble
 from ..base import Pdf_rows_gen
@@ -73,6 +73,9 @@ class quant_gen(Pdf_rows_gen):  # pylint: disable=too-many-instance-attributes
     |`.extract_quantiles` | quants    | None       |
     +---------------------+-----------+------------+
 
+    When no method key is given, ``hist`` distributions are converted with the shortcut
+    `.extract_quantiles_from_hist`, which inverts the CDF of the histograms exactly.
+
     Implementation notes:
 
     This implements a CDF by interpolating a set of quantile values
@@ -93,6 +96,8 @@ class quant_gen(Pdf_rows_gen):  # pylint: disable=too-many-instance-attributes
     name = "quant"
     version = 0
 
+    evaluation_costs = dict(pdf=5.0, cdf=20.0, ppf=1.0, rvs=20.0)
+
     _support_mask = rv_continuous._support_mask
 
     def __init__(
@@ -395,7 +400,8 @@ class quant_gen(Pdf_rows_gen):  # pylint: disable=too-many-instance-attributes
         Add this classes mappings to the conversion dictionary
         """
         cls._add_creation_method(cls.create, None)
-        cls._add_extraction_method(extract_quantiles, None)
+        cls._add_extraction_method(extract_quantiles, None, evaluates="ppf")
+        cls._add_shortcut_method(extract_quantiles_from_hist, "hist", cost=1.0)
 
     @classmethod
     def create_ensemble(
@@ -41,6 +41,103 @@ def extract_quantiles(in_dist: "Ensemble", **kwargs) -> dict[str, np.ndarray[flo
     return dict(quants=quants, locs=locs)
 
 
+def invert_piecewise_linear_cdfs(
+    xvals: ArrayLike, cdfs: ArrayLike, quants: ArrayLike
+) -> np.ndarray[float]:
+    """Return the locations at which piecewise linear CDFs reach the given quantiles
+
+    The CDFs are linear between the points ``(xvals, cdfs[i])``, and the same quantiles
+    are inverted for every row, so the number of points of each row below each
+    quantile is found with a single histogram of all the rows, instead of a
+    search on each row.
+
+    Parameters
+    ----------
+    xvals : ArrayLike
+        The points where the CDFs are given, of shape n
+    cdfs : ArrayLike
+        The non-decreasing CDF values of each row at ``xvals``, of shape (npdf, n)
+    quants : ArrayLike
+        The quantiles to invert, of shape nq
+
+    Returns
+    -------
+    np.ndarray[float]
+        The locations of the quantiles of each row, of shape (npdf, nq). Quantiles
+        below or above the range of a CDF are placed at the first or last of the
+        ``xvals``, while the quantiles 0 and 1 are placed at -inf and inf.
+    """
+    xvals = np.asarray(xvals, dtype=float)
+    cdfs = np.atleast_2d(cdfs)
+    quants = np.asarray(quants, dtype=float)
+    npdf, npts = cdfs.shape
+    order = np.argsort(quants)
+    sorted_quants = quants[order]
+
+    # counts[i, k] is the number of points of row i below the k-th sorted quantile
+    first_above = np.searchsorted(sorted_quants, cdfs, side="right")
+    offsets = np.arange(npdf)[:, np.newaxis] * (quants.size + 1)
+    counts = np.bincount(
+        (first_above + offsets).ravel(), minlength=npdf * (quants.size + 1)
+    )
+    counts = np.cumsum(counts.reshape(npdf, quants.size + 1), axis=1)[:, :-1]
+
+    hi = counts.clip(1, npts - 1)
+    lo = hi - 1
+    cdf_lo = np.take_along_axis(cdfs, lo, axis=1)
+    cdf_hi = np.take_along_axis(cdfs, hi, axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        locs = xvals[lo] + (sorted_quants - cdf_lo) * (xvals[hi] - xvals[lo]) / (
+            cdf_hi - cdf_lo
+        )
+    locs = np.where(sorted_quants < cdfs[:, :1], xvals[0], locs)
+    locs = np.where(sorted_quants > cdfs[:, -1:], xvals[-1], locs)
+    locs[:, sorted_quants == 0.0] = -np.inf
+    locs[:, sorted_quants == 1.0] = np.inf
+    locs[:, (sorted_quants < 0.0) | (sorted_quants > 1.0)] = np.nan
+
+    out = np.empty_like(locs)
+    out[:, order] = locs
+    return out
+
+
+def extract_quantiles_from_hist(
+    in_dist: "Ensemble", **kwargs
+) -> dict[str, np.ndarray[float]]:
+    """Convert a hist Ensemble by inverting the piecewise linear CDF of each
+    histogram exactly, without evaluating the ppf through the distributions.
+
+    This gives the same locations as `extract_quantiles`, see
+    `invert_piecewise_linear_cdfs`.
+
+    Parameters
+    ----------
+    in_dist : Ensemble
+        Input Ensemble of hist distributions
+
+    Other Parameters
+    ----------------
+    quants : np.ndarray
+        Quantile values to use
+
+    Returns
+    -------
+    data : dict[str, Any]
+        The extracted data
+    """
+    quants = kwargs.pop("quants", None)
+    if quants is None:  # pragma: no cover
+        raise ValueError(
+            "To convert using extract_quantiles_from_hist you must specify quants"
+        )
+    bins = np.asarray(in_dist.metadata["bins"], dtype=float).ravel()
+    pdfs = np.reshape(in_dist.objdata["pdfs"], (-1, bins.size - 1))
+    cdfs = np.zeros((pdfs.shape[0], bins.size))
+    cdfs[:, 1:] = np.cumsum(pdfs * np.diff(bins), axis=1)
+    locs = invert_piecewise_linear_cdfs(bins, cdfs, quants)
+    return dict(quants=quants, locs=locs)
+
+
 # Creation functions
 
 
@@ -2,12 +2,9 @@
 
 from __future__ import annotations
 
-import os
-import sys
 import numpy as np
 from scipy.stats import rv_continuous
 from scipy import integrate as sciint
-from scipy import interpolate as sciinterp
 from typing import Mapping, Optional
 from numpy.typing import ArrayLike
 
@@ -15,13 +12,20 @@ from . import sparse_rep
 from ...core.factory import add_class
 from ...core.ensemble import Ensemble
 from ..interp.interp import interp_gen
+from ...utils.array import reshape_to_pdf_size
+from ...utils.interpolation import interpolate_multi_x_y, interpolate_x_multi_y
 from .sparse_utils import extract_sparse_from_xy
 
 
 class sparse_gen(interp_gen):
     """Sparse based distribution. The final behavior is similar to interp_gen, but the constructor
     takes a sparse representation to build the interpolator.
-    Attempt to inherit from interp_gen : this is failing
+
+    The pdfs are not expanded on the x values when the distribution is built.
+    Only the decoded basis indices and weights are kept, with the Voigt basis that
+    is shared by all the distributions (see `sparse_rep.create_basis`), and the pdf,
+    cdf and ppf only sum the weighted basis of the requested rows. The ``yvals`` of
+    all the distributions are only computed if they are asked for.
 
     Notes
     -----
@@ -40,44 +44,139 @@ class sparse_gen(interp_gen):
         self, xvals, mu, sig, dims, sparse_indices, *args, **kwargs
     ):  # pylint: disable=too-many-arguments
         self.sparse_indices = sparse_indices
-        self._xvals = xvals
+        self._xvals = np.asarray(xvals)
         self.mu = mu
         self.sig = sig
         self.dims = dims
         cut = kwargs.pop("cut", 1.0e-5)
-        # recreate the basis array from the metadata
-        sparse_meta = dict(xvals=xvals, mu=mu, sig=sig, dims=dims)
-        A = sparse_rep.create_basis(sparse_meta, cut=cut)
+        # the pdfs are always normalized, and are not checked as they are not expanded
+        kwargs.pop("norm", None)
+        kwargs.pop("warn", None)
+        self._norm = True
+        self._warn = False
+        self._sparse_meta = dict(xvals=self._xvals, mu=mu, sig=sig, dims=dims)
+        self._cut = cut
+        self._basis = sparse_rep.create_basis(self._sparse_meta, cut=cut)
         # decode the sparse indices into basis indices and weights
-        basis_indices, weights = sparse_rep.decode_sparse_indices(sparse_indices)
-        # retrieve the weighted array of basis functions for each object
-        pdf_y = A[:, basis_indices] * weights
-        # normalize and sum the weighted pdfs
-        x = sparse_meta["xvals"]
-        y = pdf_y.sum(axis=-1)
-        norms = sciint.trapezoid(y.T, x)
-        y /= norms
-        kwargs.setdefault("xvals", x)
-        kwargs.setdefault("yvals", y.T)
-        super().__init__(*args, **kwargs)
-
-        self._clearobjdata()
+        basis_indices, weights = sparse_rep.decode_sparse_indices(
+            reshape_to_pdf_size(np.asarray(sparse_indices), -1)
+        )
+        self._basis_indices = basis_indices
+        # the integral of each pdf is the weighted sum of the integrals of its
+        # basis, which are only computed for the basis that are used
+        used, used_indices = np.unique(basis_indices, return_inverse=True)
+        integrals = sciint.trapezoid(self._basis.T[used], self._xvals, axis=1)
+        norms = np.sum(
+            weights * integrals[used_indices.reshape(basis_indices.shape)], axis=1
+        )
+        self._weights = weights / norms[:, np.newaxis]
+        self._yvals = None
+        self._ycumul = None
+
+        self._xmin = self._xvals[0]
+        self._xmax = self._xvals[-1]
+        kwargs["shape"] = (np.shape(basis_indices)[0], np.size(self._xvals))
+        # skip the constructor of interp_gen, which needs the yvals
+        super(interp_gen, self).__init__(*args, **kwargs)
+
         self._addmetadata("xvals", self._xvals)
         self._addmetadata("mu", self.mu)
         self._addmetadata("sig", self.sig)
         self._addmetadata("dims", self.dims)
         self._addobjdata("sparse_indices", self.sparse_indices)
 
+    def _sum_basis(self, basis, rows):
+        """Return the weighted sums of the basis of the given rows at the xvals
+
+        Parameters
+        ----------
+        basis : np.ndarray
+            The basis, or their cumulative integrals, at the xvals, with shape (n, nbasis)
+        rows : np.ndarray
+            The rows to compute
+
+        Returns
+        -------
+        np.ndarray
+            The values of the rows, with shape (len(rows), n)
+        """
+        basis_t = basis.T
+        indices = self._basis_indices[rows]
+        weights = self._weights[rows]
+        vals = np.zeros((len(rows), basis.shape[0]))
+        for k in range(indices.shape[1]):
+            vals += weights[:, k, np.newaxis] * basis_t[indices[:, k]]
+        return vals
+
+    def _requested_rows(self, basis, row):
+        """Return the weighted sums of the basis of the distinct requested rows, and
+        the positions of the requested rows in them"""
+        rows, local_row = np.unique(row, return_inverse=True)
+        return self._sum_basis(basis, rows), local_row.reshape(np.shape(row))
+
+    @property
+    def yvals(self) -> np.ndarray[float]:
+        """Return the y-values of all the distributions at the xvals, computing them the first time"""
+        if self._yvals is None:
+            self._yvals = self._sum_basis(self._basis, np.arange(self.npdf))
+        return self._yvals
+
+    def _compute_ycumul(self) -> None:
+        self._ycumul = self._sum_basis(
+            sparse_rep.create_cumulative_basis(self._sparse_meta, cut=self._cut),
+            np.arange(self.npdf),
+        )
+
+    def _pdf(self, x, row):
+        # pylint: disable=arguments-differ
+        yvals, local_row = self._requested_rows(self._basis, row)
+        return interpolate_x_multi_y(
+            x, local_row, self._xvals, yvals, bounds_error=False, fill_value=0.0
+        ).ravel()
+
+    def _cdf(self, x, row):
+        # pylint: disable=arguments-differ
+        ycumul, local_row = self._requested_rows(
+            sparse_rep.create_cumulative_basis(self._sparse_meta, cut=self._cut), row
+        )
+        return interpolate_x_multi_y(
+            x, local_row, self._xvals, ycumul, bounds_error=False, fill_value=(0.0, 1.0)
+        ).ravel()
+
+    def _ppf(self, x, row):
+        # pylint: disable=arguments-differ
+        ycumul, local_row = self._requested_rows(
+            sparse_rep.create_cumulative_basis(self._sparse_meta, cut=self._cut), row
+        )
+        return interpolate_multi_x_y(
+            x,
+            local_row,
+            ycumul,
+            self._xvals,
+            bounds_error=False,
+            fill_value=(self._xmin, self._xmax),
+        ).ravel()
+
+    def custom_generic_moment(self, m):
+        """Compute the mth moment"""
+        m = np.asarray(m)
+        dx = self._xvals[1] - self._xvals[0]
+        # the moments of the basis, summed with the weights of each pdf
+        basis_moments = np.dot(self._xvals**m, self._basis)
+        return np.sum(self._weights * basis_moments[self._basis_indices], axis=1) * dx
+
     def _updated_ctor_param(self):
         """
         Add the two constructor's arguments for the Factory
         """
-        dct = super()._updated_ctor_param()
+        # skip interp_gen, which would add the yvals
+        dct = super(interp_gen, self)._updated_ctor_param()
         dct["sparse_indices"] = self.sparse_indices
         dct["xvals"] = self._xvals
         dct["mu"] = self.mu
         dct["sig"] = self.sig
         dct["dims"] = self.dims
+        dct["cut"] = self._cut
         return dct
 
     @classmethod
@@ -8,6 +8,10 @@ This module reorganizes it for usage by DESC within qp, and is python3 compliant
 
 __author__ = "Matias Carrasco Kind"
 
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+
 import numpy as np
 from scipy.special import voigt_profile  # pylint: disable=no-name-in-module
 from scipy import linalg as sla
@@ -29,15 +33,71 @@ def shapes2pdf(wa, ma, sa, ga, meta, cut=1.0e-5):  # pylint: disable=too-many-ar
     return pdf / sciint.trapezoid(pdf, x)
 
 
+# Maximum number of Voigt basis arrays kept by create_basis
+BASIS_CACHE_SIZE = 4
+
+_basis_cache = OrderedDict()
+
+
+def _cached_basis(key, build):
+    """return the basis array cached under key, building and caching it with build() if needed"""
+    A = _basis_cache.pop(key, None)
+    if A is None:
+        A = build()
+        A.flags.writeable = False
+    _basis_cache[key] = A
+    while len(_basis_cache) > BASIS_CACHE_SIZE:
+        _basis_cache.popitem(last=False)
+    return A
+
+
+def _basis_params(metadata, cut):
+    """return the parameters of create_voigt_basis from a metadata dictionary, and a hashable key of them"""
+    xvals = np.asarray(metadata["xvals"], dtype=float).ravel()
+    mu = np.asarray(metadata["mu"], dtype=float).ravel()
+    sigma = np.asarray(metadata["sig"], dtype=float).ravel()
+    Nmu, Nsigma, Nv = (int(dim) for dim in np.asarray(metadata["dims"]).ravel()[:3])
+    key = (xvals.tobytes(), tuple(mu), tuple(sigma), (Nmu, Nsigma, Nv), float(cut))
+    return key, (xvals, mu, Nmu, sigma, Nsigma, Nv)
+
+
 def create_basis(metadata, cut=1.0e-5):
-    """create the Voigt basis matrix out of a metadata dictionary"""
-    mu = metadata["mu"]
-    Nmu = metadata["dims"][0]
-    sigma = metadata["sig"]
-    Nsigma = metadata["dims"][1]
-    Nv = metadata["dims"][2]
-    xvals = metadata["xvals"]
-    return create_voigt_basis(xvals, mu, Nmu, sigma, Nsigma, Nv, cut=cut)
+    """create the Voigt basis matrix out of a metadata dictionary
+
+    The basis only depends on the metadata, so the last `BASIS_CACHE_SIZE` basis
+    arrays are cached and shared between all the callers, e.g. between the chunks
+    of a sparse file. They are read-only, use `create_voigt_basis` to get a basis
+    that can be modified.
+    """
+    key, params = _basis_params(metadata, cut)
+    return _cached_basis(key, lambda: create_voigt_basis(*params, cut=cut))
+
+
+def create_cumulative_basis(metadata, cut=1.0e-5):
+    """create the cumulative integrals of the Voigt basis out of a metadata dictionary
+
+    The integrals are computed at the xvals with the same trapezoid rule as
+    `interp_gen`, so the cdf of a sum of basis is the same sum of their cumulative
+    integrals. They are cached with the basis, see `create_basis`.
+    """
+    key, params = _basis_params(metadata, cut)
+    xvals = params[0]
+
+    def build():
+        A = create_basis(metadata, cut=cut)
+        C = np.empty(A.shape)
+        C[0] = 0.5 * A[0] * (xvals[1] - xvals[0])
+        C[1:] = np.cumsum(
+            (0.5 * (xvals[1:] - xvals[:-1]))[:, np.newaxis] * (A[1:] + A[:-1]), axis=0
+        )
+        return C
+
+    return _cached_basis(key + ("cumulative",), build)
+
+
+def clear_basis_cache():
+    """empty the cache of Voigt basis arrays used by create_basis and create_cumulative_basis"""
+    _basis_cache.clear()
 
 
 def create_voigt_basis(
@@ -62,17 +122,18 @@ def create_voigt_basis(
     means = np.linspace(mu[0], mu[1], Nmu)
     sig = np.linspace(sigma[0], sigma[1], Nsigma)
     gamma = np.linspace(0, 0.5, Nv)
-    NA = Nmu * Nsigma * Nv
-    Npdf = len(xvals)
-    A = np.zeros((Npdf, NA))
-    kk = 0
-    for i in range(Nmu):
-        for j in range(Nsigma):
-            for k in range(Nv):
-                pdft = voigt_profile(xvals - means[i], sig[j], gamma[k])
-                pdft = np.where(pdft >= cut, pdft, 0.0)
-                A[:, kk] = pdft / sla.norm(pdft)
-                kk += 1
+    # the profiles are symmetric and only depend on the distance to the mean,
+    # so they are only evaluated once for each distinct distance, which are few
+    # when the means and xvals are on similar grids
+    offsets = np.abs(np.asarray(xvals, dtype=float)[:, np.newaxis] - means)
+    distances, inverse = np.unique(offsets, return_inverse=True)
+    profiles = voigt_profile(
+        distances[:, np.newaxis, np.newaxis], sig[:, np.newaxis], gamma
+    )
+    # the basis are ordered by mean, then sigma, then gamma
+    A = profiles[inverse.reshape(offsets.shape)].reshape(len(xvals), Nmu * Nsigma * Nv)
+    A[A < cut] = 0.0
+    A /= np.sqrt(np.sum(A**2, axis=0))
     return A
 
 
@@ -140,6 +201,112 @@ def sparse_basis(dictionary, query_vec, n_basis, tolerance=None):
     return idxs[: n_active + 1], gamma
 
 
+def sparse_basis_batch(dictionary, query_vecs, n_basis, tolerance=None):
+    """
+    Compute the sparse representations of a block of vectors given a Dictionary (basis),
+    with the same orthogonal matching pursuit as `sparse_basis`, but for all the vectors at once.
+
+    The correlations of all the residuals with the dictionary are computed with a single
+    matrix product, and the Cholesky factors of the selected basis of all the vectors are
+    updated together. The dictionary is not modified, so it can be shared between
+    blocks and processes.
+
+    :param float dictionary: Array with all basis on each column,
+           must has shape (len(vector), total basis) and each column must have euclidean l-2 norm equal to 1
+    :param float query_vecs: vectors of which sparse representations are desired, with shape (nvec, len(vector))
+    :param int n_basis: number of desired basis
+    :param float tolerance: tolerance desired if n_basis is not needed to be fixed, must input a large number
+           for n_basis to assure achieving tolerance
+
+    :return: indices, values, n_active (the positions and the coefficients of the selected basis, with
+             shape (nvec, n_basis), of which only the first n_active[i] of row i are set)
+    """
+    query_vecs = np.atleast_2d(np.asarray(query_vecs, dtype=dictionary.dtype))
+    n_vec = query_vecs.shape[0]
+    machine_eps = np.finfo(dictionary.dtype).eps
+    basis_t = np.ascontiguousarray(dictionary.T)
+    alpha = query_vecs @ dictionary
+
+    idxs = np.zeros((n_vec, n_basis), dtype=int)
+    coefs = np.zeros((n_vec, n_basis), dtype=dictionary.dtype)
+    n_active = np.zeros(n_vec, dtype=int)
+    L = np.zeros((n_vec, n_basis, n_basis), dtype=dictionary.dtype)
+    L[:, 0, 0] = 1.0
+
+    # the rows that are still selecting basis, and their residuals
+    active = np.arange(n_vec)
+    res = query_vecs.copy()
+    for n in range(n_basis):
+        lam = np.argmax(np.abs(res @ dictionary), axis=1)
+        # stop if a basis is selected twice or is not correlated with the vector
+        keep = (alpha[active, lam] ** 2 >= machine_eps) & np.all(
+            idxs[active, :n] != lam[:, np.newaxis], axis=1
+        )
+        if n > 0:
+            # updates the Cholesky decompositions with the new basis
+            cross = np.einsum("bkx,bx->bk", basis_t[idxs[active, :n]], basis_t[lam])
+            w = np.linalg.solve(L[active, :n, :n], cross[:, :, np.newaxis])[:, :, 0]
+            v = np.sum(w**2, axis=1)
+            # the selected basis are dependent or normed are not unity
+            keep &= 1 - v > machine_eps
+            L[active, n, :n] = np.where(keep[:, np.newaxis], w, 0.0)
+            L[active, n, n] = np.sqrt(np.where(keep, 1 - v, 1.0))
+        active, lam, res = active[keep], lam[keep], res[keep]
+        if active.size == 0:
+            break
+        idxs[active, n] = lam
+        n_active[active] = n + 1
+
+        # solves LL'x = query_vec as a composition of two triangular systems
+        chol = L[active, : n + 1, : n + 1]
+        rhs = alpha[active[:, np.newaxis], idxs[active, : n + 1]][:, :, np.newaxis]
+        gamma = np.linalg.solve(np.swapaxes(chol, 1, 2), np.linalg.solve(chol, rhs))[
+            :, :, 0
+        ]
+        coefs[active, : n + 1] = gamma
+        res = query_vecs[active] - np.einsum(
+            "bk,bkx->bx", gamma, basis_t[idxs[active, : n + 1]]
+        )
+        if tolerance is not None:
+            keep = np.sum(res**2, axis=1) > tolerance
+            active, res = active[keep], res[keep]
+            if active.size == 0:
+                break
+    return idxs, coefs, n_active
+
+
+def _encode_sparse_block(dictionary, pdfs, Nsparse, tol, Ncoef):
+    """compute the sparse indices of a block of pdfs, see `build_sparse_representation`"""
+    Dind, Dval, n_active = sparse_basis_batch(dictionary, pdfs, Nsparse, tolerance=tol)
+    Da = 1.0 / (Ncoef - 1)
+    # the first value is kept as is, the others are relative to the largest one
+    max_val = np.max(
+        np.where(np.arange(Nsparse) < n_active[:, np.newaxis], Dval, -np.inf), axis=1
+    )
+    positive = max_val > 0
+    scale = np.where(positive, max_val, 1.0)[:, np.newaxis]
+    index = np.rint(Dval / scale / Da).astype(int)
+    index[:, 0] = np.rint(Dval[:, 0] / Da).astype(int)
+    index[~positive] = 0
+    sparse_ind = combine_int(index, Dind)
+    sparse_ind[np.arange(Nsparse) >= n_active[:, np.newaxis]] = 0
+    return sparse_ind
+
+
+_worker_dictionary = None
+
+
+def _set_worker_dictionary(dictionary):
+    """store the dictionary in a worker process, so that it is only sent once"""
+    global _worker_dictionary  # pylint: disable=global-statement
+    _worker_dictionary = dictionary
+
+
+def _encode_sparse_block_worker(pdfs, Nsparse, tol, Ncoef):
+    """encode a block of pdfs in a worker process, with the dictionary of that process"""
+    return _encode_sparse_block(_worker_dictionary, pdfs, Nsparse, tol, Ncoef)
+
+
 def combine_int(Ncoef, Nbase):
     """
     combine index of base (up to 62500 bases) and value (16 bits integer with sign) in a 32 bit integer
@@ -169,12 +336,11 @@ def get_N(longN):
 def decode_sparse_indices(indices):
     """decode sparse indices into basis indices and weigth array"""
     Ncoef = 32001
-    sp_ind = np.array(list(map(get_N, indices)))
-    spi = sp_ind[:, 0, :]
+    spi, basis_indices = get_N(np.atleast_2d(np.asarray(indices, dtype=np.int64)))
     dVals = 1.0 / (Ncoef - 1)
     vals = spi * dVals
     vals[:, 0] = 1.0
-    return sp_ind[:, 1, :], vals
+    return basis_indices, vals
 
 
 def indices2shapes(sparse_indices, meta):
@@ -227,8 +393,14 @@ def build_sparse_representation(  # pylint: disable=too-many-arguments
     Nsparse=20,
     tol=1.0e-10,
     verbose=True,
+    block_size=1000,
+    n_workers=1,
 ):
-    """compute the sparse representation of a set of pdfs evaluated on a common x array"""
+    """compute the sparse representation of a set of pdfs evaluated on a common x array
+
+    The pdfs are processed in blocks of ``block_size`` with `sparse_basis_batch`, and
+    the blocks are distributed over ``n_workers`` processes if it is larger than 1.
+    """
     # Note : the range for gamma is fixed to [0, 0.5] in create_voigt_basis
     Ntot = len(P)
     if verbose:
@@ -257,8 +429,6 @@ def build_sparse_representation(  # pylint: disable=too-many-arguments
     bigD = {}
 
     Ncoef = 32001
-    AA = np.linspace(0, 1, Ncoef)
-    Da = AA[1] - AA[0]
 
     bigD["xvals"] = x
     bigD["mu"] = mu
@@ -268,29 +438,32 @@ def build_sparse_representation(  # pylint: disable=too-many-arguments
     if verbose:
         print("Creating Sparse representation...")
 
-    Sparse_Array = np.zeros((Ntot, Nsparse), dtype="int")
-    for k in range(Ntot):
-        pdf0 = P[k]
-
-        Dind, Dval = sparse_basis(A, pdf0, Nsparse, tolerance=tol)
-
-        if len(Dind) < 1:  # pragma: no cover
-            continue
-        # bigD[k]['sparse'] = [Dind, Dval]
-        if max(Dval) > 0:
-            dval0 = Dval[0]
-            Dvalm = Dval / np.max(Dval)
-            index = np.array(list(map(round, (Dvalm / Da))), dtype="int")
-            index0 = int(round(dval0 / Da))
-            index[0] = index0
-        else:
-            index = np.zeros(len(Dind), dtype="int")  # pragma: no cover
-
-        sparse_ind = np.array(list(map(combine_int, index, Dind)))
-        Sparse_Array[k, 0 : len(sparse_ind)] = sparse_ind
-
-        # swap back columns
-        A[:, [Dind]] = A[:, [np.arange(len(Dind))]]
+    P = np.asarray(P, dtype=float)
+    blocks = [P[start : start + block_size] for start in range(0, Ntot, block_size)]
+    if n_workers > 1:
+        with ProcessPoolExecutor(
+            max_workers=n_workers,
+            initializer=_set_worker_dictionary,
+            initargs=(A,),
+        ) as executor:
+            sparse_blocks = list(
+                executor.map(
+                    _encode_sparse_block_worker,
+                    blocks,
+                    repeat(Nsparse),
+                    repeat(tol),
+                    repeat(Ncoef),
+                )
+            )
+    else:
+        sparse_blocks = [
+            _encode_sparse_block(A, block, Nsparse, tol, Ncoef) for block in blocks
+        ]
+    Sparse_Array = (
+        np.concatenate(sparse_blocks)
+        if sparse_blocks
+        else np.zeros((0, Nsparse), dtype="int")
+    )
 
     if verbose:
         print("done")
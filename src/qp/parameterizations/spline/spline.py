@@ -276,7 +276,7 @@ class spline_gen(Pdf_rows_gen):
         cls._add_creation_method(cls.create_from_xy_vals, "xy")
         cls._add_creation_method(cls.create_from_samples, "samples")
         cls._add_extraction_method(spline_extract_xy_vals, "xy")
-        cls._add_extraction_method(extract_samples, "samples")
+        cls._add_extraction_method(extract_samples, "samples", evaluates="rvs")
 
     @classmethod
     def create_ensemble(
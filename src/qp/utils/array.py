@@ -80,6 +80,80 @@ def get_bin_indices(bins: ArrayLike, x: ArrayLike) -> np.ndarray[int]:
     return idx.reshape(xshape).clip(0, n_bins - 1), mask.reshape(xshape)
 
 
+def _histogram_block(
+    samples: np.ndarray, bins: np.ndarray, uniform: bool
+) -> np.ndarray[int]:
+    """Histogram each row of a block of samples, see `histogram_rows`"""
+    n_rows = samples.shape[0]
+    n_bins = bins.size - 1
+
+    # the samples are put in n_bins + 2 columns per row, the first and last of
+    # which collect the samples below and above the bins, and are dropped at the end
+    if uniform:
+        with np.errstate(invalid="ignore"):
+            idx = np.floor((samples - bins[0]) * (n_bins / (bins[-1] - bins[0])))
+            idx = idx.astype(np.intp)
+        np.clip(idx, -1, n_bins, out=idx)
+        idx += 1
+        # the arithmetic can be off by one bin next to the edges due to rounding,
+        # compare with the edges so that the counts match np.histogram exactly
+        edges = np.concatenate([[-np.inf], bins, [np.inf]])
+        idx -= samples < edges[idx]
+        idx += samples >= edges[idx + 1]
+    else:
+        # the binary search is much faster on sorted values, and the order
+        # of the samples in a row does not change the counts
+        samples = np.sort(samples, axis=1)
+        idx = np.searchsorted(bins, samples, side="right")
+    # the last bin includes its upper edge
+    idx[samples == bins[-1]] = n_bins
+
+    idx += (n_bins + 2) * np.arange(n_rows)[:, np.newaxis]
+    counts = np.bincount(idx.ravel(), minlength=n_rows * (n_bins + 2))
+    return counts.reshape(n_rows, n_bins + 2)[:, 1:-1]
+
+
+def histogram_rows(
+    samples: ArrayLike, bins: ArrayLike, block_size: int = 65536
+) -> np.ndarray[int]:
+    """Histogram each row of samples with the same bin edges
+
+    This gives the same counts as calling `np.histogram` on each row, i.e. the bins
+    include their lower edge, and the last bin also includes its upper edge, but
+    bins many rows at once: the bin index of every sample of a block of rows is
+    found together, with arithmetic if the bins are equal width and with a binary
+    search otherwise, and the counts of the block are taken with a single
+    `np.bincount` over the flattened (row, bin) index.
+
+    Parameters
+    ----------
+    samples : ArrayLike, shape (nrow, nsamples)
+        The samples of each row
+    bins : ArrayLike, length N+1
+        The bin edges
+    block_size : int, optional
+        The approximate number of samples binned together, which keeps the
+        temporary arrays small enough to stay in cache, by default 65536
+
+    Returns
+    -------
+    np.ndarray[int], shape (nrow, N)
+        The number of samples of each row in each bin
+    """
+    samples = np.atleast_2d(np.asarray(samples, dtype=float))
+    bins = np.asarray(bins, dtype=float)
+    widths = bin_widths(bins)
+    uniform = np.allclose(widths, widths[0])
+
+    n_rows = samples.shape[0]
+    block_rows = max(1, block_size // max(1, samples.shape[1]))
+    counts = np.zeros((n_rows, bins.size - 1), dtype=np.intp)
+    for start in range(0, n_rows, block_rows):
+        end = min(start + block_rows, n_rows)
+        counts[start:end] = _histogram_block(samples[start:end], bins, uniform)
+    return counts
+
+
 def get_eval_case(x: ArrayLike, row: ArrayLike) -> tuple[int, np.ndarray, np.ndarray]:
     """Figure out which of the various input formats scipy.stats has passed us
 
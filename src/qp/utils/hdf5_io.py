@@ -0,0 +1,267 @@
+"""Utility functions for writing qp tables to HDF5 files with storage options"""
+
+from __future__ import annotations
+
+import os
+from typing import Mapping, Optional
+
+import h5py
+import numpy as np
+
+# Groups whose arrays have one row per distribution. These can be compressed
+# and chunked along the first axis, the `meta` group is always written as is.
+ROW_GROUPS = ["data", "ancil"]
+
+
+def check_write_options(
+    compression: Optional[str] = None,
+    compression_opts: Optional[int] = None,
+    shuffle: bool = False,
+    chunk_size: Optional[int] = None,
+) -> None:
+    """Check that the HDF5 write options are valid.
+
+    Parameters
+    ----------
+    compression : Optional[str], optional
+        The compression filter, one of 'gzip' or 'lzf', by default None
+    compression_opts : Optional[int], optional
+        The compression level, only used with 'gzip', by default None
+    shuffle : bool, optional
+        Whether to apply the byte shuffle filter, by default False
+    chunk_size : Optional[int], optional
+        The number of distributions per HDF5 chunk, by default None
+
+    Raises
+    ------
+    ValueError
+        Raised if any of the options are not allowed.
+    """
+    if not isinstance(shuffle, (bool, np.bool_)):
+        raise ValueError(f"shuffle must be True or False, not {shuffle}")
+    if compression not in [None, "gzip", "lzf"]:
+        raise ValueError(
+            f"compression must be one of None, 'gzip' or 'lzf', not {compression}"
+        )
+    if compression_opts is not None:
+        if compression != "gzip":
+            raise ValueError("compression_opts can only be used with 'gzip'")
+        if not 0 <= compression_opts <= 9:
+            raise ValueError(
+                f"gzip compression_opts must be between 0 and 9, not {compression_opts}"
+            )
+    if chunk_size is not None and chunk_size < 1:
+        raise ValueError(f"chunk_size must be a positive integer, not {chunk_size}")
+
+
+def has_write_options(
+    compression: Optional[str] = None,
+    compression_opts: Optional[int] = None,
+    shuffle: bool = False,
+    chunk_size: Optional[int] = None,
+    downcast: bool = False,
+) -> bool:
+    """Return True if any of the HDF5 write options differ from the defaults."""
+    return (
+        compression is not None
+        or compression_opts is not None
+        or shuffle
+        or chunk_size is not None
+        or downcast
+    )
+
+
+def dataset_kwds(
+    shape: tuple,
+    compression: Optional[str] = None,
+    compression_opts: Optional[int] = None,
+    shuffle: bool = False,
+    chunk_size: Optional[int] = None,
+) -> Mapping:
+    """Build the keyword arguments for `h5py.Group.create_dataset` for a dataset
+    with one row per distribution.
+
+    The chunk shape is ``(chunk_size, *shape[1:])``, so that each chunk holds
+    complete rows and reading a range of ``chunk_size`` distributions with
+    `qp.iterator` touches a single chunk.
+
+    Parameters
+    ----------
+    shape : tuple
+        The full shape of the dataset
+    compression : Optional[str], optional
+        The compression filter, one of 'gzip' or 'lzf', by default None
+    compression_opts : Optional[int], optional
+        The compression level, only used with 'gzip', by default None
+    shuffle : bool, optional
+        Whether to apply the byte shuffle filter, by default False
+    chunk_size : Optional[int], optional
+        The number of distributions per HDF5 chunk, by default None, which
+        lets h5py choose the chunk shape if one is needed.
+
+    Returns
+    -------
+    kwds : Mapping
+        The keyword arguments to pass to `create_dataset`
+    """
+    kwds = {}
+    # filters and chunking can not be used on scalar or empty datasets
+    if len(shape) == 0 or shape[0] == 0:
+        return kwds
+    if compression is not None:
+        kwds["compression"] = compression
+        if compression_opts is not None:
+            kwds["compression_opts"] = compression_opts
+    if shuffle:
+        kwds["shuffle"] = True
+    if chunk_size is not None:
+        kwds["chunks"] = (min(chunk_size, shape[0]),) + tuple(shape[1:])
+    return kwds
+
+
+def downcast_dtype(dtype: np.dtype) -> np.dtype:
+    """Return float32 for double precision floating point types, otherwise the input dtype."""
+    dtype = np.dtype(dtype)
+    if np.issubdtype(dtype, np.floating) and dtype.itemsize > 4:
+        return np.dtype(np.float32)
+    return dtype
+
+
+def write_tables_to_HDF5_group(
+    tables: Mapping,
+    group: h5py.Group,
+    compression: Optional[str] = None,
+    compression_opts: Optional[int] = None,
+    shuffle: bool = False,
+    chunk_size: Optional[int] = None,
+    downcast: bool = False,
+) -> None:
+    """Write the tables of an Ensemble (as made by `Ensemble.build_tables`) to
+    an open HDF5 group, with one subgroup per table.
+
+    Parameters
+    ----------
+    tables : Mapping
+        Dictionary of dictionaries of numpy arrays, with keys ``meta``, ``data``
+        and optionally ``ancil``.
+    group : h5py.Group
+        The open file or group to write to.
+    compression : Optional[str], optional
+        The compression filter, one of 'gzip' or 'lzf', by default None
+    compression_opts : Optional[int], optional
+        The compression level, only used with 'gzip', by default None
+    shuffle : bool, optional
+        Whether to apply the byte shuffle filter, by default False
+    chunk_size : Optional[int], optional
+        The number of distributions per HDF5 chunk, by default None
+    downcast : bool, optional
+        If True, double precision arrays in the ``data`` table are written
+        as float32, by default False
+    """
+    for table_name, table in tables.items():
+        table_group = group.require_group(table_name)
+        for key, val in table.items():
+            arr = np.asarray(val)
+            if table_name not in ROW_GROUPS:
+                table_group.create_dataset(key, data=arr)
+                continue
+            dtype = arr.dtype
+            if downcast and table_name == "data":
+                dtype = downcast_dtype(dtype)
+            kwds = dataset_kwds(
+                arr.shape,
+                compression=compression,
+                compression_opts=compression_opts,
+                shuffle=shuffle,
+                chunk_size=chunk_size,
+            )
+            table_group.create_dataset(key, data=arr.astype(dtype, copy=False), **kwds)
+
+
+def write_tables_to_HDF5(tables: Mapping, filepath: str, **kwargs) -> None:
+    """Write the tables of an Ensemble to a new HDF5 file, replacing any existing file.
+
+    Parameters
+    ----------
+    tables : Mapping
+        Dictionary of dictionaries of numpy arrays, with keys ``meta``, ``data``
+        and optionally ``ancil``.
+    filepath : str
+        Path to the output file.
+    kwargs :
+        The write options passed to `write_tables_to_HDF5_group`.
+    """
+    with h5py.File(filepath, "w") as fout:
+        write_tables_to_HDF5_group(tables, fout, **kwargs)
+
+
+def initialize_HDF5_write(
+    filepath: str,
+    comm=None,
+    compression: Optional[str] = None,
+    compression_opts: Optional[int] = None,
+    shuffle: bool = False,
+    chunk_size: Optional[int] = None,
+    downcast: bool = False,
+    **kwds,
+) -> tuple[dict[str, h5py.Group], h5py.File]:
+    """Prepare an HDF5 file for chunked output, where each keyword gives a group
+    name and a dictionary of ``{dataset_name: (shape, dtype)}``.
+
+    This mirrors `tables_io.hdf5.initialize_HDF5_write`, but creates the
+    datasets with the requested compression and chunk layout.
+
+    Parameters
+    ----------
+    filepath : str
+        The output file name
+    comm : MPI communicator, optional
+        MPI communicator to do parallel writing, by default None
+    compression : Optional[str], optional
+        The compression filter, one of 'gzip' or 'lzf', by default None
+    compression_opts : Optional[int], optional
+        The compression level, only used with 'gzip', by default None
+    shuffle : bool, optional
+        Whether to apply the byte shuffle filter, by default False
+    chunk_size : Optional[int], optional
+        The number of distributions per HDF5 chunk, by default None
+    downcast : bool, optional
+        If True, double precision datasets in the ``data`` group are created
+        as float32, by default False
+
+    Returns
+    -------
+    groups : dict[str, h5py.Group]
+        A dictionary of the groups to write to.
+    fout : h5py.File
+        The output file
+    """
+    outdir = os.path.dirname(os.path.abspath(filepath))
+    if not os.path.exists(outdir):  # pragma: no cover
+        os.makedirs(outdir, exist_ok=True)
+    if comm is None:
+        fout = h5py.File(filepath, "w")
+    else:  # pragma: no cover
+        if not h5py.get_config().mpi:
+            raise TypeError("hdf5py module not prepared for parallel writing.")
+        fout = h5py.File(filepath, "w", driver="mpio", comm=comm)
+    groups = {}
+    for group_name, datasets in kwds.items():
+        group = fout.create_group(group_name)
+        groups[group_name] = group
+        for key, (shape, dtype) in datasets.items():
+            if downcast and group_name == "data":
+                dtype = downcast_dtype(dtype)
+            group.create_dataset(
+                key,
+                shape,
+                dtype,
+                **dataset_kwds(
+                    shape,
+                    compression=compression,
+                    compression_opts=compression_opts,
+                    shuffle=shuffle,
+                    chunk_size=chunk_size,
+                ),
+            )
+    return groups, fout
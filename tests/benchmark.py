@@ -1,4 +1,4 @@
-""" Timing for qp distributions """
+"""Timing for qp distributions"""
 
 import time
 
@@ -70,6 +70,45 @@ def time_convert(ens, cls_to, **kwds):
     return ens_out
 
 
+def compare_packing(ens, xvals):
+    """Compare the size and accuracy of the packing types of packed_interp to interp"""
+    from qp.parameterizations.packed_interp.packing_utils import PackingType
+
+    ens_i = ens.convert_to(qp.interp_gen, xvals=xvals)
+    pdf_i = ens_i.pdf(xvals)
+    row_max = np.max(pdf_i, axis=1, keepdims=True)
+    in_tail = pdf_i < 1e-2 * row_max
+    size_i = ens_i.objdata["yvals"].nbytes / ens_i.npdf
+
+    print(
+        "Packing %i PDFS on %i grid points, interp uses %i bytes per PDF"
+        % (ens_i.npdf, xvals.size, size_i)
+    )
+    print("%-22s %8s %12s %12s %12s" % ("", "bytes", "max err", "mean err", "tail err"))
+    for packing_type in PackingType:
+        ens_p = ens_i.convert_to(
+            qp.packed_interp_gen, xvals=xvals, packing_type=packing_type
+        )
+        size_p = (
+            ens_p.objdata["ypacked"].nbytes + ens_p.objdata["ymax"].nbytes
+        ) / ens_p.npdf
+        # errors relative to the peak of each pdf, and in the tails relative to the pdf
+        err = np.abs(ens_p.pdf(xvals) - pdf_i) / row_max
+        tail_err = np.abs(ens_p.pdf(xvals) - pdf_i)[in_tail] / np.maximum(
+            pdf_i[in_tail], 1e-4 * np.broadcast_to(row_max, pdf_i.shape)[in_tail]
+        )
+        print(
+            "%-22s %8i %12.2e %12.2e %12.2e"
+            % (
+                packing_type.name,
+                size_p,
+                err.max(),
+                err.mean(),
+                np.median(tail_err),
+            )
+        )
+
+
 def main():
     """Main"""
     t0 = time.time()
@@ -84,6 +123,7 @@ def main():
 
     ens_i = time_convert(ens_orig, qp.interp_gen, xvals=bins)
     time_ensemble(ens_i)
+    compare_packing(ens_orig, bins)
 
     ens_h = time_convert(ens_orig, qp.hist_gen, bins=bins)
     time_ensemble(ens_h)
@@ -0,0 +1,123 @@
+import numpy as np
+import pytest
+import qp
+
+from qp.core.conversion_planner import plan_conversion
+from qp.parameterizations.hist.hist_utils import extract_hist_values
+from qp.parameterizations.interp.interp_utils import (
+    extract_vals_at_x,
+    extract_vals_from_hist,
+)
+from qp.parameterizations.quant.quant_utils import (
+    extract_quantiles,
+    invert_piecewise_linear_cdfs,
+)
+
+
+@pytest.fixture
+def norm_ensemble() -> qp.Ensemble:
+    rng = np.random.default_rng(11)
+    locs = rng.uniform(0.5, 2.0, (25, 1))
+    scales = rng.uniform(0.05, 0.3, (25, 1))
+    return qp.Ensemble(qp.stats.norm, data=dict(loc=locs, scale=scales))
+
+
+@pytest.fixture
+def mixmod_ensemble() -> qp.Ensemble:
+    rng = np.random.default_rng(12)
+    return qp.mixmod.create_ensemble(
+        means=rng.uniform(0.5, 2.0, (25, 3)),
+        stds=rng.uniform(0.05, 0.3, (25, 3)),
+        weights=rng.uniform(0.1, 1.0, (25, 3)),
+    )
+
+
+@pytest.mark.parametrize(
+    "from_name, to_name, kwargs, default_func",
+    [
+        ("hist", "interp", dict(xvals=np.linspace(-0.2, 2.7, 47)), extract_vals_at_x),
+        ("interp", "hist", dict(bins=np.linspace(-0.2, 2.7, 31)), extract_hist_values),
+        ("hist", "quant", dict(quants=np.linspace(0.0, 1.0, 21)), extract_quantiles),
+        ("mixmod", "hist", dict(bins=np.linspace(-0.2, 2.7, 31)), extract_hist_values),
+    ],
+)
+def test_shortcuts_match_default(
+    norm_ensemble, mixmod_ensemble, from_name, to_name, kwargs, default_func
+):
+    """Test that each shortcut is chosen over the default extraction method, and
+    gives the same data."""
+
+    if from_name == "mixmod":
+        ens = mixmod_ensemble
+    elif from_name == "hist":
+        ens = qp.convert(norm_ensemble, "hist", bins=np.linspace(0.0, 2.5, 51))
+    else:
+        ens = qp.convert(norm_ensemble, "interp", xvals=np.linspace(0.0, 2.5, 51))
+
+    to_class = qp.instance()[to_name]
+    routes = plan_conversion(ens.gen_class, to_class)
+    assert routes[0].kind == "shortcut"
+    assert routes[-1].extract_func is default_func
+    assert routes[0].cost < routes[-1].cost
+
+    short = routes[0].extract_func(ens, **kwargs)
+    default = default_func(ens, **kwargs)
+    assert short.keys() == default.keys()
+    for key, val in default.items():
+        assert np.allclose(short[key], val, atol=1e-12, equal_nan=True)
+
+    # both ways of converting give the same Ensemble as the default extraction
+    expected = qp.Ensemble(to_class, data=default).objdata
+    for converted in [
+        qp.convert(ens, to_name, **kwargs),
+        ens.convert_to(to_class, **kwargs),
+    ]:
+        for key, val in expected.items():
+            assert np.allclose(converted.objdata[key], val, atol=1e-12)
+
+
+def test_hist_to_interp_default_centers(norm_ensemble):
+    """Test that a hist Ensemble converts to interp on its bin centers by default"""
+
+    bins = np.linspace(0.0, 2.5, 51)
+    ens_h = qp.convert(norm_ensemble, "hist", bins=bins)
+    ens_i = qp.convert(ens_h, "interp")
+    assert np.allclose(ens_i.metadata["xvals"], 0.5 * (bins[1:] + bins[:-1]))
+
+    data = extract_vals_from_hist(ens_h)
+    assert np.array_equal(data["yvals"], ens_h.objdata["pdfs"])
+
+
+def test_invert_piecewise_linear_cdfs():
+    """Test the inversion of CDFs with flat parts, with unsorted quantiles"""
+
+    xvals = np.linspace(0.0, 1.0, 5)
+    cdfs = np.array([[0.0, 0.0, 0.25, 0.75, 1.0], [0.0, 0.25, 0.5, 0.75, 1.0]])
+    quants = np.array([0.5, 0.1, 0.0, 1.0, 0.25])
+    locs = invert_piecewise_linear_cdfs(xvals, cdfs, quants)
+    expected = np.array(
+        [[0.625, 0.35, -np.inf, np.inf, 0.5], [0.5, 0.1, -np.inf, np.inf, 0.25]]
+    )
+    assert np.allclose(locs, expected)
+
+
+def test_explain_conversion(norm_ensemble):
+    """Test that explain_conversion lists the routes, cheapest first"""
+
+    explanation = qp.explain_conversion("hist", "quant")
+    lines = explanation.splitlines()
+    assert lines[0] == "Converting hist to quant:"
+    assert lines[1].startswith("* shortcut extract_quantiles_from_hist")
+    assert "extract_quantiles " in lines[2]
+
+    # an explicit method does not use the shortcuts
+    lines = qp.explain_conversion(qp.hist, qp.hist, method="samples").splitlines()
+    assert len(lines) == 2
+    assert "extract_hist_samples" in lines[1]
+
+    # without a shortcut the extraction method is used
+    lines = qp.explain_conversion(norm_ensemble, "quant").splitlines()
+    assert lines[1].startswith("* extraction extract_quantiles")
+
+    with pytest.raises(KeyError):
+        qp.explain_conversion("not_a_class", "hist")
@@ -1,3 +1,7 @@
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+
+import h5py
 import pytest
 import qp
 import numpy as np
@@ -153,3 +157,147 @@ def test_writeHdf5Chunk_single_ens(hist_ensemble, tmp_path):
 
     single_ens.writeHdf5Chunk(groups, 0, 1)
     single_ens.finalizeHdf5Write(fout)
+
+
+def test_write_to_compressed(hist_ensemble, tmp_path):
+    """Test that write_to applies the compression, chunking and downcast options."""
+
+    file_path = tmp_path / "test-compressed.hdf5"
+    hist_ensemble.set_ancil({"ids": np.arange(hist_ensemble.npdf)})
+    hist_ensemble.write_to(
+        file_path, compression="gzip", shuffle=True, chunk_size=4, downcast=True
+    )
+
+    with h5py.File(file_path, "r") as f:
+        dset = f["data"]["pdfs"]
+        assert dset.compression == "gzip"
+        assert dset.shuffle
+        assert dset.chunks == (4, hist_ensemble.shape[1])
+        assert dset.dtype == np.float32
+        assert f["ancil"]["ids"].chunks == (4,)
+        assert f["meta"]["bins"].dtype == np.float64
+
+    new_ens = qp.read(file_path)
+    assert_all_close(new_ens.objdata["pdfs"], hist_ensemble.objdata["pdfs"], atol=1e-6)
+    for start, end, ens_chunk in qp.iterator(file_path, chunk_size=4):
+        assert ens_chunk.npdf == end - start
+
+
+def test_write_to_bad_options(hist_ensemble, tmp_path):
+    """Test that invalid write options raise errors."""
+
+    with pytest.raises(ValueError):
+        hist_ensemble.write_to(tmp_path / "test.hdf5", compression="zstd")
+    with pytest.raises(ValueError):
+        hist_ensemble.write_to(
+            tmp_path / "test.hdf5", compression="lzf", compression_opts=4
+        )
+    with pytest.raises(ValueError):
+        hist_ensemble.write_to(tmp_path / "test.pq", compression="gzip")
+    with pytest.raises(ValueError):
+        hist_ensemble.write_to(tmp_path / "test.hdf5", shuffle="yes")
+
+
+def test_initializeHdf5Write_compressed(hist_ensemble, tmp_path):
+    """Test that chunked writing creates compressed datasets with the requested layout."""
+
+    file_path = tmp_path / "test-chunked.hdf5"
+    npdf = hist_ensemble.npdf
+    groups, fout = hist_ensemble.initializeHdf5Write(
+        file_path, npdf, compression="lzf", chunk_size=5, downcast=True
+    )
+    for start in range(0, npdf, 5):
+        end = min(start + 5, npdf)
+        hist_ensemble[start:end].writeHdf5Chunk(groups, start, end)
+    hist_ensemble.finalizeHdf5Write(fout)
+
+    with h5py.File(file_path, "r") as f:
+        assert f["data"]["pdfs"].compression == "lzf"
+        assert f["data"]["pdfs"].chunks == (5, hist_ensemble.shape[1])
+        assert f["data"]["pdfs"].dtype == np.float32
+
+    new_ens = qp.read(file_path)
+    assert_all_close(new_ens.objdata["pdfs"], hist_ensemble.objdata["pdfs"], atol=1e-6)
+
+
+def _shared_ensemble_means(handle):
+    """Attach to a shared ensemble in a worker process and return the means"""
+    shared_ens = qp.Ensemble.from_shared_memory(handle)
+    means = shared_ens.mean()
+    shared_ens.close_shared_memory()
+    return means
+
+
+@pytest.mark.parametrize(
+    "test_data_name, key",
+    [
+        ("hist_test_data", "hist"),
+        ("interp_test_data", "interp"),
+        ("norm_test_data", "norm"),
+        ("mixmod_test_data", "mixmod"),
+        ("quant_test_data", "quant"),
+    ],
+)
+def test_pickle_protocol_5(test_data_name, key, request):
+    """Test that ensembles pickle with out-of-band buffers and rebuild to the same distributions."""
+
+    test_data = request.getfixturevalue(test_data_name)[key]
+    ens = qp.Ensemble(test_data["gen_func"], test_data["ctor_data"])
+    ens.set_ancil({"ids": np.arange(ens.npdf)})
+
+    buffers = []
+    pickled = pickle.dumps(ens, protocol=5, buffer_callback=buffers.append)
+    assert len(buffers) > 0
+    new_ens = pickle.loads(pickled, buffers=buffers)
+
+    assert new_ens.npdf == ens.npdf
+    assert_all_close(new_ens.pdf(t_data.TEST_XVALS), ens.pdf(t_data.TEST_XVALS))
+    assert_all_close(new_ens.ancil["ids"], ens.ancil["ids"])
+
+    single = pickle.loads(pickle.dumps(ens[0]))
+    assert_all_close(single.pdf(t_data.TEST_XVALS), ens[0].pdf(t_data.TEST_XVALS))
+
+
+def test_shared_memory(hist_ensemble):
+    """Test that ensembles can be rebuilt from shared memory in this and other processes."""
+
+    hist_ensemble.set_ancil(
+        {
+            "ids": np.arange(hist_ensemble.npdf),
+            "names": np.array(["a"] * 11, dtype=object),
+        }
+    )
+    with hist_ensemble.to_shared_memory() as handle:
+        new_ens = qp.Ensemble.from_shared_memory(handle)
+        assert_all_close(
+            new_ens.pdf(t_data.TEST_XVALS), hist_ensemble.pdf(t_data.TEST_XVALS)
+        )
+        assert new_ens.ancil["names"][0] == "a"
+
+        with ProcessPoolExecutor(max_workers=1) as executor:
+            means = executor.submit(_shared_ensemble_means, handle).result()
+        assert_all_close(means, hist_ensemble.mean())
+
+        # the block can not be closed while views of the shared arrays are in use
+        pdfs = new_ens.objdata["pdfs"]
+        ids = new_ens.ancil["ids"][2:]
+        with pytest.raises(BufferError):
+            new_ens.close_shared_memory()
+        # the ensemble is still usable after a failed close
+        assert new_ens.npdf == hist_ensemble.npdf
+        assert_all_close(
+            new_ens.pdf(t_data.TEST_XVALS), hist_ensemble.pdf(t_data.TEST_XVALS)
+        )
+        assert new_ens.ancil["names"][0] == "a"
+        del pdfs
+        with pytest.raises(BufferError):
+            new_ens.close_shared_memory()
+        del ids
+        new_ens.close_shared_memory()
+
+        other_ens = qp.Ensemble.from_shared_memory(handle)
+        other_ens.close_shared_memory()
+        other_ens.close_shared_memory()
+
+    # ensembles that do not use shared memory have nothing to close
+    hist_ensemble.close_shared_memory()
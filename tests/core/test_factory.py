@@ -1,3 +1,5 @@
+import h5py
+import numpy as np
 import pytest
 import qp
 from tests.helpers.test_data_helper import NPDF
@@ -37,3 +39,109 @@ def test_qp_read_with_fmt(test_data_dir):
     ens = qp.read(filepath, fmt="hdf5")
 
     assert ens.metadata["pdf_name"][0].decode() == "mixmod"
+
+
+def test_write_dict_compressed(hist_ensemble, norm_ensemble, tmp_path):
+    """Make sure that write_dict applies the compression options to every ensemble."""
+
+    file_path = tmp_path / "test-dict.hdf5"
+    qp.write_dict(
+        file_path,
+        {"ens_h": hist_ensemble, "ens_n": norm_ensemble},
+        compression="gzip",
+        compression_opts=4,
+        chunk_size=3,
+    )
+
+    with h5py.File(file_path, "r") as f:
+        assert f["ens_h"]["data"]["pdfs"].compression == "gzip"
+        assert f["ens_h"]["data"]["pdfs"].chunks[0] == 3
+        assert f["ens_n"]["data"]["loc"].compression_opts == 4
+
+    ens_dict = qp.read_dict(file_path)
+    assert np.allclose(ens_dict["ens_h"].objdata["pdfs"], hist_ensemble.objdata["pdfs"])
+    assert np.allclose(ens_dict["ens_n"].objdata["loc"], norm_ensemble.objdata["loc"])
+
+    # tables_io keyword arguments can not be combined with the storage options
+    with pytest.raises(ValueError):
+        qp.write_dict(
+            file_path, {"ens_h": hist_ensemble}, compression="gzip", overwrite=True
+        )
+
+
+def test_read_dict_lazy(hist_ensemble, norm_ensemble, tmp_path):
+    """Make sure that read_dict only reads an ensemble when its key is accessed."""
+
+    file_path = tmp_path / "test-dict.hdf5"
+    qp.write_dict(file_path, {"ens_h": hist_ensemble, "ens_n": norm_ensemble})
+
+    with qp.read_dict(file_path, lazy=True) as ens_dict:
+        assert isinstance(ens_dict, qp.LazyEnsembleDict)
+        assert list(ens_dict) == ["ens_h", "ens_n"]
+        assert len(ens_dict) == 2
+        assert "ens_h" in ens_dict
+        assert "loaded=[]" in repr(ens_dict)
+
+        ens_h = ens_dict["ens_h"]
+        assert ens_dict["ens_h"] is ens_h
+        assert np.allclose(ens_h.objdata["pdfs"], hist_ensemble.objdata["pdfs"])
+
+        ens_rows = ens_dict.get_rows("ens_n", 2, 5)
+        assert ens_rows.npdf == 3
+        assert np.allclose(ens_rows.objdata["loc"], norm_ensemble.objdata["loc"][2:5])
+
+        with pytest.raises(KeyError):
+            ens_dict["missing"]
+
+    assert ens_dict.closed
+    assert ens_dict["ens_h"] is ens_h
+    with pytest.raises(ValueError):
+        ens_dict["ens_n"]
+
+
+@pytest.mark.parametrize("n_workers", [1, 2])
+def test_read_dict_eager(hist_ensemble, norm_ensemble, tmp_path, n_workers):
+    """Make sure that read_dict can read all the ensembles, with several processes."""
+
+    file_path = tmp_path / "test-dict.hdf5"
+    qp.write_dict(file_path, {"ens_h": hist_ensemble, "ens_n": norm_ensemble})
+
+    ens_dict = qp.read_dict(file_path, n_workers=n_workers)
+    assert isinstance(ens_dict, dict)
+    assert list(ens_dict) == ["ens_h", "ens_n"]
+    assert np.allclose(ens_dict["ens_h"].objdata["pdfs"], hist_ensemble.objdata["pdfs"])
+    assert np.allclose(ens_dict["ens_n"].objdata["loc"], norm_ensemble.objdata["loc"])
+
+    with pytest.raises(ValueError):
+        qp.read_dict(file_path, lazy=True, n_workers=2)
+
+
+def test_read_dict_then_rewrite(hist_ensemble, norm_ensemble, tmp_path):
+    """Make sure that a file can be written again after reading it with read_dict."""
+
+    file_path = tmp_path / "test-dict.hdf5"
+    qp.write_dict(file_path, {"ens_h": hist_ensemble, "ens_n": norm_ensemble})
+
+    ens_dict = qp.read_dict(file_path)
+    qp.write_dict(file_path, {"ens_h": ens_dict["ens_h"]})
+    assert list(qp.read_dict(file_path)) == ["ens_h"]
+
+    # a lazy mapping keeps the file open after every ensemble has been read,
+    # until the end of the with block
+    with qp.read_dict(file_path, lazy=True) as lazy_dict:
+        ens_h = lazy_dict["ens_h"]
+        assert not lazy_dict.closed
+        assert lazy_dict.get_rows("ens_h", 0, 2).npdf == 2
+    assert lazy_dict.closed
+    qp.write_dict(file_path, {"ens_h": ens_h, "ens_n": norm_ensemble})
+
+    # or until it is closed
+    lazy_dict = qp.read_dict(file_path, lazy=True)
+    lazy_dict.close()
+    qp.write_dict(file_path, {"ens_h": ens_h, "ens_n": norm_ensemble})
+
+    # or when it is collected
+    lazy_dict = qp.read_dict(file_path, lazy=True)
+    del lazy_dict
+    qp.write_dict(file_path, {"ens_n": norm_ensemble})
+    assert list(qp.read_dict(file_path)) == ["ens_n"]
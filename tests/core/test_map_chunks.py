@@ -0,0 +1,171 @@
+import logging
+
+import numpy as np
+import pytest
+from mpi4py import MPI
+
+import qp
+from tests.helpers.test_funcs import assert_all_close
+
+
+def chunk_means(start, end, ens):
+    """Return the means of the distributions in a chunk"""
+    return np.atleast_1d(ens.mean()).flatten()
+
+
+def chunk_count(start, end, ens, scale=1):
+    """Return the number of distributions in a chunk"""
+    return scale * (end - start)
+
+
+def chunk_ensemble(start, end, ens):
+    """Return the chunk itself"""
+    return ens
+
+
+def chunk_digest(start, end, ens):
+    """Return the centroids of a t-digest of the distribution means"""
+    return qp.pytdigest.TDigest.compute(
+        np.atleast_1d(ens.mean()).flatten()
+    ).get_centroids()
+
+
+@pytest.fixture
+def hist_file(hist_ensemble, tmp_path):
+    file_path = str(tmp_path / "test-map.hdf5")
+    hist_ensemble.write_to(file_path)
+    return file_path
+
+
+@pytest.mark.parametrize("n_workers", [1, 2])
+def test_map_chunks_concat(hist_ensemble, hist_file, n_workers):
+    """Test that concatenated results are in the same order as the file."""
+
+    means = qp.map_chunks(hist_file, chunk_means, chunk_size=3, n_workers=n_workers)
+    assert_all_close(means, hist_ensemble.mean().flatten())
+
+
+def test_map_chunks_reducers(hist_ensemble, hist_file):
+    """Test the sum, tdigest, ensemble and no-reduce options."""
+
+    npdf = hist_ensemble.npdf
+    assert qp.map_chunks(hist_file, chunk_count, reduce="sum", chunk_size=4) == npdf
+    assert (
+        qp.map_chunks(hist_file, chunk_count, reduce="sum", chunk_size=4, scale=2)
+        == 2 * npdf
+    )
+
+    counts = qp.map_chunks(hist_file, chunk_count, reduce=None, chunk_size=4)
+    assert counts == [4, 4, npdf - 8]
+
+    ens = qp.map_chunks(hist_file, chunk_ensemble, chunk_size=4)
+    assert ens.npdf == npdf
+    assert_all_close(ens.objdata["pdfs"], hist_ensemble.objdata["pdfs"])
+
+    digest = qp.map_chunks(hist_file, chunk_digest, reduce="tdigest", chunk_size=4)
+    assert int(digest.weight) == npdf
+
+    with pytest.raises(ValueError):
+        qp.map_chunks(hist_file, chunk_count, reduce="max")
+    with pytest.raises(ValueError):
+        qp.map_chunks(hist_file, chunk_count, backend="threads")
+
+
+def test_map_chunks_mpi(hist_ensemble, hist_file, caplog):
+    """Test the mpi backend, and the progress and timing output."""
+
+    caplog.set_level(logging.INFO, logger="qp.core.parallel")
+    means, timings = qp.map_chunks(
+        hist_file,
+        chunk_means,
+        chunk_size=5,
+        backend="mpi",
+        comm=MPI.COMM_WORLD,
+        progress=True,
+        return_timings=True,
+    )
+    if MPI.COMM_WORLD.Get_rank() == 0:
+        assert_all_close(means, hist_ensemble.mean().flatten())
+    assert "map_chunks" in caplog.text
+    assert len(timings["chunks"]) == 3
+    assert timings["total"] >= timings["reduce"]
+
+
+@pytest.mark.parametrize("n_workers", [1, 2])
+def test_convert_file(hist_ensemble, hist_file, tmp_path, n_workers):
+    """Test that converting a file chunk by chunk matches the in-memory conversion."""
+
+    hist_ensemble.set_ancil({"ids": np.arange(hist_ensemble.npdf)})
+    hist_ensemble.write_to(hist_file)
+    xvals = np.linspace(0, 5, 21)
+    outfile = str(tmp_path / "test-converted.hdf5")
+
+    qp.convert_file(
+        hist_file,
+        outfile,
+        qp.interp,
+        chunk_size=3,
+        n_workers=n_workers,
+        write_options=dict(compression="gzip", chunk_size=3),
+        xvals=xvals,
+    )
+
+    ens_i = qp.read(outfile)
+    check_ens = qp.convert(hist_ensemble, "interp", xvals=xvals)
+    assert ens_i.metadata["pdf_name"][0].decode() == "interp"
+    assert_all_close(ens_i.objdata["yvals"], check_ens.objdata["yvals"])
+    assert_all_close(ens_i.ancil["ids"], hist_ensemble.ancil["ids"])
+    assert not (tmp_path / "test-converted.hdf5.checkpoint").exists()
+
+
+def test_convert_file_resume(hist_ensemble, hist_file, tmp_path, monkeypatch, caplog):
+    """Test that an interrupted conversion can be resumed from its checkpoint."""
+
+    xvals = np.linspace(0, 5, 21)
+    outfile = str(tmp_path / "test-resume.hdf5")
+    convert_chunk = qp.core.parallel._convert_chunk
+
+    def failing_convert_chunk(infile, start, *args):
+        if start >= 6:
+            raise RuntimeError("interrupted")
+        return convert_chunk(infile, start, *args)
+
+    monkeypatch.setattr(qp.core.parallel, "_convert_chunk", failing_convert_chunk)
+    with pytest.raises(RuntimeError):
+        qp.convert_file(hist_file, outfile, "interp", chunk_size=3, xvals=xvals)
+    monkeypatch.undo()
+
+    checkpoint = tmp_path / "test-resume.hdf5.checkpoint"
+    assert checkpoint.exists()
+
+    with pytest.raises(ValueError):
+        qp.convert_file(
+            hist_file, outfile, "interp", chunk_size=4, resume=True, xvals=xvals
+        )
+
+    caplog.set_level(logging.INFO, logger="qp.core.parallel")
+    qp.convert_file(
+        hist_file,
+        outfile,
+        "interp",
+        chunk_size=3,
+        resume=True,
+        progress=True,
+        xvals=xvals,
+    )
+    assert "convert_file: chunk" in caplog.text
+    assert not checkpoint.exists()
+    ens_i = qp.read(outfile)
+    check_ens = qp.convert(hist_ensemble, "interp", xvals=xvals)
+    assert_all_close(ens_i.objdata["yvals"], check_ens.objdata["yvals"])
+
+
+def test_convert_file_empty(hist_ensemble, tmp_path):
+    """Test that converting a file without any distributions raises an error."""
+
+    infile = str(tmp_path / "test-empty.hdf5")
+    hist_ensemble[0:0].write_to(infile)
+    outfile = tmp_path / "test-empty-converted.hdf5"
+    with pytest.raises(ValueError, match="test-empty.hdf5"):
+        qp.convert_file(infile, str(outfile), "interp", xvals=np.linspace(0, 5, 21))
+    assert not outfile.exists()
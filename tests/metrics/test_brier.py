@@ -140,3 +140,25 @@ class BrierTestCase(unittest.TestCase):
         result = brier_obj.evaluate()
         expected = 0.0
         assert np.isclose(result, expected)
+
+    def test_brier_truth_bin_indices(self):
+        """
+        Verify that giving the truth as bin indices matches the one-hot truth array,
+        including a truth value that is outside of all the bins.
+        """
+        pred = [[0.5, 0.5, 0], [0.2, 0.3, 0.5], [0, 1, 0]]
+        truth = [[1, 0, 0], [0, 0, 1], [0, 0, 0]]
+        truth_bins = np.array([0, 2, -1])
+        expected = Brier(pred, truth).evaluate()
+        result = Brier(pred, truth_bins).evaluate()
+        assert np.isclose(result, expected)
+
+    def test_brier_truth_bin_indices_wrong_size(self):
+        """
+        Verify exception is raised when there is not one bin index per prediction.
+        """
+        pred = [[0.5, 0.5, 0], [0.2, 0.3, 0.5]]
+        truth_bins = np.array([0, 2, 1])
+        brier_obj = Brier(pred, truth_bins)
+        with self.assertRaises(ValueError):
+            _ = brier_obj.evaluate()
@@ -0,0 +1,115 @@
+"""Tests for the MetricSuite class"""
+
+import numpy as np
+import pytest
+
+import qp
+from qp.metrics import MetricSuite
+from qp.metrics.concrete_metric_classes import (
+    BrierMetric,
+    CDELossMetric,
+    KLDMetric,
+    MomentMetric,
+)
+
+NPDF = 50
+
+
+@pytest.fixture
+def ensembles():
+    rng = np.random.default_rng(1234)
+    locs = rng.uniform(0.5, 2.0, size=(NPDF, 1))
+    scales = rng.uniform(0.1, 0.3, size=(NPDF, 1))
+    estimate = qp.Ensemble(qp.stats.norm, data=dict(loc=locs, scale=scales))
+    reference = qp.Ensemble(qp.stats.norm, data=dict(loc=locs + 0.05, scale=scales))
+    truth = locs.flatten() + rng.normal(0.0, 0.1, size=NPDF)
+    return estimate, reference, truth
+
+
+def test_metric_suite_evaluate(ensembles):
+    """Make sure that the suite gives the same results as the individual metrics,
+    and shares the grid of the metrics with the same limits and resolution."""
+    estimate, reference, truth = ensembles
+    suite = MetricSuite(["moment", "kld", "rmse", "brier", "cdeloss", "outlier"])
+    assert len(suite.grids) == 2
+
+    results = suite.evaluate(estimate, reference=reference, truth=truth)
+    assert list(results) == ["moment", "kld", "rmse", "brier", "cdeloss", "outlier"]
+    assert set(suite.timings) == set(results) | {"gridding"}
+
+    assert np.allclose(results["moment"], MomentMetric().evaluate(estimate))
+    assert np.allclose(results["kld"], KLDMetric().evaluate(estimate, reference))
+    assert np.isclose(results["brier"], BrierMetric().evaluate(estimate, truth))
+    assert np.isclose(results["cdeloss"], CDELossMetric().evaluate(estimate, truth))
+
+
+def test_metric_suite_common_grid(ensembles):
+    """Make sure that all the metrics use one grid with common_grid"""
+    estimate, reference, truth = ensembles
+    suite = MetricSuite(
+        {"mean": MomentMetric(moment_order=1), "cdeloss": CDELossMetric()},
+        common_grid=True,
+    )
+    assert len(suite.grids) == 1
+    grid = suite.grids[0]
+    assert grid[0] == 0.0 and grid[-1] == 3.0
+
+    results = suite.evaluate(estimate, truth=truth)
+    assert np.isclose(results["cdeloss"], CDELossMetric(grid).evaluate(estimate, truth))
+
+
+def test_metric_suite_common_grid_keeps_finest_grid(ensembles):
+    """Make sure that the common grid has as many points as the finest grid, so that
+    the metrics on that grid give the same results as when they are run alone"""
+    estimate, reference, _ = ensembles
+    suite = MetricSuite(
+        {"kld": KLDMetric(dx=0.01), "mean": MomentMetric(moment_order=1, dx=0.02)},
+        common_grid=True,
+    )
+    assert len(suite.grids) == 1
+    assert np.array_equal(suite.grids[0], KLDMetric(dx=0.01).grid())
+
+    results = suite.evaluate(estimate, reference=reference)
+    assert np.allclose(results["kld"], KLDMetric(dx=0.01).evaluate(estimate, reference))
+
+
+def test_metric_suite_accumulate(ensembles, tmp_path):
+    """Make sure that accumulating over chunks, in memory or from files, matches
+    the evaluation on the whole Ensemble."""
+    estimate, reference, truth = ensembles
+    suite = MetricSuite(["brier", "cdeloss", "moment", "kld"])
+    expected = {
+        key: np.mean(val)
+        for key, val in suite.evaluate(estimate, reference, truth).items()
+    }
+
+    suite.initialize()
+    for start in range(0, NPDF, 20):
+        end = start + 20
+        suite.accumulate(estimate[start:end], reference[start:end], truth[start:end])
+    results = suite.finalize()
+    for key, val in expected.items():
+        assert np.isclose(results[key], val)
+
+    filename = str(tmp_path / "estimate.hdf5")
+    ref_filename = str(tmp_path / "reference.hdf5")
+    estimate.write_to(filename)
+    reference.write_to(ref_filename)
+    results = suite.evaluate_file(
+        filename, reference=ref_filename, truth=truth, chunk_size=20
+    )
+    for key, val in expected.items():
+        assert np.isclose(results[key], val)
+
+
+def test_metric_suite_bad_inputs(ensembles):
+    """Make sure that the suite checks its metrics and inputs"""
+    estimate, _, _ = ensembles
+    with pytest.raises(ValueError):
+        MetricSuite([MomentMetric(), MomentMetric(moment_order=2)])
+    with pytest.raises(ValueError):
+        MetricSuite(["point_bias"])
+    with pytest.raises(ValueError):
+        MetricSuite(["kld"]).evaluate(estimate)
+    with pytest.raises(ValueError):
+        MetricSuite(["brier"]).evaluate(estimate)
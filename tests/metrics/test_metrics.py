@@ -7,6 +7,7 @@ Unit tests for PDF class
 import unittest
 
 import numpy as np
+from scipy import stats as sps
 
 import qp
 import qp.metrics
@@ -15,6 +16,7 @@ from qp.metrics.array_metrics import quick_rbpe
 from qp.metrics.concrete_metric_classes import (
     BrierMetric,
     KLDMetric,
+    KSMetric,
     MomentMetric,
     OutlierMetric,
     RBPEMetric,
@@ -206,6 +208,61 @@ class MetricTestCase(unittest.TestCase):
         rmse_quants = calculate_rmse(ens_q, ens_q_shift, limits=(0.0, 2.5))
         assert np.all(rmse_quants == 0.0)
 
+    def test_native_kld_rmse_match_gridded(self):
+        """Check that the KLD and RMSE computed from the stored arrays of matching
+        representations agree with the values from the integration grid"""
+        rng = np.random.default_rng(42)
+        bins = np.linspace(0.0, 2.5, 26)
+        xvals = np.linspace(0.0, 2.5, 26)
+        ens_pairs = [
+            [
+                qp.Ensemble(
+                    qp.hist, data=dict(bins=bins, pdfs=rng.uniform(0.1, 1.0, (5, 25)))
+                )
+                for _ in range(2)
+            ],
+            [
+                qp.Ensemble(
+                    qp.interp,
+                    data=dict(xvals=xvals, yvals=rng.uniform(0.1, 1.0, (5, 26))),
+                )
+                for _ in range(2)
+            ],
+        ]
+        for limits in [(0.0, 2.5), (0.33, 1.77)]:
+            for ens_p, ens_q in ens_pairs:
+                kld = calculate_kld(ens_p, ens_q, limits, dx=0.0001)
+                kld_grid = calculate_kld(ens_p, ens_q, limits, dx=0.0001, native=False)
+                assert np.allclose(kld, kld_grid, rtol=5e-3)
+                rmse = calculate_rmse(ens_p, ens_q, limits, dx=0.0001)
+                rmse_grid = calculate_rmse(
+                    ens_p, ens_q, limits, dx=0.0001, native=False
+                )
+                assert np.allclose(rmse, rmse_grid, rtol=1e-3)
+
+        ens_p, ens_q = [
+            qp.Ensemble(
+                qp.mixmod,
+                data=dict(
+                    means=rng.uniform(0.5, 2.0, (5, 3)),
+                    stds=rng.uniform(0.1, 0.3, (5, 3)),
+                    weights=np.ones((5, 3)) / 3,
+                ),
+            )
+            for _ in range(2)
+        ]
+        rmse = calculate_rmse(ens_p, ens_q, (0.0, 2.5), dx=0.0001)
+        rmse_grid = calculate_rmse(ens_p, ens_q, (0.0, 2.5), dx=0.0001, native=False)
+        assert np.allclose(rmse, rmse_grid, rtol=1e-3)
+
+        # hist with different bins falls back to the integration grid
+        ens_h = qp.Ensemble(
+            qp.hist, data=dict(bins=np.linspace(0.1, 2.6, 26), pdfs=np.ones((5, 25)))
+        )
+        rmse = calculate_rmse(ens_pairs[0][0], ens_h, (0.0, 2.5))
+        rmse_grid = calculate_rmse(ens_pairs[0][0], ens_h, (0.0, 2.5), native=False)
+        assert np.all(rmse == rmse_grid)
+
     def test_rmse_different_shapes(self):
         """Ensure that the rmse function fails when trying to compare ensembles of different sizes."""
         with self.assertRaises(ValueError) as context:
@@ -235,6 +292,37 @@ class MetricTestCase(unittest.TestCase):
         rbpe = calculate_rbpe(self.ens_n)
         assert np.all(rbpe >= -2.0)
 
+    def test_rbpe_matches_quick_rbpe(self):
+        """Test that the batched risk_based_point_estimate agrees with the per-distribution
+        quick_rbpe calculation"""
+        for limits in [(0.0, 2.5), (np.inf, np.inf)]:
+            rbpe = calculate_rbpe(self.ens_n, limits=limits)
+            expected = [
+                quick_rbpe(
+                    self.ens_n[n].pdf,
+                    (self.ens_n[n].ppf(0.01), self.ens_n[n].ppf(0.99)),
+                    limits,
+                )
+                for n in range(self.ens_n.npdf)
+            ]
+            assert np.allclose(rbpe, np.ravel(expected), atol=1e-4)
+
+    def test_rbpe_mixed_and_narrow_widths(self):
+        """Test that the risk_based_point_estimate handles ensembles mixing very
+        wide and very narrow PDFs, without allocating a grid covering all of them"""
+        locs = np.array([[1.0], [2.0], [200.0], [0.5], [1.5]])
+        scales = np.array([[0.1], [0.2], [100.0], [0.002], [0.002]])
+        ens = qp.Ensemble(qp.stats.norm, data=dict(loc=locs, scale=scales))
+        for limits in [(0.0, 2.5), (np.inf, np.inf)]:
+            rbpe = calculate_rbpe(ens, limits=limits)
+            expected = [
+                quick_rbpe(ens[n].pdf, (ens[n].ppf(0.01), ens[n].ppf(0.99)), limits)
+                for n in range(ens.npdf)
+            ]
+            assert np.allclose(rbpe, np.ravel(expected), atol=1e-4, rtol=1e-6)
+            # the narrow PDFs are resolved much more finely than dx
+            assert np.allclose(rbpe[3:], np.ravel(expected)[3:], atol=1e-5)
+
     def test_rbpe_alternative_ensembles(self):
         """Test the risk_based_point_estimate method against different types of ensembles"""
         bins = np.linspace(-5, 5, 11)
@@ -312,6 +400,52 @@ class MetricTestCase(unittest.TestCase):
         accumulated_result = brier_class_accumulate.finalize([sum_tuple])
         assert np.all(result == accumulated_result)
 
+    def test_calculate_brier_accumulate_chunks(self):
+        """Ensure that accumulating the brier metric over chunks of an ensemble gives
+        the same result as evaluating it on the whole ensemble."""
+        truth = 2 * (np.random.uniform(size=(11, 1)) - 0.5)
+        limits = [-2.0, 2]
+        result = calculate_brier(self.ens_n, truth, limits)
+
+        brier_class = BrierMetric(limits=limits)
+        brier_class.initialize()
+        sum_tuples = [
+            brier_class.accumulate(self.ens_n[start:end], truth[start:end])
+            for start, end in [(0, 4), (4, 8), (8, 11)]
+        ]
+        assert np.isclose(brier_class.finalize(sum_tuples), result)
+
+    def test_accumulate_per_distribution_metrics(self):
+        """Ensure that metrics with one value per distribution can be accumulated
+        over chunks, and that finalize returns the mean value"""
+        ens_shift = qp.Ensemble(
+            qp.stats.norm,
+            data=dict(
+                loc=self.ens_n.objdata["loc"] + 0.1, scale=self.ens_n.objdata["scale"]
+            ),
+        )
+        chunks = [(0, 4), (4, 8), (8, 11)]
+        single_metrics = [MomentMetric(moment_order=2), OutlierMetric(), RBPEMetric()]
+        for metric in single_metrics:
+            expected = np.mean(metric.evaluate(self.ens_n))
+            metric.initialize()
+            centroids = [metric.accumulate(self.ens_n[start:end]) for start, end in chunks]
+            assert np.isclose(metric.finalize(centroids), expected)
+
+        dist_metrics = [KLDMetric(), RMSEMetric(), KSMetric(method="quadrature")]
+        for metric in dist_metrics:
+            expected = np.mean(metric.evaluate(self.ens_n, ens_shift))
+            metric.initialize()
+            centroids = [
+                metric.accumulate(self.ens_n[start:end], ens_shift[start:end])
+                for start, end in chunks
+            ]
+            assert np.isclose(metric.finalize(centroids), expected)
+
+        for metric in single_metrics + dist_metrics:
+            assert metric.finalize() is None
+            assert metric.finalize([]) is None
+
     def test_calculate_brier_mismatched_number_of_truths(self):
         """Expect an exception when number of truth values doesn't match number of distributions"""
         truth = 2 * (np.random.uniform(size=(10, 1)) - 0.5)
@@ -356,6 +490,11 @@ class MetricTestCase(unittest.TestCase):
         """Check that the outlier rate is correctly calculated for an Ensemble with many distributions"""
         output = calculate_outlier_rate(self.ens_n)
         self.assertTrue(len(output) == 11)
+        expected = [
+            dist.cdf(0.0001) + (1.0 - dist.cdf(0.9999))
+            for dist in self.ens_n
+        ]
+        assert np.allclose(output, expected)
 
     def test_check_ensembles_are_same_size(self):
         """Test that no Value Error is raised when the ensembles are the same size"""
@@ -429,5 +568,55 @@ class MetricTestCase(unittest.TestCase):
         self.assertTrue(error_msg in str(context.exception))
 
 
+    def test_calculate_goodness_of_fit_quadrature(self):
+        """Test the deterministic goodness of fit between two normal distributions
+        against the analytic KS distance, and that a distribution matches itself"""
+        ens_a = qp.Ensemble(qp.stats.norm, data=dict(loc=np.array([[0.0]]), scale=np.array([[1.0]])))
+        ens_b = qp.Ensemble(qp.stats.norm, data=dict(loc=np.array([[0.3]]), scale=np.array([[1.0]])))
+        ks = calculate_goodness_of_fit(ens_a, ens_b, "ks", method="quadrature")
+        assert np.allclose(ks, 2 * sps.norm.cdf(0.15) - 1, atol=1e-4)
+
+        ens_shift = qp.Ensemble(
+            qp.stats.norm,
+            data=dict(
+                loc=self.ens_n.objdata["loc"] + 0.1, scale=self.ens_n.objdata["scale"]
+            ),
+        )
+        for fit_metric in ["ad", "cvm", "ks"]:
+            result = calculate_goodness_of_fit(
+                self.ens_n, self.ens_n, fit_metric, method="quadrature"
+            )
+            assert result.shape == (11,)
+            assert np.allclose(result, 0.0)
+
+            shifted = calculate_goodness_of_fit(
+                self.ens_n, ens_shift, fit_metric, method="quadrature"
+            )
+            assert np.all(shifted > 0.0)
+
+        ks_class = KSMetric(method="quadrature")
+        assert np.all(
+            ks_class.evaluate(self.ens_n, ens_shift)
+            == calculate_goodness_of_fit(self.ens_n, ens_shift, "ks", method="quadrature")
+        )
+
+        # mixmod ensembles only evaluate their ppf with one row of quantiles per distribution
+        ens_m = qp.mixmod.create_ensemble(
+            means=self.ens_n.objdata["loc"],
+            stds=self.ens_n.objdata["scale"],
+            weights=np.ones_like(self.ens_n.objdata["loc"]),
+        )
+        ks_mixmod = calculate_goodness_of_fit(ens_m, self.ens_n, "ks", method="quadrature")
+        assert np.allclose(ks_mixmod, 0.0, atol=1e-6)
+        ks_mixmod = calculate_goodness_of_fit(ens_m, ens_shift, "ks", method="quadrature")
+        assert np.allclose(
+            ks_mixmod,
+            calculate_goodness_of_fit(self.ens_n, ens_shift, "ks", method="quadrature"),
+            atol=1e-3,
+        )
+
+        with self.assertRaises(ValueError):
+            calculate_goodness_of_fit(self.ens_n, self.ens_n, "ks", method="xx")
+
 if __name__ == "__main__":
     unittest.main()
@@ -1,15 +1,17 @@
 # pylint: disable=no-member
 # pylint: disable=protected-access
 
+import pickle
 import unittest
 
 import numpy as np
+from scipy import stats
 
 import qp
 from qp import interp_gen
 from qp.core.ensemble import Ensemble
 from qp.metrics.concrete_metric_classes import PITMetric
-from qp.metrics.pit import PIT
+from qp.metrics.pit import PIT, PITSketch
 
 # constants for tests
 NMAX = 2.5
@@ -138,3 +140,87 @@ class PitTestCase(unittest.TestCase):
         centroids = pit_metric.accumulate(self.grid_ens, self.true_zs)
         chunked_class_results = pit_metric.finalize([centroids])
         assert chunked_class_results.npdf == 1
+
+    def test_pit_sketch_matches_pit(self):
+        """Check that merged sketches of chunks give the PIT Ensemble and the
+        meta-metrics of the PIT values of the whole sample"""
+        quant_grid = np.linspace(0, 1, 101)
+        pit_obj = PIT(self.grid_ens, self.true_zs, quant_grid)
+        pit_samps = pit_obj.pit_samps
+        eval_grid = np.linspace(0, 1, 51)
+
+        for method in PITSketch.methods:
+            sketches = [
+                PITSketch(quant_grid, method=method).update(
+                    self.grid_ens[start : start + 100],
+                    self.true_zs[start : start + 100],
+                )
+                for start in range(0, NPDF, 100)
+            ]
+            # the sketches can be sent to other processes
+            sketches = [pickle.loads(pickle.dumps(sketch)) for sketch in sketches]
+            sketch = PITSketch.merge_all(sketches)
+            assert sketch.n_samples == NPDF
+
+            pit_ens = sketch.pit
+            assert pit_ens.npdf == 1
+            assert np.allclose(
+                pit_ens.cdf(eval_grid), pit_obj.pit.cdf(eval_grid), atol=0.02
+            )
+
+            meta_metrics = sketch.calculate_pit_meta_metrics()
+            cvm = stats.cramervonmises(pit_samps, stats.uniform.cdf)
+            assert np.isclose(meta_metrics["cvm"].statistic, cvm.statistic, rtol=0.01)
+            assert np.isclose(meta_metrics["cvm"].pvalue, cvm.pvalue, rtol=0.05)
+            ks = stats.kstest(pit_samps, stats.uniform.cdf)
+            assert np.isclose(meta_metrics["ks"].statistic, ks.statistic, atol=0.005)
+            assert meta_metrics["ad"].statistic > 0
+            assert np.isclose(meta_metrics["outlier_rate"], OUTRATE)
+
+    def test_pit_sketch_outlier_rate(self):
+        """The outlier rate of the sketch for its outlier bounds is the exact
+        fraction of the PIT values outside of them, also after merging"""
+        rng = np.random.default_rng(12)
+        pit_samps = np.concatenate(
+            [rng.uniform(size=20000), [0.0, 0.00005, 0.99995, 1.0]]
+        )
+        expected = np.mean((pit_samps < 0.0001) | (pit_samps > 0.9999))
+        for method in PITSketch.methods:
+            sketch = PITSketch.merge_all(
+                PITSketch(method=method).add_pit_samples(chunk)
+                for chunk in np.array_split(pit_samps, 4)
+            )
+            assert np.array_equal(
+                sketch.outlier_counts,
+                [np.sum(pit_samps < 0.0001), np.sum(pit_samps > 0.9999)],
+            )
+            assert np.isclose(sketch.evaluate_PIT_outlier_rate(), expected)
+            assert np.isclose(
+                sketch.evaluate_PIT_outlier_rate(0.0001, 0.9999), expected
+            )
+            # other bounds are estimated from the sketch
+            assert np.isclose(
+                sketch.evaluate_PIT_outlier_rate(0.1, 0.9),
+                np.mean((pit_samps < 0.1) | (pit_samps > 0.9)),
+                atol=0.01,
+            )
+
+    def test_pit_sketch_uniform(self):
+        """Uniform PIT values should not be rejected by the sketch meta-metrics"""
+        rng = np.random.default_rng(42)
+        sketch = PITSketch(method="histogram").add_pit_samples(rng.uniform(size=10000))
+        meta_metrics = sketch.calculate_pit_meta_metrics()
+        for key in ["ad", "cvm", "ks"]:
+            assert 0.01 < meta_metrics[key].pvalue <= 1.0
+        assert np.allclose(sketch.ppf([0.25, 0.5, 0.75]), [0.25, 0.5, 0.75], atol=0.02)
+
+    def test_pit_sketch_bad_inputs(self):
+        """Test the errors raised by the sketch"""
+        with self.assertRaises(ValueError):
+            PITSketch(method="exact")
+        with self.assertRaises(ValueError):
+            PITSketch(method="histogram").merge(PITSketch(method="tdigest"))
+        with self.assertRaises(ValueError):
+            PITSketch().merge(PITSketch(outlier_bounds=(0.01, 0.99)))
+        with self.assertRaises(ValueError):
+            PITSketch.merge_all([])
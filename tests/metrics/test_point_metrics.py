@@ -7,6 +7,7 @@ from qp.metrics.point_estimate_metric_classes import (PointBias,
                                                       PointOutlierRate,
                                                       PointSigmaIQR,
                                                       PointSigmaMAD,
+                                                      PointStats,
                                                       PointStatsEz)
 
 # values for metrics
@@ -103,6 +104,61 @@ class test_point_metrics(unittest.TestCase):
 
 
 
+    def test_point_stats_single_pass(self):
+        """Test that the combined point statistics match the individual metrics,
+        both in memory and when accumulated over chunks."""
+        zgrid, zspec, pdf_ens, _ = construct_test_ensemble()
+        zb = pdf_ens.mode(grid=zgrid).flatten()
+        ez = PointStatsEz().evaluate(zb, zspec)
+
+        point_stats = PointStats(tdigest_compression=5000)
+        results = point_stats.evaluate(zb, zspec)
+        assert np.isclose(results['point_stats_iqr'], SIGIQR)
+        assert np.isclose(results['point_bias'], BIAS)
+        assert np.isclose(results['point_outlier_rate'], OUTRATE)
+        assert np.isclose(results['point_stats_sigma_mad'], SIGMAD)
+        assert np.isclose(results['mean'], np.mean(ez))
+        assert np.isclose(results['std'], np.std(ez))
+        assert results['count'] == len(ez)
+
+        for n_workers in [1, 2]:
+            chunked = point_stats.eval_from_iterator(
+                chunker(zb, 100), chunker(zspec, 100), n_workers=n_workers
+            )
+            assert np.isclose(chunked['point_stats_iqr'], SIGIQR, atol=1.0e-4)
+            assert np.isclose(chunked['point_bias'], BIAS, atol=1.0e-4)
+            assert np.isclose(chunked['point_outlier_rate'], OUTRATE)
+            assert np.isclose(chunked['point_stats_sigma_mad'], SIGMAD, atol=1.0e-4)
+            # the moments are exact
+            assert np.isclose(chunked['mean'], np.mean(ez))
+            assert np.isclose(chunked['std'], np.std(ez))
+            assert chunked['count'] == len(ez)
+
+    def test_point_stats_nothing_accumulated(self):
+        """Test that PointStats returns None when no values were accumulated,
+        and that empty chunks do not change the result"""
+        zgrid, zspec, pdf_ens, _ = construct_test_ensemble()
+        zb = pdf_ens.mode(grid=zgrid).flatten()
+        point_stats = PointStats(tdigest_compression=5000)
+        empty = point_stats.accumulate(np.array([]), np.array([]))
+        assert point_stats.finalize() is None
+        assert point_stats.finalize([]) is None
+        assert point_stats.finalize([empty]) is None
+
+        results = point_stats.finalize([empty, point_stats.accumulate(zb, zspec)])
+        assert np.isclose(results['point_stats_iqr'], SIGIQR, atol=1.0e-4)
+        assert results['count'] == len(zb)
+
+    def test_eval_from_iterator_uses_all_chunks(self):
+        """Test that every chunk contributes to the result of eval_from_iterator"""
+        zgrid, zspec, pdf_ens, _ = construct_test_ensemble()
+        zb = pdf_ens.mode(grid=zgrid).flatten()
+        point_bias = PointBias(tdigest_compression=5000)
+        # the last chunk alone has a very different median
+        zb_shifted = np.concatenate([zb[:300], zb[300:] + 1.0])
+        bias = point_bias.eval_from_iterator(chunker(zb_shifted, 100), chunker(zspec, 100))
+        assert np.isclose(bias, point_bias.evaluate(zb_shifted, zspec), atol=1.0e-3)
+
     def test_cde_loss_metric(self):
         """Basic test to ensure that the CDE Loss metric class is working."""
         zgrid, zspec, pdf_ens, _ = construct_test_ensemble()
@@ -114,3 +170,13 @@ class test_point_metrics(unittest.TestCase):
         chunked_result = cde_loss_class.finalize([chunk_output])
 
         assert np.isclose(chunked_result, CDEVAL)
+
+    def test_cde_loss_metric_chunks(self):
+        """Ensure that the CDE Loss accumulated over chunks matches the full evaluation."""
+        zgrid, zspec, pdf_ens, _ = construct_test_ensemble()
+        cde_loss_class = CDELossMetric(zgrid)
+        chunk_outputs = [
+            cde_loss_class.accumulate(pdf_ens[start:start + 100], zspec[start:start + 100])
+            for start in range(0, pdf_ens.npdf, 100)
+        ]
+        assert np.isclose(cde_loss_class.finalize(chunk_outputs), CDEVAL)
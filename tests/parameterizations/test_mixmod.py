@@ -2,6 +2,11 @@ import pytest
 import qp
 import numpy as np
 
+from qp.parameterizations.mixmod.mixmod_utils import (
+    extract_mixmod_fit_grid,
+    fit_gaussian_mixtures,
+)
+
 
 @pytest.fixture
 def mixmod_ensemble(mixmod_test_data) -> qp.Ensemble:
@@ -19,6 +24,24 @@ def test_norm(mixmod_ensemble):
         mixmod_ensemble.norm()
 
 
+def test_ppf_input_formats(mixmod_ensemble):
+    """Test that the ppf evaluates the right distribution for every input format,
+    including repeated quantiles and one row of quantiles per distribution."""
+
+    npdf = mixmod_ensemble.npdf
+    per_row = np.stack([np.linspace(0.1, 0.9, npdf), np.full(npdf, 0.5)], axis=-1)
+
+    repeated = mixmod_ensemble.ppf(np.array([0.5, 0.5]))
+    assert np.allclose(mixmod_ensemble.cdf(repeated), 0.5, atol=5e-3)
+
+    locs = mixmod_ensemble.ppf(per_row)
+    assert np.allclose(mixmod_ensemble.cdf(locs), per_row, atol=5e-3)
+
+    rows = np.arange(npdf)[:, np.newaxis]
+    locs_2d = mixmod_ensemble.dist._ppf(per_row, rows).reshape(npdf, 2)
+    assert np.allclose(locs_2d, locs)
+
+
 def test_x_samples(mixmod_ensemble):
     """Test that x_samples works as expected."""
 
@@ -149,3 +172,114 @@ def test_invalid_input(means, stds, weights, match_string):
 
     with pytest.raises(ValueError, match=match_string):
         ens = qp.mixmod.create_ensemble(means=means, stds=stds, weights=weights)
+
+
+def test_fit_gaussian_mixtures():
+    """Test that the batched EM fit recovers the parameters of known mixtures."""
+
+    rng = np.random.default_rng(42)
+    true_means = np.array([0.0, 3.0, 6.0])
+    true_stds = np.array([0.5, 0.3, 1.0])
+    true_weights = np.array([0.3, 0.5, 0.2])
+    counts = (true_weights * 4000).astype(int)
+    samples = np.concatenate(
+        [
+            rng.normal(mean, std, (6, count))
+            for mean, std, count in zip(true_means, true_stds, counts)
+        ],
+        axis=1,
+    )
+
+    fit = fit_gaussian_mixtures(samples, ncomps=3, batch_size=4)
+    assert fit["means"].shape == (6, 3)
+    assert np.allclose(fit["means"], true_means, atol=0.2)
+    assert np.allclose(fit["stds"], true_stds, atol=0.1)
+    assert np.allclose(fit["weights"], true_weights, atol=0.02)
+
+    # the initialization is deterministic
+    fit_again = fit_gaussian_mixtures(samples, ncomps=3)
+    assert np.all(fit_again["means"] == fit["means"])
+
+
+def test_fit_gaussian_mixtures_weighted():
+    """Test that integer weights are equivalent to repeated values."""
+
+    rng = np.random.default_rng(42)
+    values = rng.normal(0.0, 1.0, (3, 200))
+    counts = rng.integers(1, 4, (3, 200))
+    repeated = np.array(
+        [np.repeat(row, count) for row, count in zip(values, counts)], dtype=object
+    )
+
+    fit = fit_gaussian_mixtures(values, ncomps=2, sample_weights=counts, tol=1e-10)
+    for i, row in enumerate(repeated):
+        fit_row = fit_gaussian_mixtures(
+            row.astype(float)[np.newaxis, :], ncomps=2, tol=1e-10
+        )
+        assert np.allclose(fit["means"][i], fit_row["means"][0], atol=1e-5)
+        assert np.allclose(fit["stds"][i], fit_row["stds"][0], atol=1e-5)
+
+
+def test_fit_gaussian_mixtures_zero_weights():
+    """Test that rows whose weights sum to zero can not be fit."""
+
+    grid = np.linspace(0.0, 2.0, 21)
+    sample_weights = np.exp(-0.5 * ((grid - 1.0) / 0.2) ** 2) * np.ones((3, 1))
+    sample_weights[1] = 0.0
+    with pytest.raises(ValueError, match=r"rows \[1\]"):
+        fit_gaussian_mixtures(grid, ncomps=2, sample_weights=sample_weights)
+
+
+def test_convert_to_mixmod():
+    """Test that converting to mixmod from samples gives back the input distributions."""
+
+    locs = np.linspace(0.5, 2.0, 5)[:, np.newaxis]
+    scales = np.full((5, 1), 0.2)
+    ens_n = qp.Ensemble(qp.stats.norm, data=dict(loc=locs, scale=scales))
+    ens_m = ens_n.convert_to(qp.mixmod_gen, ncomps=2, nsamples=4000, random_state=42)
+    assert ens_m.npdf == 5
+    xvals = np.linspace(0.0, 2.5, 101)
+    assert np.allclose(ens_m.pdf(xvals), ens_n.pdf(xvals), atol=0.2)
+
+
+@pytest.mark.parametrize("pdf_name", ["hist", "interp"])
+def test_convert_to_mixmod_grid(pdf_name):
+    """Test that fitting mixmod directly to hist and interp Ensembles gives back
+    the mixtures they were made from, deterministically."""
+
+    means = np.array([[0.5, 1.5], [0.8, 2.0], [1.0, 1.6]])
+    stds = np.array([[0.2, 0.3], [0.15, 0.25], [0.2, 0.2]])
+    weights = np.array([[0.4, 0.6], [0.7, 0.3], [0.5, 0.5]])
+    ens_in = qp.mixmod.create_ensemble(means=means, stds=stds, weights=weights)
+    grid = np.linspace(-0.5, 3.0, 71)
+    if pdf_name == "hist":
+        ens_g = ens_in.convert_to(qp.hist_gen, bins=grid)
+    else:
+        ens_g = ens_in.convert_to(qp.interp_gen, xvals=grid)
+
+    ens_m = ens_g.convert_to(qp.mixmod_gen, method="grid", ncomps=2)
+    assert ens_m.npdf == 3
+    assert np.allclose(ens_m.objdata["means"], means, atol=0.02)
+    assert np.allclose(ens_m.objdata["stds"], stds, atol=0.01)
+    xvals = np.linspace(0.0, 2.5, 101)
+    assert np.allclose(ens_m.pdf(xvals), ens_in.pdf(xvals), atol=0.05)
+
+    ens_m_again = ens_g.convert_to(qp.mixmod_gen, method="grid", ncomps=2)
+    assert np.all(ens_m_again.objdata["means"] == ens_m.objdata["means"])
+
+
+def test_convert_to_mixmod_grid_xvals():
+    """Test the grid method on distributions evaluated on xvals, and that it
+    requires xvals for types without a grid."""
+
+    locs = np.linspace(0.5, 2.0, 5)[:, np.newaxis]
+    scales = np.full((5, 1), 0.2)
+    ens_n = qp.Ensemble(qp.stats.norm, data=dict(loc=locs, scale=scales))
+    ens_m = ens_n.convert_to(
+        qp.mixmod_gen, method="grid", ncomps=1, xvals=np.linspace(-0.5, 3.0, 71)
+    )
+    assert np.allclose(ens_m.objdata["means"], locs, atol=1e-3)
+    assert np.allclose(ens_m.objdata["stds"], scales, atol=1e-3)
+
+    with pytest.raises(ValueError, match="xvals"):
+        extract_mixmod_fit_grid(ens_n)
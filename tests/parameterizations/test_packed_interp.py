@@ -0,0 +1,111 @@
+import numpy as np
+import pytest
+import qp
+
+from qp.parameterizations.packed_interp.packing_utils import (
+    PackingType,
+    pack_array,
+    packing_dtype,
+    unpack_array,
+)
+
+
+@pytest.mark.parametrize(
+    "packing_type", [PackingType.linear_from_rowmax, PackingType.log_from_rowmax]
+)
+def test_packed_interp_matches_unpacked(packing_type):
+    """Test that evaluating the packed values directly matches an interp Ensemble
+    of the unpacked values, and that only the packed values are kept."""
+
+    rng = np.random.default_rng(3)
+    locs = rng.uniform(0.5, 2.5, (20, 1))
+    scales = rng.uniform(0.05, 0.4, (20, 1))
+    ens_n = qp.Ensemble(qp.stats.norm, data=dict(loc=locs, scale=scales))
+    xvals = np.linspace(0.0, 3.0, 151)
+    ens_p = qp.convert(ens_n, "packed_interp", xvals=xvals, packing_type=packing_type)
+
+    yvals = unpack_array(
+        packing_type,
+        ens_p.objdata["ypacked"],
+        row_max=ens_p.objdata["ymax"],
+        log_floor=ens_p.dist.log_floor,
+    )
+    ens_i = qp.interp.create_ensemble(xvals=xvals, yvals=yvals)
+
+    x = np.linspace(-0.2, 3.2, 91)
+    assert np.allclose(ens_p.pdf(x), ens_i.pdf(x))
+    assert np.allclose(ens_p.cdf(x), ens_i.cdf(x))
+    quants = np.linspace(0.01, 0.99, 17)
+    assert np.allclose(ens_p.ppf(quants), ens_i.ppf(quants))
+    assert np.allclose(ens_p.mean(), ens_i.mean())
+    assert np.allclose(ens_p.dist.yvals, ens_i.dist.yvals)
+
+    # a few rows, and a different x for each row
+    assert np.allclose(ens_p[5:9].pdf(x), ens_i[5:9].pdf(x))
+    x_rows = np.linspace(0.2, 2.8, 20)[:, np.newaxis]
+    assert np.allclose(ens_p.pdf(x_rows), ens_i.pdf(x_rows))
+
+    assert not hasattr(ens_p.dist, "_yvals")
+    assert not hasattr(ens_p.dist, "_ycumul")
+
+
+@pytest.mark.parametrize("packing_type", list(PackingType))
+def test_packing_round_trip(packing_type, tmp_path):
+    """Test that every packing type round trips through the packed values and a file,
+    with the expected integer type and precision."""
+
+    xvals = np.linspace(0.0, 3.0, 121)
+    ens_n = qp.Ensemble(
+        qp.stats.norm,
+        data=dict(loc=np.array([[1.0], [1.6]]), scale=np.array([[0.2], [0.4]])),
+    )
+    ens_p = qp.convert(ens_n, "packed_interp", xvals=xvals, packing_type=packing_type)
+
+    dtype = packing_dtype(packing_type)
+    assert ens_p.objdata["ypacked"].dtype == dtype
+    alloc = qp.packed_interp.get_allocation_kwds(
+        ens_p.npdf, xvals=xvals, packing_type=packing_type
+    )
+    assert np.dtype(alloc["ypacked"][1]) == dtype
+
+    pdf_n = ens_n.pdf(xvals)
+    tolerance = 0.03 if dtype == np.uint8 else 2e-3
+    assert np.allclose(ens_p.pdf(xvals), pdf_n, atol=tolerance * pdf_n.max())
+
+    filename = tmp_path / "packed.hdf5"
+    ens_p.write_to(str(filename))
+    ens_r = qp.read(str(filename))
+    assert ens_r.objdata["ypacked"].dtype == dtype
+    assert np.allclose(ens_r.pdf(xvals), ens_p.pdf(xvals))
+
+
+def test_asinh_packing_keeps_tails():
+    """Test that the asinh packing keeps the tails that the log packing cuts,
+    and that the 16 bit packings are more precise than the 8 bit ones."""
+
+    xvals = np.linspace(-6.0, 6.0, 241)
+    yvals = np.atleast_2d(np.exp(-0.5 * xvals**2))
+    tail = (yvals[0] < 1e-3) & (yvals[0] > 1e-6)
+
+    unpacked = {}
+    for packing_type in PackingType:
+        packed, row_max = pack_array(packing_type, yvals)
+        unpacked[packing_type] = unpack_array(packing_type, packed, row_max=row_max)
+
+    assert np.all(unpacked[PackingType.log_from_rowmax][0, tail] == 0.0)
+    assert np.all(unpacked[PackingType.asinh_from_rowmax_16][0, tail] > 0.0)
+    assert np.allclose(
+        unpacked[PackingType.asinh_from_rowmax_16][0, tail],
+        yvals[0, tail],
+        rtol=0.05,
+        atol=1e-6,
+    )
+    for bits_8, bits_16 in [
+        (PackingType.linear_from_rowmax, PackingType.linear_from_rowmax_16),
+        (PackingType.log_from_rowmax, PackingType.log_from_rowmax_16),
+        (PackingType.asinh_from_rowmax, PackingType.asinh_from_rowmax_16),
+    ]:
+        assert (
+            np.abs(unpacked[bits_16] - yvals).max()
+            < np.abs(unpacked[bits_8] - yvals).max()
+        )
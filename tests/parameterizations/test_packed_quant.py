@@ -0,0 +1,100 @@
+import numpy as np
+import pytest
+import qp
+
+from qp.parameterizations.packed_quant.packed_quant_utils import (
+    pack_quantile_locs,
+    unpack_quantile_locs,
+)
+
+
+@pytest.fixture
+def norm_ensemble() -> qp.Ensemble:
+    rng = np.random.default_rng(5)
+    locs = rng.uniform(0.5, 2.5, (20, 1))
+    scales = rng.uniform(0.05, 0.4, (20, 1))
+    return qp.Ensemble(qp.stats.norm, data=dict(loc=locs, scale=scales))
+
+
+@pytest.mark.parametrize("nbits", [8, 16])
+def test_pack_quantile_locs(nbits):
+    """Test that the unpacked locations are monotonic, keep the end points, and are
+    within half a step of the packed locations."""
+
+    rng = np.random.default_rng(7)
+    locs = np.cumsum(rng.exponential(0.1, (10, 30)), axis=1) - 1.0
+    locs[3] = 0.5  # a row with a single location
+
+    loc_min, loc_max, dlocs = pack_quantile_locs(locs, nbits)
+    assert dlocs.dtype == np.dtype(f"u{nbits // 8}")
+    assert dlocs.shape == (10, 29)
+
+    unpacked = unpack_quantile_locs(loc_min, loc_max, dlocs, nbits)
+    assert np.all(np.diff(unpacked, axis=1) >= 0)
+    assert np.allclose(unpacked[:, [0, -1]], locs[:, [0, -1]])
+    half_step = 0.5 * (loc_max - loc_min) / (2**nbits - 1)
+    assert np.all(np.abs(unpacked - locs) <= half_step * (1 + 1e-9))
+
+    with pytest.raises(ValueError):
+        pack_quantile_locs(locs[:, ::-1], nbits)
+    with pytest.raises(ValueError):
+        pack_quantile_locs(np.array([[-np.inf, 0.0, 1.0]]), nbits)
+    with pytest.raises(ValueError):
+        pack_quantile_locs(locs, 32)
+
+
+@pytest.mark.parametrize("nbits", [8, 16])
+def test_packed_quant_matches_quant(norm_ensemble, nbits):
+    """Test that a packed_quant Ensemble evaluates like a quant Ensemble of the
+    unpacked locations."""
+
+    quants = np.linspace(0.01, 0.99, 40)
+    ens_pq = qp.convert(norm_ensemble, "packed_quant", quants=quants, nbits=nbits)
+    assert set(ens_pq.objdata) == {"loc_min", "loc_max", "dlocs"}
+
+    ens_q = qp.quant.create_ensemble(quants, ens_pq.dist.locs[:, 1:-1])
+    x = np.linspace(0.0, 3.0, 61)
+    assert np.allclose(ens_pq.pdf(x), ens_q.pdf(x))
+    assert np.allclose(ens_pq.cdf(x), ens_q.cdf(x))
+    assert np.allclose(ens_pq.ppf(quants), ens_q.ppf(quants))
+
+    # the packing error on the cdf is small compared to the quant parameterization
+    ens_ref = qp.convert(norm_ensemble, "quant", quants=quants)
+    tolerance = 5e-3 if nbits == 8 else 5e-5
+    assert np.allclose(ens_pq.cdf(x), ens_ref.cdf(x), atol=tolerance)
+
+    # converting a quant Ensemble packs its locations
+    ens_pq2 = qp.convert(ens_ref, "packed_quant", nbits=nbits)
+    assert np.allclose(ens_pq2.cdf(x), ens_ref.cdf(x), atol=tolerance)
+    assert np.allclose(ens_pq[4:9].pdf(x), ens_pq.pdf(x)[4:9])
+
+
+@pytest.mark.parametrize("nbits", [8, 16])
+def test_packed_quant_io(norm_ensemble, nbits, tmp_path):
+    """Test that a packed_quant Ensemble round trips through a file, and can be
+    read back in chunks."""
+
+    quants = np.linspace(0.01, 0.99, 40)
+    ens_pq = qp.convert(norm_ensemble, "packed_quant", quants=quants, nbits=nbits)
+    filename = str(tmp_path / "packed_quant.hdf5")
+    ens_pq.write_to(filename)
+
+    ens_r = qp.read(filename)
+    assert ens_r.gen_class is qp.packed_quant_gen
+    assert ens_r.objdata["dlocs"].dtype == ens_pq.objdata["dlocs"].dtype
+    x = np.linspace(0.0, 3.0, 61)
+    assert np.allclose(ens_r.pdf(x), ens_pq.pdf(x))
+
+    chunks = [chunk.pdf(x) for _, _, chunk in qp.iterator(filename, chunk_size=6)]
+    assert np.allclose(np.vstack(chunks), ens_pq.pdf(x))
+
+    alloc = qp.packed_quant.get_allocation_kwds(ens_pq.npdf, quants=quants, nbits=nbits)
+    assert alloc["dlocs"][0] == ens_pq.objdata["dlocs"].shape
+    assert np.dtype(alloc["dlocs"][1]) == ens_pq.objdata["dlocs"].dtype
+
+
+def test_packed_quant_needs_quants(norm_ensemble):
+    """Test that converting a non-quantile Ensemble requires the quantiles"""
+
+    with pytest.raises(ValueError):
+        qp.convert(norm_ensemble, "packed_quant")
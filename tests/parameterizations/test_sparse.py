@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+import qp
+
+from qp.parameterizations.sparse_interp import sparse_rep
+
+
+@pytest.fixture
+def sparse_ensemble(sparse_test_data) -> qp.Ensemble:
+    ens = qp.sparse.create_ensemble(**sparse_test_data["sparse"]["ctor_data"])
+    return ens
+
+
+def test_sparse_matches_dense(sparse_ensemble, sparse_test_data):
+    """Test that the lazily evaluated sparse Ensemble matches an interp Ensemble
+    built from the dense pdfs, without expanding the pdfs of all the rows."""
+
+    ctor_data = sparse_test_data["sparse"]["ctor_data"]
+    xvals = ctor_data["xvals"]
+    assert sparse_ensemble.dist._yvals is None
+
+    # expand the pdfs the way the sparse representation is defined
+    A = sparse_rep.create_basis(ctor_data)
+    indices, weights = sparse_rep.decode_sparse_indices(ctor_data["sparse_indices"])
+    yvals = np.sum(A[:, indices] * weights, axis=-1).T
+    ens_i = qp.interp.create_ensemble(xvals=xvals, yvals=yvals)
+
+    x = np.linspace(xvals[0] - 0.1, xvals[-1] + 0.1, 57)
+    assert np.allclose(sparse_ensemble.pdf(x), ens_i.pdf(x))
+    assert np.allclose(sparse_ensemble.cdf(x), ens_i.cdf(x))
+    quants = np.linspace(0.05, 0.95, 19)
+    assert np.allclose(sparse_ensemble.ppf(quants), ens_i.ppf(quants))
+    assert np.allclose(sparse_ensemble.mean(), ens_i.mean())
+
+    # a few rows, and a different x for each row
+    assert np.allclose(sparse_ensemble[2:4].pdf(x), ens_i[2:4].pdf(x))
+    x_rows = np.linspace(0.1, 1.5, sparse_ensemble.npdf)[:, np.newaxis]
+    assert np.allclose(sparse_ensemble.pdf(x_rows), ens_i.pdf(x_rows))
+    assert sparse_ensemble.dist._yvals is None
+
+    assert np.allclose(sparse_ensemble.dist.yvals, ens_i.dist.yvals)
+
+
+def test_sparse_slices_share_basis(sparse_ensemble):
+    """Test that the slices of a sparse Ensemble reuse the same cached basis"""
+
+    assert sparse_ensemble[1:3].dist._basis is sparse_ensemble.dist._basis
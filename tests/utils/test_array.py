@@ -33,3 +33,24 @@ def test_decode_strings_not_numpy():
     for i in range(0, len(uncoded_strs)):
         assert isinstance(decoded["test"][i], str)
         assert uncoded_strs[i] == decoded["test"][i]
+
+
+@pytest.mark.parametrize(
+    "bins", [np.linspace(-2.0, 2.0, 41), np.array([-2.0, -1.0, -0.5, 0.0, 0.3, 2.0])]
+)
+def test_histogram_rows(bins):
+    """Test that histogram_rows gives the same counts as np.histogram on each row,
+    including for samples on the bin edges and outside of the bins."""
+
+    rng = np.random.default_rng(1234)
+    samples = rng.normal(0.0, 1.2, (7, 500))
+    samples[:, : len(bins)] = bins
+    samples[0, -1] = np.nan
+
+    counts = qp.utils.array.histogram_rows(samples, bins)
+    assert counts.shape == (7, len(bins) - 1)
+    assert np.all(
+        qp.utils.array.histogram_rows(samples, bins, block_size=1000) == counts
+    )
+    for row, row_counts in zip(samples, counts):
+        assert np.all(row_counts == np.histogram(row[np.isfinite(row)], bins=bins)[0])
@@ -5,6 +5,8 @@ Unit tests for PDF class
 import unittest
 
 import numpy as np
+from scipy import integrate
+from scipy.special import voigt_profile
 
 import qp
 from qp.parameterizations.sparse_interp import sparse_rep
@@ -89,6 +91,64 @@ class UtilsTestCase(unittest.TestCase):
         pdf_rec = sparse_rep.pdf_from_sparse(ALL, A, xvals)
         self.assertTrue(np.allclose(pdf_rec[:, 0], pdf0, atol=1.5e-2))
 
+    def test_sparse_batch(self):
+        """Test that the batched sparse representation matches the one of each vector"""
+
+        xvals = np.linspace(0, 1, 101)
+        A = sparse_rep.create_voigt_basis(xvals, (0, 1), 21, (0.01, 0.2), 5, 3)
+        locs = np.linspace(0.2, 0.8, 7)[:, np.newaxis]
+        pdfs = np.exp(-((xvals - locs) ** 2) / (2.0 * 0.05**2)) + 0.5 * np.exp(
+            -((xvals - locs - 0.1) ** 2) / (2.0 * 0.02**2)
+        )
+        idxs, coefs, n_active = sparse_rep.sparse_basis_batch(A, pdfs, 5)
+        self.assertEqual(idxs.shape, (7, 5))
+        for pdf, idx, coef, n in zip(pdfs, idxs, coefs, n_active):
+            # sparse_basis swaps the columns of the dictionary, so it gets a copy
+            idx_1, coef_1 = sparse_rep.sparse_basis(A.copy(), pdf, 5)
+            self.assertEqual(n, len(idx_1))
+            self.assertTrue(np.all(idx[:n] == idx_1))
+            self.assertTrue(np.allclose(coef[:n], coef_1))
+
+        ALL, _, A = sparse_rep.build_sparse_representation(
+            xvals, pdfs, Nsparse=5, verbose=False, block_size=3
+        )
+        ALL_2, _, _ = sparse_rep.build_sparse_representation(
+            xvals, pdfs, Nsparse=5, verbose=False, n_workers=2
+        )
+        self.assertTrue(np.all(ALL == ALL_2))
+        pdf_rec = sparse_rep.pdf_from_sparse(ALL, A, xvals)
+        pdf_norm = pdfs / integrate.trapezoid(pdfs, xvals)[:, np.newaxis]
+        self.assertTrue(np.allclose(pdf_rec.T, pdf_norm, atol=0.1 * np.max(pdf_norm)))
+
+    def test_sparse_basis_cache(self):
+        """Test that the Voigt basis matches the profiles, and is cached by create_basis"""
+
+        xvals = np.linspace(0, 1, 51)
+        A = sparse_rep.create_voigt_basis(xvals, (0.2, 0.8), 4, (0.05, 0.1), 3, 2)
+        self.assertEqual(A.shape, (51, 24))
+        # the basis are ordered by mean, then sigma, then gamma
+        pdft = voigt_profile(xvals - 0.4, 0.1, 0.5)
+        pdft = np.where(pdft >= 1.0e-5, pdft, 0.0)
+        self.assertTrue(np.allclose(A[:, 11], pdft / np.sqrt(np.sum(pdft**2))))
+
+        sparse_rep.clear_basis_cache()
+        meta = dict(
+            xvals=xvals, mu=[0.2, 0.8], sig=[0.05, 0.1], dims=[4, 3, 2, 32001, 5]
+        )
+        A_1 = sparse_rep.create_basis(meta)
+        self.assertTrue(np.array_equal(A_1, A))
+        self.assertFalse(A_1.flags.writeable)
+        # the same metadata, even as arrays read back from a file, reuses the cached basis
+        meta_arrays = {key: np.array(val) for key, val in meta.items()}
+        self.assertIs(sparse_rep.create_basis(meta_arrays), A_1)
+        self.assertIsNot(sparse_rep.create_basis(meta, cut=1.0e-4), A_1)
+
+        # the cache is bounded
+        for n_mu in range(5, 5 + sparse_rep.BASIS_CACHE_SIZE):
+            sparse_rep.create_basis(dict(meta, dims=[n_mu, 3, 2, 32001, 5]))
+        self.assertIsNot(sparse_rep.create_basis(meta), A_1)
+        sparse_rep.clear_basis_cache()
+
 
 if __name__ == "__main__":
     unittest.main()